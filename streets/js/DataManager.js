@@ -5,6 +5,36 @@ class DataManager {
     constructor() {
         this.cache = new Map();
         this.filters = null; // Will store loaded filter data
+        this.manifest = null; // Catalog of generated cities (street_data/data/manifest.json)
+        this.manifestPromise = null;
+    }
+
+    /**
+     * Load the generated dataset manifest once. It lists every generated city with its
+     * files, content hashes and initial map view, so no per-region probing is needed.
+     */
+    async loadManifest() {
+        if (!this.manifestPromise) {
+            // no-cache: the browser revalidates its cached copy instead of downloading it again
+            this.manifestPromise = fetch('./street_data/data/manifest.json', { cache: 'no-cache' })
+                .then(response => (response.ok ? response.json() : null))
+                .catch(error => {
+                    console.warn('Dataset manifest not available, using built-in region list:', error);
+                    return null;
+                })
+                .then(manifest => {
+                    this.manifest = manifest && manifest.cities ? manifest : null;
+                    return this.manifest;
+                });
+        }
+        return this.manifestPromise;
+    }
+
+    /**
+     * Get a region's manifest entry (null if the manifest is missing or lacks the region)
+     */
+    getManifestEntry(region) {
+        return (this.manifest && this.manifest.cities[region]) || null;
     }
 
     /**
@@ -21,6 +51,7 @@ class DataManager {
             if (!this.filters) {
                 await this.loadFilters();
             }
+            await this.loadManifest();
             
             // Simulate API call delay
             await this.simulateLoadingDelay();
@@ -35,12 +66,19 @@ class DataManager {
                 'seattle_wa': { city: 'seattle', state: 'wa' }
             };
             
-            const regionInfo = regionMapping[region];
+            const manifestEntry = this.getManifestEntry(region);
+            const separator = region.lastIndexOf('_');
+            const regionInfo = regionMapping[region] || (manifestEntry ? {
+                city: region.slice(0, separator),
+                state: region.slice(separator + 1)
+            } : null);
             if (!regionInfo) {
                 throw new Error(`Region "${region}" is not supported`);
             }
             
-            const streetsData = await this.loadCityData(regionInfo.city, regionInfo.state);
+            const streetsData = await this.loadCityData(
+                regionInfo.city, regionInfo.state, manifestEntry ? manifestEntry.files.json : null
+            );
 
             // Apply filters to the data
             const filteredData = this.applyFilters(streetsData, region);
@@ -117,14 +155,20 @@ class DataManager {
 
     /**
      * Load city street data from JSON file using new naming convention
+     * 
+     * @param {Object|null} fileInfo - Manifest file entry ({file, sha256}); its content hash
+     *     versions the URL so cached copies are reused until the data changes
      */
-    async loadCityData(city, state) {
-        const filename = `${city}_${state}_streets.json`;
+    async loadCityData(city, state, fileInfo = null) {
+        const filename = fileInfo ? fileInfo.file : `${city}_${state}_streets.json`;
         const fallbackFilename = `${city.replace('_', '-')}_streets.json`; // Fallback to old naming
+        const url = fileInfo
+            ? `./street_data/data/${filename}?v=${fileInfo.sha256}`
+            : `./street_data/data/${filename}`;
         
         try {
             // Try new naming convention first
-            let response = await fetch(`./street_data/data/${filename}`);
+            let response = await fetch(url);
             
             // If new naming fails, try old naming convention
             if (!response.ok && response.status === 404) {
@@ -297,9 +341,37 @@ class DataManager {
     }
 
     /**
-     * Get available regions
+     * Get available regions: the generated cities listed in the manifest once it is
+     * loaded, otherwise the built-in list
      */
     getAvailableRegions() {
+        const builtIn = this.getBuiltInRegions();
+        if (!this.manifest) {
+            return builtIn;
+        }
+
+        return Object.entries(this.manifest.cities).map(([id, entry]) => {
+            const known = builtIn.find(r => r.id === id);
+            return {
+                id,
+                name: entry.name,
+                description: known ? known.description : `${entry.state || ''}, USA`,
+                available: true,
+                filename: entry.files.json.file,
+                hash: entry.files.json.sha256,
+                bytes: entry.files.json.bytes,
+                streets: entry.streets,
+                totalMiles: entry.total_miles,
+                bbox: entry.bbox,
+                view: entry.view
+            };
+        });
+    }
+
+    /**
+     * Get the regions known without a manifest
+     */
+    getBuiltInRegions() {
         return [
             {
                 id: 'san_francisco_ca',
@@ -351,14 +423,18 @@ class DataManager {
      * Validate region
      */
     isValidRegion(region) {
-        const availableRegions = this.getAvailableRegions();
-        return availableRegions.some(r => r.id === region);
+        return Boolean(this.getManifestEntry(region)) || this.getBuiltInRegions().some(r => r.id === region);
     }
     
     /**
      * Check if region data is available
      */
     async checkRegionAvailability(region) {
+        if (await this.loadManifest()) {
+            return Boolean(this.getManifestEntry(region));
+        }
+        
+        // No manifest: probe the data file
         const availableRegions = this.getAvailableRegions();
         const regionInfo = availableRegions.find(r => r.id === region);
         
@@ -379,6 +455,11 @@ class DataManager {
      * Get regions with actual data availability
      */
     async getAvailableRegionsWithData() {
+        // One manifest request replaces a HEAD probe per region
+        if (await this.loadManifest()) {
+            return this.getAvailableRegions();
+        }
+        
         const regions = this.getAvailableRegions();
         const regionsWithAvailability = await Promise.all(
             regions.map(async (region) => ({
@@ -396,6 +477,8 @@ class DataManager {
     clearCache() {
         this.cache.clear();
         this.filters = null; // Also clear filters so they get reloaded
+        this.manifest = null; // And the manifest, to pick up newly generated cities
+        this.manifestPromise = null;
     }
 
     /**
@@ -30,6 +30,8 @@ class GameController {
     init() {
         this.showLandingPage();
         this.loadSavedProgress();
+        // Fetch the dataset catalog while the landing page is shown
+        this.dataManager.loadManifest();
     }
 
     /**
@@ -55,6 +57,7 @@ class GameController {
      * Select a region and start loading
      */
     async selectRegion(region) {
+        await this.dataManager.loadManifest();
         if (!this.dataManager.isValidRegion(region)) {
             this.ui.showError(`Region "${region}" is not available`);
             return;
@@ -104,6 +107,10 @@ class GameController {
             
             // Initialize the map with current region
             console.log('Initializing map for region:', this.gameState.currentRegion);
+            this.mapManager.registerRegion(
+                this.gameState.currentRegion,
+                this.dataManager.getManifestEntry(this.gameState.currentRegion)
+            );
             this.mapManager.initializeMap('map', this.gameState.currentRegion);
             console.log('Map initialized');
             
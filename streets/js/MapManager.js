@@ -163,6 +163,34 @@ class MapManager {
         return this.regionBounds[this.currentRegion] || this.regionBounds['san_francisco_ca'];
     }
 
+    /**
+     * Add map bounds for a region from its manifest entry (bbox and initial view),
+     * unless the region already has hand-tuned bounds
+     */
+    registerRegion(region, entry) {
+        if (this.regionBounds[region] || !entry || !entry.bbox || !entry.view) {
+            return;
+        }
+
+        const [south, west, north, east] = entry.bbox;
+        const latPad = (north - south) / 2;
+        const lonPad = (east - west) / 2;
+        this.regionBounds[region] = {
+            center: entry.view.center,
+            zoom: entry.view.zoom,
+            minZoom: entry.view.minZoom,
+            maxZoom: entry.view.maxZoom,
+            bounds: [
+                [south, west], // Southwest
+                [north, east]  // Northeast
+            ],
+            panBounds: [
+                [south - latPad, west - lonPad], // Southwest
+                [north + latPad, east + lonPad]  // Northeast
+            ]
+        };
+    }
+
     /**
      * Set current region
      */
@@ -467,10 +495,20 @@ class MapManager {
     }
 
     /**
-     * Prioritize streets by length and discovery status for level-of-detail
+     * Prioritize streets by importance and discovery status for level-of-detail
      */
     prioritizeStreets(streets, maxCount) {
-        // Sort by importance: discovered first, then by length
+        // Generated data is already sorted by importance: keep that order, discovered streets first
+        if (streets.length > 0 && streets[0].importance !== undefined) {
+            const discovered = streets.filter(street => this.discoveredStreets.has(street.id));
+            if (discovered.length >= maxCount) {
+                return discovered.slice(0, maxCount);
+            }
+            const undiscovered = streets.filter(street => !this.discoveredStreets.has(street.id));
+            return discovered.concat(undiscovered.slice(0, maxCount - discovered.length));
+        }
+
+        // Older data without importance: sort by discovery, then by length
         const sortedStreets = streets.sort((a, b) => {
             const aDiscovered = this.discoveredStreets.has(a.id) ? 1 : 0;
             const bDiscovered = this.discoveredStreets.has(b.id) ? 1 : 0;
@@ -499,6 +537,17 @@ class MapManager {
         const neLat = bounds.getNorth();
         const neLng = bounds.getEast();
 
+        // Generated data carries precomputed bboxes: [south, west, north, east]
+        if (street.bbox) {
+            const overlaps = box => box[0] <= neLat && box[2] >= swLat && box[1] <= neLng && box[3] >= swLng;
+            if (!overlaps(street.bbox)) {
+                return false;
+            }
+            const inside = street.bbox[0] >= swLat && street.bbox[2] <= neLat &&
+                street.bbox[1] >= swLng && street.bbox[3] <= neLng;
+            return inside || !street.line_bboxes || street.line_bboxes.some(overlaps);
+        }
+
         // Check if this is MultiLineString format
         if (street.coordinates[0] && Array.isArray(street.coordinates[0][0])) {
             return street.coordinates.some(lineString => 
@@ -1344,6 +1393,11 @@ class MapManager {
      * Get the center point of a street for tooltip positioning
      */
     getStreetCenter(street) {
+        // Generated data carries a precomputed label anchor half-way along the street
+        if (street.label) {
+            return [street.label[0], street.label[1]];
+        }
+
         if (!street.coordinates || street.coordinates.length === 0) {
             return null;
         }
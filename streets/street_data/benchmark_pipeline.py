@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Street Processing Benchmark
+===========================
+
+Times the offline processing steps of OSMStreetFetcher on synthetic Overpass
+responses of increasing size (see synthetic_overpass.py), filtered against a
+real boundary file:
+
+- ``process``: _process_overpass_data (parse + merge)
+- ``length``: _calculate_length over every parsed street
+- ``merge``: _deduplicate_and_merge_streets
+- ``filter``: _filter_streets_by_boundary
+- ``save``: save_streets_data
+
+Results can be saved as a baseline and later runs compared against it; a step
+that got slower than the threshold is reported as a regression and the script
+exits with status 1.
+
+Usage:
+    python benchmark_pipeline.py                                    # 10k and 100k elements
+    python benchmark_pipeline.py --sizes 10000 100000 1000000
+    python benchmark_pipeline.py --save-baseline bench_baseline.json
+    python benchmark_pipeline.py --baseline bench_baseline.json --threshold 0.25
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from city_boundary_fetcher import boundary_from_geojson
+from osm_street_fetcher import OSMStreetFetcher
+from synthetic_overpass import generate_overpass_response
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary')
+DEFAULT_BOUNDARY = os.path.join(BOUNDARY_DIR, 'san_francisco_ca.geojson')
+
+STEPS = ('process', 'length', 'merge', 'filter', 'save')
+
+# Timings below this are too noisy to flag as regressions (seconds)
+MIN_COMPARABLE_SECONDS = 0.005
+
+
+def best_of(func: Callable, repeat: int) -> float:
+    """Return the fastest of ``repeat`` runs in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run_benchmark(boundary_path: str = DEFAULT_BOUNDARY, sizes: List[int] = (10000, 100000),
+                  relation_share: float = 0.05, vertices_per_way: int = 8, ways_per_name: int = 3,
+                  repeat: int = 1, seed: int = 0) -> Dict:
+    """Time each processing step for every response size.
+
+    Args:
+        boundary_path: Boundary file used for placement and filtering
+        sizes: Synthetic response sizes (elements)
+        relation_share: Share of street names grouped by a relation
+        vertices_per_way: Vertices per way
+        ways_per_name: Ways sharing each street name
+        repeat: Runs per measurement (best is reported)
+        seed: Generator seed
+
+    Returns:
+        Dict with the run ``params`` and ``results`` as {size: {step: seconds}}
+    """
+    with open(boundary_path, 'r', encoding='utf-8') as f:
+        boundary = boundary_from_geojson(json.load(f))
+    region_info = {'city': boundary.name, 'state': boundary.state}
+
+    params = {
+        'boundary': os.path.basename(boundary_path),
+        'relation_share': relation_share,
+        'vertices_per_way': vertices_per_way,
+        'ways_per_name': ways_per_name,
+        'seed': seed
+    }
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR)
+
+        for size in sizes:
+            data = generate_overpass_response(boundary.bbox, size, relation_share=relation_share,
+                                              vertices_per_way=vertices_per_way, ways_per_name=ways_per_name,
+                                              seed=seed)
+            parsed = fetcher._parse_overpass_data(data, region_info)
+            merged = fetcher._deduplicate_and_merge_streets(parsed)
+            filtered = fetcher._filter_streets_by_boundary(merged, boundary)
+
+            timings = {
+                'process': best_of(lambda: fetcher._process_overpass_data(data, region_info), repeat),
+                'length': best_of(lambda: [fetcher._calculate_length(s.coordinates) for s in parsed], repeat),
+                'merge': best_of(lambda: fetcher._deduplicate_and_merge_streets(parsed), repeat),
+                'filter': best_of(lambda: fetcher._filter_streets_by_boundary(merged, boundary), repeat),
+                'save': best_of(lambda: fetcher.save_streets_data(filtered, 'benchmark'), repeat)
+            }
+            results[str(size)] = {
+                'elements': len(data['elements']),
+                'streets': len(merged),
+                'kept': len(filtered),
+                'seconds': timings
+            }
+
+    return {
+        'params': params,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'generated_at': int(time.time()),
+        'results': results
+    }
+
+
+def compare_to_baseline(current: Dict, baseline: Dict, threshold: float = 0.25) -> List[str]:
+    """List steps that are more than ``threshold`` slower than in the baseline.
+
+    Only sizes present in both runs are compared; runs with different
+    generator parameters are not comparable and yield no regressions.
+    """
+    if current['params'] != baseline.get('params'):
+        return []
+
+    regressions = []
+    for size, result in current['results'].items():
+        previous = baseline['results'].get(size)
+        if not previous:
+            continue
+        for step, seconds in result['seconds'].items():
+            before = previous['seconds'].get(step)
+            if before is None or max(before, seconds) < MIN_COMPARABLE_SECONDS:
+                continue
+            if seconds > before * (1 + threshold):
+                regressions.append(f"{step} @ {int(size):,} elements: {before * 1000:.1f} ms -> "
+                                   f"{seconds * 1000:.1f} ms (+{(seconds / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark street processing on synthetic Overpass data')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                        help='Response sizes in elements (default: 10000 100000)')
+    parser.add_argument('--boundary', default=DEFAULT_BOUNDARY, help='Boundary file (default: San Francisco)')
+    parser.add_argument('--relation-share', type=float, default=0.05, help='Share of names with a relation')
+    parser.add_argument('--vertices', type=int, default=8, help='Vertices per way')
+    parser.add_argument('--ways-per-name', type=int, default=3, help='Ways sharing each street name')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per measurement (best is reported)')
+    parser.add_argument('--seed', type=int, default=0, help='Generator seed')
+    parser.add_argument('--baseline', help='Compare against a saved baseline and flag regressions')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Slowdown counted as a regression (default: 0.25 = 25%%)')
+    parser.add_argument('--save-baseline', metavar='FILE', help='Save these results as a baseline')
+    args = parser.parse_args()
+
+    # The fetcher logs every step; keep the benchmark output readable
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print("=" * 72)
+    print("STREET PROCESSING BENCHMARK")
+    print("=" * 72)
+
+    current = run_benchmark(args.boundary, args.sizes, args.relation_share, args.vertices,
+                            args.ways_per_name, args.repeat, args.seed)
+
+    for size, result in current['results'].items():
+        print(f"\n{int(size):,} elements ({result['streets']:,} streets, {result['kept']:,} inside "
+              f"{current['params']['boundary']})")
+        for step in STEPS:
+            seconds = result['seconds'][step]
+            print(f"  {step:<8}: {seconds * 1000:10.2f} ms  ({seconds / result['elements'] * 1e6:6.2f} µs/element)")
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.baseline} (threshold {args.threshold:.0%})")
+        if current['params'] != baseline.get('params'):
+            print("  Baseline used different generator parameters; not comparable")
+        else:
+            regressions = compare_to_baseline(current, baseline, args.threshold)
+            for line in regressions:
+                print(f"  REGRESSION {line}")
+            if regressions:
+                status = 1
+            else:
+                print("  No regressions")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"\nSaved baseline to {args.save_baseline}")
+
+    print("=" * 72)
+    sys.exit(status)
+
+
+if __name__ == '__main__':
+    main()
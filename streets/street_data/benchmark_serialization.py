@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+JSON Serialization Benchmark
+============================
+
+Times every JSON I/O path of the street data tools with each installed
+serialization backend (see serialization.py), on a synthetic Overpass
+response placed inside a real boundary file:
+
+- ``overpass``: decoding the raw Overpass response
+- ``save``: save_streets_data
+- ``load``: decoding the saved streets file into StreetSegment objects
+- ``boundary_save`` / ``boundary_load``: CityBoundaryFetcher.save_boundary / load_boundary
+- ``validate``: reading a boundary file the way boundary_validator.py does
+
+Usage:
+    python benchmark_serialization.py                       # 100k elements
+    python benchmark_serialization.py --size 1000000 --repeat 3
+    python benchmark_serialization.py --output serialization_bench.json
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+from typing import Dict
+
+import serialization
+from benchmark_pipeline import BOUNDARY_DIR, DEFAULT_BOUNDARY, best_of
+from city_boundary_fetcher import CityBoundaryFetcher
+from osm_street_fetcher import OSMStreetFetcher, StreetSegment
+from synthetic_overpass import generate_overpass_response
+
+STEPS = ('overpass', 'save', 'load', 'boundary_save', 'boundary_load', 'validate')
+
+
+def run_benchmark(boundary_path: str = DEFAULT_BOUNDARY, size: int = 100000,
+                  repeat: int = 1, seed: int = 0) -> Dict:
+    """Time each I/O path with every installed backend.
+
+    Args:
+        boundary_path: Boundary file used for placement and the boundary steps
+        size: Synthetic response size (elements)
+        repeat: Runs per measurement (best is reported)
+        seed: Generator seed
+
+    Returns:
+        Dict with the run ``params`` and ``results`` as {backend: {step: seconds}}
+    """
+    previous = serialization.BACKEND
+    with tempfile.TemporaryDirectory() as tmp:
+        boundary_fetcher = CityBoundaryFetcher(boundary_dir=tmp)
+        boundary = CityBoundaryFetcher(boundary_dir=os.path.dirname(boundary_path)).load_boundary(
+            os.path.basename(boundary_path))
+        region_info = {'city': boundary.name, 'state': boundary.state}
+
+        data = generate_overpass_response(boundary.bbox, size, seed=seed)
+        raw = json.dumps(data).encode('utf-8')
+        fetcher = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR)
+        streets = fetcher._process_overpass_data(data, region_info)
+
+        results = {}
+        try:
+            for backend in serialization.available_backends():
+                serialization.set_backend(backend)
+                streets_path = fetcher.save_streets_data(streets, 'benchmark')
+                boundary_file = boundary_fetcher.save_boundary(boundary, 'benchmark')
+
+                def load_streets():
+                    with open(streets_path, 'rb') as f:
+                        return serialization.decode_streets(f.read(), StreetSegment)
+
+                results[backend] = {
+                    'overpass': best_of(lambda: serialization.loads(raw), repeat),
+                    'save': best_of(lambda: fetcher.save_streets_data(streets, 'benchmark'), repeat),
+                    'load': best_of(load_streets, repeat),
+                    'boundary_save': best_of(lambda: boundary_fetcher.save_boundary(boundary, 'benchmark'), repeat),
+                    'boundary_load': best_of(lambda: boundary_fetcher.load_boundary('benchmark'), repeat),
+                    'validate': best_of(lambda: serialization.read_json(boundary_file), repeat)
+                }
+        finally:
+            serialization.set_backend(previous)
+
+    return {
+        'params': {'boundary': os.path.basename(boundary_path), 'size': size, 'seed': seed,
+                   'overpass_bytes': len(raw), 'streets': len(streets)},
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'generated_at': int(time.time()),
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON serialization backends')
+    parser.add_argument('--size', type=int, default=100000, help='Response size in elements (default: 100000)')
+    parser.add_argument('--boundary', default=DEFAULT_BOUNDARY, help='Boundary file (default: San Francisco)')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per measurement (best is reported)')
+    parser.add_argument('--seed', type=int, default=0, help='Generator seed')
+    parser.add_argument('--output', metavar='FILE', help='Save the results as JSON')
+    args = parser.parse_args()
+
+    # The fetchers log every save; keep the benchmark output readable
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print("=" * 72)
+    print("JSON SERIALIZATION BENCHMARK")
+    print("=" * 72)
+
+    current = run_benchmark(args.boundary, args.size, args.repeat, args.seed)
+    params = current['params']
+    print(f"{args.size:,} elements ({params['overpass_bytes'] / 1e6:.1f} MB response, "
+          f"{params['streets']:,} streets)\n")
+
+    backends = list(current['results'])
+    print(f"  {'step':<14}" + "".join(f"{name:>20}" for name in backends))
+    baseline = current['results']['json']
+    for step in STEPS:
+        cells = []
+        for name in backends:
+            seconds = current['results'][name][step]
+            speedup = f"({baseline[step] / seconds:.1f}x)" if name != 'json' and seconds > 0 else ""
+            cells.append(f"{seconds * 1000:.1f} ms {speedup:>7}")
+        print(f"  {step:<14}" + "".join(f"{cell:>20}" for cell in cells))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+    print("=" * 72)
+
+
+if __name__ == '__main__':
+    main()
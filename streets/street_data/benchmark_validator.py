@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Boundary Validator Benchmark
+============================
+
+Times the BoundaryValidator coordinate checks and whole-file validation on the
+saved boundaries, comparing the vectorized ring check against the previous
+pure-Python loops and the process pool against serial validation.
+
+Usage:
+    python benchmark_validator.py                       # Los Angeles boundary
+    python benchmark_validator.py boundary/*.geojson    # Any files
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Callable, Dict, List
+
+from shapely.geometry import shape
+
+from boundary_validator import BoundaryValidator, validate_files
+
+DEFAULT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary', 'los_angeles_ca.geojson')
+
+
+def legacy_check_coordinate_issues(geojson_geom: Dict) -> List[str]:
+    """The original two-pass pure-Python ring check, kept as the benchmark baseline."""
+    issues = []
+    coordinates = geojson_geom['coordinates']
+    geom_type = geojson_geom['type']
+    
+    def check_ring(ring_coords, ring_name):
+        ring_issues = []
+        for i in range(len(ring_coords) - 1):
+            if ring_coords[i] == ring_coords[i + 1]:
+                ring_issues.append(f"{ring_name} has duplicate consecutive coordinates at position {i}")
+        
+        close_threshold = 1e-10
+        for i in range(len(ring_coords) - 1):
+            p1, p2 = ring_coords[i], ring_coords[i + 1]
+            if abs(p1[0] - p2[0]) < close_threshold and abs(p1[1] - p2[1]) < close_threshold:
+                ring_issues.append(f"{ring_name} has very close consecutive coordinates at position {i}")
+        
+        return ring_issues
+    
+    if geom_type == 'Polygon':
+        issues.extend(check_ring(coordinates[0], "Exterior ring"))
+        for i, interior in enumerate(coordinates[1:], 1):
+            issues.extend(check_ring(interior, f"Interior ring {i}"))
+    elif geom_type == 'MultiPolygon':
+        for i, polygon_coords in enumerate(coordinates):
+            issues.extend(check_ring(polygon_coords[0], f"Polygon {i} exterior ring"))
+            for j, interior in enumerate(polygon_coords[1:], 1):
+                issues.extend(check_ring(interior, f"Polygon {i} interior ring {j}"))
+    
+    return issues
+
+
+def best_of(func: Callable, repeat: int) -> float:
+    """Return the fastest of ``repeat`` runs in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark boundary validation')
+    parser.add_argument('files', nargs='*', help='GeoJSON boundary files (default: Los Angeles)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (best is reported)')
+    parser.add_argument('--workers', type=int, help='Worker processes for the pool run')
+    args = parser.parse_args()
+    
+    files = args.files or [DEFAULT_FILE]
+    validator = BoundaryValidator()
+    
+    print("=" * 72)
+    print("BOUNDARY VALIDATOR BENCHMARK")
+    print("=" * 72)
+    
+    for filepath in files:
+        size_kb = os.path.getsize(filepath) / 1024
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        geometry = data['features'][0]['geometry']
+        shapely_geom = shape(geometry)
+        
+        legacy = best_of(lambda: legacy_check_coordinate_issues(geometry), args.repeat)
+        vectorized = best_of(lambda: validator._check_coordinate_issues(geometry, shapely_geom), args.repeat)
+        whole_file = best_of(lambda: validator.validate_file(filepath), args.repeat)
+        
+        print(f"\n{os.path.basename(filepath)} ({size_kb:,.0f} KB, "
+              f"{len(shapely_geom.exterior.coords) if shapely_geom.geom_type == 'Polygon' else '-'} exterior coords)")
+        print(f"  Coordinate check, pure Python : {legacy * 1000:8.2f} ms")
+        print(f"  Coordinate check, NumPy       : {vectorized * 1000:8.2f} ms ({legacy / vectorized:.1f}x)")
+        print(f"  validate_file (all features)  : {whole_file * 1000:8.2f} ms")
+    
+    if len(files) > 1:
+        serial = best_of(lambda: validate_files(files, workers=1), 1)
+        pooled = best_of(lambda: validate_files(files, workers=args.workers), 1)
+        print(f"\n{len(files)} files serial      : {serial * 1000:8.2f} ms")
+        print(f"{len(files)} files process pool: {pooled * 1000:8.2f} ms")
+    
+    print("=" * 72)
+
+
+if __name__ == '__main__':
+    main()
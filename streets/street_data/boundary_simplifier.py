@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Boundary Simplifier
+===================
+
+Produces named resolution levels of a city boundary for the different jobs the
+boundary is used for:
+
+- ``query``:   a simplified polygon guaranteed to contain the true boundary,
+               small enough for an Overpass ``poly:`` filter
+- ``filter``:  the exact (validated) geometry used to filter streets
+- ``display``: a small, topology-preserving simplification for map display
+
+The derived levels are cached next to the boundary in
+``<boundary_dir>/resolutions/`` as ``<name>_<level>.geojson`` and regenerated
+when the boundary geometry changes. The ``filter`` level is the boundary's own
+geometry, so it is not written again.
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from city_boundary_fetcher import CityBoundary, boundary_slug, boundary_to_geojson
+
+# shapely is imported by the functions that use it, so importing this module
+# (e.g. for cached resolution levels) stays cheap
+logger = logging.getLogger(__name__)
+
+# Rough conversion used throughout the street data tools (1 degree ≈ 111 km)
+METERS_PER_DEGREE = 111000
+
+RESOLUTION_LEVELS = ('query', 'filter', 'display')
+
+# Levels written to the cache (``filter`` is the boundary geometry itself)
+CACHED_LEVELS = ('query', 'display')
+
+
+@dataclass
+class BoundaryResolutions:
+    """The resolution levels of one boundary, as GeoJSON geometries."""
+    query: Dict
+    filter: Dict
+    display: Dict
+    source_hash: str
+    stats: Dict
+
+
+def geometry_hash(geometry: Dict) -> str:
+    """Content hash of a GeoJSON geometry (same key as the validation cache)."""
+    from boundary_validator import ValidationCache
+    return ValidationCache.geometry_hash(geometry)
+
+
+def count_points(geom) -> int:
+    """Number of coordinates in a shapely geometry."""
+    import shapely
+    return int(shapely.get_num_coordinates(geom))
+
+
+def _without_holes(geom):
+    """Drop interior rings; the outer rings alone always cover the original area."""
+    from shapely.geometry import MultiPolygon, Polygon
+
+    if geom.geom_type == 'Polygon':
+        return Polygon(geom.exterior)
+    if geom.geom_type == 'MultiPolygon':
+        return MultiPolygon([Polygon(p.exterior) for p in geom.geoms])
+    return geom
+
+
+def containing_simplification(geom, tolerance: float, max_points: Optional[int] = None,
+                              max_attempts: int = 12):
+    """Simplify a polygonal geometry so the result still covers the original.
+
+    The geometry is buffered outward, stripped of holes and simplified with a
+    tolerance no larger than the buffer distance. Containment is checked
+    explicitly; the buffer grows until it holds and the tolerance grows until
+    the point budget is met.
+
+    Args:
+        geom: Shapely Polygon or MultiPolygon
+        tolerance: Simplification tolerance in degrees
+        max_points: Optional coordinate budget for the result
+        max_attempts: Maximum number of buffer/tolerance adjustments
+
+    Returns:
+        Shapely geometry covering ``geom``
+    """
+    buffer_factor = 1.0
+    candidate = None
+
+    for _ in range(max_attempts):
+        # mitre joins keep straight boundary runs straight, which simplify well
+        buffered = geom.buffer(tolerance * buffer_factor, join_style='mitre', mitre_limit=2.0)
+        candidate = _without_holes(buffered).simplify(tolerance, preserve_topology=True)
+
+        if not candidate.covers(geom):
+            buffer_factor *= 2
+            continue
+        if max_points and count_points(candidate) > max_points:
+            tolerance *= 1.5
+            continue
+        return candidate
+
+    # Out of attempts: the convex hull (or its envelope) always covers the geometry
+    hull = geom.convex_hull
+    if max_points and count_points(hull) > max_points:
+        hull = hull.envelope
+    logger.warning("Falling back to the convex hull for containment-safe simplification")
+    return hull
+
+
+class BoundarySimplifier:
+    """Builds and caches the query/filter/display resolution levels of boundaries."""
+
+    # Query polygons: outward tolerance and per-clause coordinate budget for Overpass
+    QUERY_TOLERANCE_M = 75
+    MAX_QUERY_POINTS = 200
+
+    # Display geometry: simplification tolerance and coordinate precision (≈1 m)
+    DISPLAY_TOLERANCE_M = 30
+    DISPLAY_PRECISION = 1e-5
+
+    def __init__(self, boundary_dir: str = 'boundary'):
+        """Initialize the simplifier.
+
+        Args:
+            boundary_dir: Boundary directory; levels are cached in its ``resolutions`` folder
+        """
+        self.cache_dir = os.path.join(boundary_dir, 'resolutions')
+
+    def query_geometry(self, geom):
+        """Simplified geometry that is guaranteed to contain ``geom``."""
+        return containing_simplification(geom, self.QUERY_TOLERANCE_M / METERS_PER_DEGREE,
+                                         self.MAX_QUERY_POINTS)
+
+    def display_geometry(self, geom):
+        """Small topology-preserving simplification for display."""
+        import shapely
+
+        simplified = geom.simplify(self.DISPLAY_TOLERANCE_M / METERS_PER_DEGREE, preserve_topology=True)
+        return shapely.set_precision(simplified, self.DISPLAY_PRECISION)
+
+    def build(self, geometry: Dict) -> BoundaryResolutions:
+        """Compute all resolution levels for a GeoJSON geometry."""
+        from shapely.geometry import shape
+
+        geom = shape(geometry)
+        query = self.query_geometry(geom)
+        display = self.display_geometry(geom)
+
+        stats = {
+            'points': {
+                'query': count_points(query),
+                'filter': count_points(geom),
+                'display': count_points(display)
+            },
+            'query_contains_boundary': bool(query.covers(geom)),
+            'query_area_ratio': query.area / geom.area if geom.area else None,
+            'query_tolerance_m': self.QUERY_TOLERANCE_M,
+            'display_tolerance_m': self.DISPLAY_TOLERANCE_M
+        }
+
+        return BoundaryResolutions(
+            query=query.__geo_interface__,
+            filter=geometry,
+            display=display.__geo_interface__,
+            source_hash=geometry_hash(geometry),
+            stats=stats
+        )
+
+    def _level_path(self, name: str, level: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}_{level}.geojson")
+
+    def load_level(self, name: str, level: str) -> Optional[Dict]:
+        """Load one cached level as a GeoJSON FeatureCollection, or None."""
+        try:
+            with open(self._level_path(name, level), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load_cached(self, name: str, geometry: Dict, source_hash: str) -> Optional[BoundaryResolutions]:
+        """Return cached levels if all exist and were built from ``source_hash``."""
+        levels = {'filter': geometry}
+        stats = None
+        for level in CACHED_LEVELS:
+            data = self.load_level(name, level)
+            if not data or not data.get('features'):
+                return None
+            props = data['features'][0].get('properties') or {}
+            if props.get('source_hash') != source_hash:
+                return None
+            levels[level] = data['features'][0]['geometry']
+            stats = props.get('resolution_stats', stats)
+
+        return BoundaryResolutions(source_hash=source_hash, stats=stats or {}, **levels)
+
+    def _save(self, name: str, boundary: CityBoundary, resolutions: BoundaryResolutions):
+        """Write each derived level next to the boundary, atomically per file."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for level in CACHED_LEVELS:
+            level_boundary = CityBoundary(
+                name=boundary.name,
+                state=boundary.state,
+                country=boundary.country,
+                geometry=getattr(resolutions, level),
+                bbox=boundary.bbox,
+                area_km2=boundary.area_km2
+            )
+            data = boundary_to_geojson(level_boundary, {
+                'level': level,
+                'source_hash': resolutions.source_hash,
+                'resolution_stats': resolutions.stats
+            })
+
+            path = self._level_path(name, level)
+            with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+                # Compact output: these files exist to be small
+                json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+            os.replace(f"{path}.tmp", path)
+
+    def get_level(self, boundary: CityBoundary, level: str, name: Optional[str] = None) -> Dict:
+        """Get one resolution level as a GeoJSON geometry, reading only that level's file when cached."""
+        if level == 'filter':
+            return boundary.geometry
+        name = name or boundary_slug(boundary.name, boundary.state)
+        data = self.load_level(name, level)
+        if data and data.get('features'):
+            feature = data['features'][0]
+            if (feature.get('properties') or {}).get('source_hash') == geometry_hash(boundary.geometry):
+                return feature['geometry']
+        return getattr(self.get_resolutions(boundary, name), level)
+
+    def get_resolutions(self, boundary: CityBoundary, name: Optional[str] = None) -> BoundaryResolutions:
+        """Get the resolution levels for a boundary, building and caching them if needed.
+
+        Args:
+            boundary: Boundary to simplify (its geometry is used as the filter level)
+            name: Cache name (default: generated from the boundary's name and state)
+
+        Returns:
+            BoundaryResolutions for the boundary's current geometry
+        """
+        name = name or boundary_slug(boundary.name, boundary.state)
+        source_hash = geometry_hash(boundary.geometry)
+
+        cached = self._load_cached(name, boundary.geometry, source_hash)
+        if cached:
+            logger.debug(f"Using cached resolution levels for {name}")
+            return cached
+
+        resolutions = self.build(boundary.geometry)
+        self._save(name, boundary, resolutions)
+
+        points = resolutions.stats['points']
+        logger.info(f"Built resolution levels for {name}: query={points['query']} "
+                    f"filter={points['filter']} display={points['display']} points")
+        return resolutions
+
+
+def main():
+    """Build resolution levels for saved boundaries."""
+    import argparse
+    from city_boundary_fetcher import CityBoundaryFetcher
+
+    parser = argparse.ArgumentParser(description='Build query/filter/display resolution levels for boundaries')
+    parser.add_argument('names', nargs='*', help='Boundary names (default: all saved boundaries)')
+    parser.add_argument('--boundary-dir', default='boundary', help='Directory with boundary files')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+
+    fetcher = CityBoundaryFetcher(args.boundary_dir)
+    simplifier = BoundarySimplifier(args.boundary_dir)
+
+    for name in args.names or fetcher.list_saved_boundaries():
+        boundary = fetcher.load_boundary(name)
+        if not boundary:
+            continue
+        resolutions = simplifier.get_resolutions(boundary, name)
+        points = resolutions.stats['points']
+        sizes = {level: os.path.getsize(simplifier._level_path(name, level)) / 1024 for level in CACHED_LEVELS}
+        print(f"{name}: query {points['query']} pts ({sizes['query']:.0f} KB, "
+              f"area x{resolutions.stats['query_area_ratio']:.3f}), "
+              f"display {points['display']} pts ({sizes['display']:.0f} KB), "
+              f"filter {points['filter']} pts")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Boundary Store
+==============
+
+Single-file SQLite storage for city boundaries. Each boundary is stored as WKB
+geometry together with its bounding box, area and source metadata, and an
+R*Tree virtual table indexes the bounding boxes so boundaries can be found by
+location without reading every geometry.
+
+The store is a drop-in backend for CityBoundaryFetcher and can import from and
+export to the ``boundary/*.geojson`` file layout.
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+from shapely import from_wkb, to_wkb
+from shapely.geometry import mapping, shape
+
+from city_boundary_fetcher import CityBoundary, boundary_from_geojson, boundary_slug, boundary_to_geojson
+
+logger = logging.getLogger(__name__)
+
+
+class BoundaryStore:
+    """SQLite boundary store with an R*Tree bounding-box index."""
+
+    SCHEMA_VERSION = 1
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS boundaries (
+        id INTEGER PRIMARY KEY,
+        slug TEXT NOT NULL UNIQUE,
+        name TEXT NOT NULL,
+        name_key TEXT NOT NULL,
+        state TEXT,
+        state_key TEXT,
+        country TEXT,
+        geometry BLOB NOT NULL,
+        geometry_type TEXT NOT NULL,
+        south REAL NOT NULL,
+        west REAL NOT NULL,
+        north REAL NOT NULL,
+        east REAL NOT NULL,
+        area_km2 REAL NOT NULL,
+        source TEXT,
+        properties TEXT,
+        updated_at INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_boundaries_name_state ON boundaries (name_key, state_key);
+    CREATE VIRTUAL TABLE IF NOT EXISTS boundaries_rtree USING rtree (
+        id, min_lon, max_lon, min_lat, max_lat
+    );
+    """
+
+    # Properties written by boundary_to_geojson that are stored in their own columns
+    CORE_PROPERTIES = {'name', 'state', 'country', 'area_km2', 'bbox'}
+
+    # Columns needed to rebuild a CityBoundary, in _row_to_boundary order
+    _BOUNDARY_COLUMNS = "name, state, country, geometry, south, west, north, east, area_km2"
+
+    def __init__(self, path: str):
+        """Open (and create if needed) a boundary store.
+
+        Args:
+            path: Path to the SQLite database file
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(self.SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self.conn.commit()
+
+    def close(self):
+        """Close the underlying database connection."""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def _key(value: Optional[str]) -> str:
+        """Normalize a name or state for case-insensitive lookups."""
+        return (value or '').strip().lower()
+
+    def put(self, boundary: CityBoundary, slug: Optional[str] = None, source: str = '',
+            properties: Optional[Dict] = None) -> str:
+        """Insert or replace a boundary.
+
+        Args:
+            boundary: CityBoundary to store
+            slug: Storage key (default: generated from name and state)
+            source: Where the boundary came from (URL or file path)
+            properties: Extra GeoJSON properties to keep (e.g. osm_id)
+
+        Returns:
+            The slug the boundary was stored under
+        """
+        slug = slug or boundary_slug(boundary.name, boundary.state)
+        geom = shape(boundary.geometry)
+
+        # Store the bbox from the geometry itself so the index is always exact
+        west, south, east, north = geom.bounds
+
+        with self.conn:
+            row = self.conn.execute("SELECT id FROM boundaries WHERE slug = ?", (slug,)).fetchone()
+            if row:
+                self.conn.execute("DELETE FROM boundaries_rtree WHERE id = ?", (row[0],))
+                self.conn.execute("DELETE FROM boundaries WHERE id = ?", (row[0],))
+
+            cursor = self.conn.execute(
+                """INSERT INTO boundaries (slug, name, name_key, state, state_key, country, geometry,
+                                           geometry_type, south, west, north, east, area_km2, source,
+                                           properties, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (slug, boundary.name, self._key(boundary.name), boundary.state, self._key(boundary.state),
+                 boundary.country, to_wkb(geom), boundary.geometry['type'], south, west, north, east,
+                 boundary.area_km2, source, json.dumps(properties or {}, ensure_ascii=False), int(time.time()))
+            )
+            self.conn.execute(
+                "INSERT INTO boundaries_rtree (id, min_lon, max_lon, min_lat, max_lat) VALUES (?, ?, ?, ?, ?)",
+                (cursor.lastrowid, west, east, south, north)
+            )
+
+        logger.debug(f"Stored boundary {slug} in {self.path}")
+        return slug
+
+    def _row_to_boundary(self, row) -> CityBoundary:
+        """Build a CityBoundary from a ``boundaries`` row."""
+        name, state, country, wkb, south, west, north, east, area_km2 = row
+        return CityBoundary(
+            name=name,
+            state=state,
+            country=country,
+            geometry=mapping(from_wkb(wkb)),
+            bbox=[south, west, north, east],
+            area_km2=area_km2
+        )
+
+    def get(self, slug: str) -> Optional[CityBoundary]:
+        """Load a single boundary by slug."""
+        row = self.conn.execute(
+            f"SELECT {self._BOUNDARY_COLUMNS} FROM boundaries WHERE slug = ?", (slug,)
+        ).fetchone()
+        return self._row_to_boundary(row) if row else None
+
+    def find(self, city_name: str, state: Optional[str] = None) -> Optional[CityBoundary]:
+        """Look up a boundary by city name and (optionally) state, case-insensitively."""
+        if state:
+            row = self.conn.execute(
+                f"SELECT {self._BOUNDARY_COLUMNS} FROM boundaries WHERE name_key = ? AND state_key = ?",
+                (self._key(city_name), self._key(state))
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                f"SELECT {self._BOUNDARY_COLUMNS} FROM boundaries WHERE name_key = ? ORDER BY slug",
+                (self._key(city_name),)
+            ).fetchone()
+        return self._row_to_boundary(row) if row else None
+
+    def query_bbox(self, bbox: List[float]) -> List[str]:
+        """Find boundaries whose bounding box intersects ``bbox``.
+
+        Args:
+            bbox: Bounding box [south, west, north, east]
+
+        Returns:
+            Sorted list of matching slugs
+        """
+        south, west, north, east = bbox
+        rows = self.conn.execute(
+            """SELECT b.slug FROM boundaries_rtree r JOIN boundaries b ON b.id = r.id
+               WHERE r.min_lon <= ? AND r.max_lon >= ? AND r.min_lat <= ? AND r.max_lat >= ?
+               ORDER BY b.slug""",
+            (east, west, north, south)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def list_slugs(self) -> List[str]:
+        """List all stored boundary slugs."""
+        return [row[0] for row in self.conn.execute("SELECT slug FROM boundaries ORDER BY slug")]
+
+    def metadata(self, slug: str) -> Optional[Dict]:
+        """Return stored metadata for a boundary without decoding its geometry."""
+        row = self.conn.execute(
+            """SELECT name, state, country, geometry_type, south, west, north, east, area_km2,
+                      source, properties, updated_at
+               FROM boundaries WHERE slug = ?""", (slug,)
+        ).fetchone()
+        if not row:
+            return None
+
+        (name, state, country, geometry_type, south, west, north, east, area_km2,
+         source, properties, updated_at) = row
+        return {
+            'slug': slug,
+            'name': name,
+            'state': state,
+            'country': country,
+            'geometry_type': geometry_type,
+            'bbox': [south, west, north, east],
+            'area_km2': area_km2,
+            'source': source,
+            'properties': json.loads(properties or '{}'),
+            'updated_at': updated_at
+        }
+
+    def delete(self, slug: str) -> bool:
+        """Remove a boundary from the store. Returns True if it existed."""
+        with self.conn:
+            row = self.conn.execute("SELECT id FROM boundaries WHERE slug = ?", (slug,)).fetchone()
+            if not row:
+                return False
+            self.conn.execute("DELETE FROM boundaries_rtree WHERE id = ?", (row[0],))
+            self.conn.execute("DELETE FROM boundaries WHERE id = ?", (row[0],))
+        return True
+
+    def import_geojson(self, filepath: str) -> Optional[str]:
+        """Import a ``boundary/*.geojson`` file into the store.
+
+        Returns:
+            The slug the boundary was stored under, or None if the file is invalid
+        """
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading boundary file {filepath}: {e}")
+            return None
+
+        boundary = boundary_from_geojson(data)
+        if not boundary:
+            logger.error(f"Invalid GeoJSON boundary in {filepath}")
+            return None
+
+        props = data['features'][0].get('properties') or {}
+        extra = {k: v for k, v in props.items() if k not in self.CORE_PROPERTIES}
+        slug = os.path.splitext(os.path.basename(filepath))[0]
+
+        return self.put(boundary, slug=slug, source=filepath, properties=extra)
+
+    def import_geojson_dir(self, boundary_dir: str) -> List[str]:
+        """Import every ``*.geojson`` file in a directory. Returns the imported slugs."""
+        imported = []
+        for filename in sorted(os.listdir(boundary_dir)):
+            if filename.endswith('.geojson'):
+                slug = self.import_geojson(os.path.join(boundary_dir, filename))
+                if slug:
+                    imported.append(slug)
+
+        logger.info(f"Imported {len(imported)} boundaries into {self.path}")
+        return imported
+
+    def export_geojson(self, slug: str, filepath: str) -> Optional[str]:
+        """Write a stored boundary out as a ``boundary/*.geojson`` compatible file."""
+        boundary = self.get(slug)
+        if not boundary:
+            logger.error(f"Boundary not found in store: {slug}")
+            return None
+
+        extra = self.metadata(slug)['properties']
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(boundary_to_geojson(boundary, extra), f, indent=2, ensure_ascii=False)
+
+        return filepath
+
+    def export_geojson_dir(self, boundary_dir: str) -> List[str]:
+        """Export every stored boundary to ``<boundary_dir>/<slug>.geojson``."""
+        os.makedirs(boundary_dir, exist_ok=True)
+        exported = []
+        for slug in self.list_slugs():
+            path = self.export_geojson(slug, os.path.join(boundary_dir, f"{slug}.geojson"))
+            if path:
+                exported.append(path)
+
+        logger.info(f"Exported {len(exported)} boundaries to {boundary_dir}")
+        return exported
@@ -11,28 +11,28 @@ Author: Street Names Challenge Team
 License: MIT
 """
 
+import hashlib
 import json
 import logging
 import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-import argparse
 
 try:
+    import numpy as np
+    import shapely
     from shapely.geometry import Polygon, MultiPolygon, Point, shape
     from shapely.ops import unary_union
     from shapely.validation import explain_validity, make_valid
     SHAPELY_AVAILABLE = True
 except ImportError:
     SHAPELY_AVAILABLE = False
-    print("Warning: Shapely not available. Install with: pip install shapely")
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+from serialization import read_json, write_json
+
 logger = logging.getLogger(__name__)
 
 
@@ -48,8 +48,7 @@ class BoundaryValidator:
         logger.info(f"Validating boundary file: {filepath}")
         
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                geojson_data = json.load(f)
+            geojson_data = read_json(filepath)
         except Exception as e:
             return {
                 'valid': False,
@@ -61,9 +60,11 @@ class BoundaryValidator:
         return self.validate_geojson(geojson_data, filepath)
     
     def validate_geojson(self, geojson_data: Dict, source_name: str = "data") -> Dict:
-        """Validate GeoJSON data and return detailed analysis."""
-        issues = []
+        """Validate GeoJSON data and return detailed analysis.
         
+        Only the first feature of a FeatureCollection is checked; use
+        validate_all_features() to check every feature.
+        """
         # Extract feature
         try:
             if geojson_data.get('type') == 'FeatureCollection':
@@ -77,7 +78,37 @@ class BoundaryValidator:
                 feature = geojson_data['features'][0]
             else:
                 feature = geojson_data
-            
+        except Exception as e:
+            return {
+                'valid': False,
+                'error': f"Failed to parse GeoJSON structure: {e}",
+                'issues': [],
+                'geometry': None
+            }
+        
+        return self.validate_feature(feature, source_name)
+    
+    def validate_all_features(self, geojson_data: Dict, source_name: str = "data") -> List[Dict]:
+        """Validate every feature in a FeatureCollection (or a single Feature)."""
+        if geojson_data.get('type') != 'FeatureCollection':
+            return [self.validate_feature(geojson_data, source_name)]
+        
+        features = geojson_data.get('features') or []
+        if not features:
+            return [{
+                'valid': False,
+                'error': "FeatureCollection has no features",
+                'issues': [],
+                'geometry': None
+            }]
+        
+        return [self.validate_feature(feature, f"{source_name}#{i}") for i, feature in enumerate(features)]
+    
+    def validate_feature(self, feature: Dict, source_name: str = "data") -> Dict:
+        """Validate a single GeoJSON Feature and return detailed analysis."""
+        issues = []
+        
+        try:
             geometry = feature.get('geometry')
             if not geometry:
                 return {
@@ -224,42 +255,52 @@ class BoundaryValidator:
             issues.append("Geometry is empty")
         
         # Check for duplicate consecutive points
-        coords_issues = self._check_coordinate_issues(geojson_geom)
+        coords_issues = self._check_coordinate_issues(geojson_geom, shapely_geom)
         issues.extend(coords_issues)
         
         return issues
     
-    def _check_coordinate_issues(self, geojson_geom: Dict) -> List[str]:
-        """Check for coordinate-level issues."""
+    # Consecutive points closer than this (in degrees, per axis) are reported
+    CLOSE_THRESHOLD = 1e-10
+    
+    def _named_rings(self, shapely_geom) -> List[Tuple[str, object]]:
+        """List (name, ring) pairs for a Polygon or MultiPolygon, named as in the reports."""
+        if shapely_geom.geom_type == 'Polygon':
+            rings = [("Exterior ring", shapely_geom.exterior)]
+            rings.extend((f"Interior ring {i}", ring) for i, ring in enumerate(shapely_geom.interiors, 1))
+            return rings
+        
+        rings = []
+        if shapely_geom.geom_type == 'MultiPolygon':
+            for i, polygon in enumerate(shapely_geom.geoms):
+                rings.append((f"Polygon {i} exterior ring", polygon.exterior))
+                rings.extend((f"Polygon {i} interior ring {j}", ring)
+                             for j, ring in enumerate(polygon.interiors, 1))
+        return rings
+    
+    def _check_coordinate_issues(self, geojson_geom: Dict, shapely_geom=None) -> List[str]:
+        """Check for coordinate-level issues.
+        
+        Each ring is checked in one vectorized pass over its coordinate array:
+        exact duplicates and near-duplicates both come from the same diff.
+        """
         issues = []
-        coordinates = geojson_geom['coordinates']
-        geom_type = geojson_geom['type']
+        if shapely_geom is None:
+            shapely_geom = shape(geojson_geom)
         
-        def check_ring(ring_coords, ring_name):
-            ring_issues = []
-            for i in range(len(ring_coords) - 1):
-                if ring_coords[i] == ring_coords[i + 1]:
-                    ring_issues.append(f"{ring_name} has duplicate consecutive coordinates at position {i}")
+        for ring_name, ring in self._named_rings(shapely_geom):
+            coords = shapely.get_coordinates(ring)
+            if len(coords) < 2:
+                continue
             
-            # Check for very close points (potential precision issues)
-            close_threshold = 1e-10
-            for i in range(len(ring_coords) - 1):
-                p1, p2 = ring_coords[i], ring_coords[i + 1]
-                if abs(p1[0] - p2[0]) < close_threshold and abs(p1[1] - p2[1]) < close_threshold:
-                    ring_issues.append(f"{ring_name} has very close consecutive coordinates at position {i}")
+            deltas = np.abs(np.diff(coords, axis=0))
+            close = np.flatnonzero((deltas < self.CLOSE_THRESHOLD).all(axis=1))
+            if len(close) == 0:
+                continue
             
-            return ring_issues
-        
-        if geom_type == 'Polygon':
-            issues.extend(check_ring(coordinates[0], "Exterior ring"))
-            for i, interior in enumerate(coordinates[1:], 1):
-                issues.extend(check_ring(interior, f"Interior ring {i}"))
-        
-        elif geom_type == 'MultiPolygon':
-            for i, polygon_coords in enumerate(coordinates):
-                issues.extend(check_ring(polygon_coords[0], f"Polygon {i} exterior ring"))
-                for j, interior in enumerate(polygon_coords[1:], 1):
-                    issues.extend(check_ring(interior, f"Polygon {i} interior ring {j}"))
+            exact = close[(deltas[close] == 0).all(axis=1)]
+            issues.extend(f"{ring_name} has duplicate consecutive coordinates at position {i}" for i in exact)
+            issues.extend(f"{ring_name} has very close consecutive coordinates at position {i}" for i in close)
         
         return issues
     
@@ -330,36 +371,112 @@ class BoundaryValidator:
         """Calculate the change in bounds between two geometries."""
         return sum(abs(a - b) for a, b in zip(bounds1, bounds2))
     
-    def save_fixed_boundary(self, original_file: str, fixed_geometry: Dict, fix_info: Dict) -> str:
+    def save_fixed_boundary(self, original_file: str, fixed_geometry: Dict, fix_info: Dict,
+                            output_dir: Optional[str] = None, feature_index: int = 0) -> str:
         """Save the fixed boundary to a new file."""
+        fix_info = dict(fix_info, geometry=fixed_geometry)
+        return self.save_fixed_features(original_file, {feature_index: fix_info}, output_dir)
+    
+    def save_fixed_features(self, original_file: str, fixes: Dict[int, Dict],
+                            output_dir: Optional[str] = None) -> str:
+        """Save a copy of a boundary file with the given features' geometries replaced.
+        
+        Args:
+            original_file: File the fixes were computed for
+            fixes: Mapping of feature index to fix_geometry() result
+            output_dir: Directory for the ``*_fixed`` file (default: next to the original)
+            
+        Returns:
+            Path of the written file
+        """
         # Create output filename
         path = Path(original_file)
-        output_file = path.parent / f"{path.stem}_fixed{path.suffix}"
+        output_file = Path(output_dir or path.parent) / f"{path.stem}_fixed{path.suffix}"
         
         # Load original data to preserve properties
-        with open(original_file, 'r', encoding='utf-8') as f:
-            original_data = json.load(f)
+        original_data = read_json(original_file)
         
-        # Update geometry
         if original_data.get('type') == 'FeatureCollection':
-            original_data['features'][0]['geometry'] = fixed_geometry
-            # Add fix info to properties
-            if 'properties' not in original_data['features'][0]:
-                original_data['features'][0]['properties'] = {}
-            original_data['features'][0]['properties']['fix_info'] = fix_info
+            features = original_data['features']
         else:
-            original_data['geometry'] = fixed_geometry
-            if 'properties' not in original_data:
-                original_data['properties'] = {}
-            original_data['properties']['fix_info'] = fix_info
+            features = [original_data]
+        
+        for index, fix in fixes.items():
+            feature = features[index]
+            # Update geometry and record how it was fixed (without duplicating the geometry)
+            feature['geometry'] = fix['geometry']
+            if not feature.get('properties'):
+                feature['properties'] = {}
+            feature['properties']['fix_info'] = {k: v for k, v in fix.items() if k != 'geometry'}
         
         # Save fixed data
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(original_data, f, indent=2, ensure_ascii=False)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        write_json(original_data, str(output_file), indent=True)
         
         logger.info(f"Saved fixed boundary to: {output_file}")
         return str(output_file)
     
+    def validate_file(self, filepath: str, fix: bool = False, output_dir: Optional[str] = None) -> Dict:
+        """Validate (and optionally fix) every feature in a file.
+        
+        This is the unit of work for validate_files(); the returned report is
+        JSON-serializable.
+        
+        Args:
+            filepath: GeoJSON boundary file
+            fix: Attempt make_valid()/buffer(0) repairs on invalid features
+            output_dir: Where to write the ``*_fixed`` file (default: next to the input)
+            
+        Returns:
+            Report with per-feature results and the overall validity
+        """
+        logger.info(f"Validating boundary file: {filepath}")
+        
+        try:
+            geojson_data = read_json(filepath)
+        except Exception as e:
+            return {'file': filepath, 'valid': False, 'error': f"Failed to load file: {e}", 'features': []}
+        
+        results = self.validate_all_features(geojson_data, filepath)
+        fixes = {}
+        features = []
+        
+        for index, result in enumerate(results):
+            feature_report = self.result_to_report(result)
+            feature_report['index'] = index
+            
+            if fix and result.get('shapely_geometry') is not None and not result['valid']:
+                fix_result = self.fix_geometry(result)
+                if fix_result:
+                    fixes[index] = fix_result
+                    feature_report['fix'] = {k: v for k, v in fix_result.items() if k != 'geometry'}
+                else:
+                    feature_report['fix'] = None
+            
+            features.append(feature_report)
+        
+        report = {
+            'file': filepath,
+            'valid': all(f['valid'] for f in features),
+            'feature_count': len(features),
+            'features': features
+        }
+        
+        if fixes:
+            report['fixed_file'] = self.save_fixed_features(filepath, fixes, output_dir)
+        
+        return report
+    
+    @staticmethod
+    def result_to_report(validation_result: Dict) -> Dict:
+        """Strip geometries from a validation result, leaving a JSON-serializable summary."""
+        report = {k: v for k, v in validation_result.items() if k not in ('geometry', 'shapely_geometry')}
+        if 'analysis' in report:
+            analysis = dict(report['analysis'])
+            analysis['bounds'] = list(analysis['bounds'])
+            report['analysis'] = analysis
+        return report
+    
     def generate_validation_report(self, validation_result: Dict) -> str:
         """Generate a detailed validation report."""
         result = validation_result
@@ -399,62 +516,210 @@ class BoundaryValidator:
         return "\n".join(report)
 
 
+class ValidationCache:
+    """On-disk cache of boundary validation results keyed by geometry content hash.
+    
+    Each entry records whether the geometry was valid, the issues found and, for
+    invalid geometries, the repaired geometry, so an unchanged boundary never
+    needs to be analysed or repaired twice.
+    """
+    
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def geometry_hash(geometry: Dict) -> str:
+        """SHA-256 of the geometry's canonical JSON encoding."""
+        canonical = json.dumps(geometry, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached entry for a geometry hash, or None."""
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def put(self, key: str, entry: Dict):
+        """Store an entry for a geometry hash (written atomically)."""
+        tmp_path = f"{self._path(key)}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(key))
+
+
+def _polygonal(geojson_geom: Dict) -> Optional[Dict]:
+    """Keep only the polygon parts of a repaired geometry (make_valid can emit lines/points)."""
+    if geojson_geom['type'] in ('Polygon', 'MultiPolygon'):
+        return geojson_geom
+    
+    polygons = []
+    for part in shapely.get_parts(shape(geojson_geom)):
+        if part.geom_type == 'Polygon':
+            polygons.append(part)
+        elif part.geom_type == 'MultiPolygon':
+            polygons.extend(part.geoms)
+    
+    if not polygons:
+        return None
+    return (polygons[0] if len(polygons) == 1 else MultiPolygon(polygons)).__geo_interface__
+
+
+def validate_and_repair(geometry: Dict, cache: Optional[ValidationCache] = None,
+                        validator: Optional[BoundaryValidator] = None) -> Tuple[Dict, Dict, bool]:
+    """Validate a boundary geometry, repairing it if needed, with result caching.
+    
+    Args:
+        geometry: GeoJSON Polygon or MultiPolygon
+        cache: Validation cache (default: no caching)
+        validator: Validator to use (default: a new BoundaryValidator)
+        
+    Returns:
+        Tuple of (geometry to use, cache entry, cache hit). The geometry is the
+        original when valid or unrepairable, otherwise the repaired polygon(s).
+    """
+    key = ValidationCache.geometry_hash(geometry)
+    
+    entry = cache.get(key) if cache else None
+    if entry is not None:
+        return entry.get('repaired_geometry') or geometry, entry, True
+    
+    validator = validator or BoundaryValidator()
+    result = validator.validate_feature({'type': 'Feature', 'geometry': geometry})
+    
+    entry = {
+        'hash': key,
+        'valid': result['valid'],
+        'validity_reason': result.get('validity_reason', result.get('error')),
+        'issues': result['issues'],
+        'checked_at': int(time.time()),
+        'repair_method': None,
+        'repaired_geometry': None
+    }
+    
+    if not result['valid'] and result.get('shapely_geometry') is not None:
+        fix_result = validator.fix_geometry(result)
+        repaired = _polygonal(fix_result['geometry']) if fix_result else None
+        if repaired:
+            entry['repair_method'] = fix_result['method']
+            entry['area_change'] = fix_result['area_change']
+            entry['repaired_geometry'] = repaired
+    
+    if cache:
+        cache.put(key, entry)
+    
+    return entry['repaired_geometry'] or geometry, entry, False
+
+
+def _validate_file_task(filepath: str, fix: bool, output_dir: Optional[str]) -> Dict:
+    """Process-pool entry point for validate_files()."""
+    return BoundaryValidator().validate_file(filepath, fix=fix, output_dir=output_dir)
+
+
+def validate_files(files: List[str], fix: bool = False, output_dir: Optional[str] = None,
+                   workers: Optional[int] = None) -> List[Dict]:
+    """Validate (and optionally fix) many boundary files, spread over a process pool.
+    
+    Args:
+        files: GeoJSON boundary files
+        fix: Attempt repairs on invalid features
+        output_dir: Directory for fixed files (default: next to each input)
+        workers: Worker processes (default: one per CPU; 1 runs in-process)
+        
+    Returns:
+        One report per file, in input order
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(files) <= 1:
+        validator = BoundaryValidator()
+        return [validator.validate_file(f, fix=fix, output_dir=output_dir) for f in files]
+    
+    with ProcessPoolExecutor(max_workers=min(workers, len(files))) as executor:
+        return list(executor.map(_validate_file_task, files, [fix] * len(files), [output_dir] * len(files)))
+
+
 def main():
     """Main function to run boundary validation."""
+    import argparse
+    
     parser = argparse.ArgumentParser(description='Validate and fix city boundary GeoJSON files')
     parser.add_argument('files', nargs='+', help='GeoJSON files to validate')
     parser.add_argument('--fix', action='store_true', help='Attempt to fix invalid geometries')
-    parser.add_argument('--output-dir', help='Directory to save fixed files (default: same as input)')
+    parser.add_argument('--output-dir', help='Directory to save fixed files and JSON reports (default: same as input)')
+    parser.add_argument('--json-report', help='Write a combined machine-readable report to this file')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
     
     args = parser.parse_args()
     
-    if args.verbose:
-        logging.getLogger().setLevel(logging.DEBUG)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
     
     if not SHAPELY_AVAILABLE:
         logger.error("Shapely is required for boundary validation.")
         logger.error("Install with: pip install shapely")
         sys.exit(1)
     
-    validator = BoundaryValidator()
-    
+    files = []
     for filepath in args.files:
         if not os.path.exists(filepath):
             logger.error(f"File not found: {filepath}")
             continue
+        files.append(filepath)
+    
+    reports = validate_files(files, fix=args.fix, output_dir=args.output_dir, workers=args.workers)
+    validator = BoundaryValidator()
+    
+    for report in reports:
+        logger.info(f"\nProcessed: {report['file']}")
         
-        logger.info(f"\nProcessing: {filepath}")
-        
-        # Validate
-        result = validator.validate_geojson_file(filepath)
+        if report.get('error'):
+            logger.error(report['error'])
+            continue
         
         # Print report
-        report = validator.generate_validation_report(result)
-        print(report)
+        for feature in report['features']:
+            print(validator.generate_validation_report(feature))
+            
+            fix = feature.get('fix')
+            if fix:
+                logger.info(f"Fix method: {fix['method']}")
+                logger.info(f"Area change: {fix['area_change']:.6f}")
+                logger.info(f"Bounds change: {fix['bounds_change']:.6f}")
+            elif 'fix' in feature:
+                logger.error("❌ Could not fix geometry")
         
-        # Fix if requested and needed
-        if args.fix and not result['valid']:
-            logger.info("Attempting to fix geometry...")
-            fix_result = validator.fix_geometry(result)
+        if report.get('fixed_file'):
+            logger.info(f"✅ Fixed geometry saved to: {report['fixed_file']}")
             
-            if fix_result:
-                output_file = validator.save_fixed_boundary(filepath, fix_result['geometry'], fix_result)
-                logger.info(f"✅ Fixed geometry saved to: {output_file}")
-                logger.info(f"Fix method: {fix_result['method']}")
-                logger.info(f"Area change: {fix_result['area_change']:.6f}")
-                logger.info(f"Bounds change: {fix_result['bounds_change']:.6f}")
-                
-                # Validate the fixed version
-                logger.info("Validating fixed geometry...")
-                fixed_result = validator.validate_geojson_file(output_file)
-                if fixed_result['valid']:
-                    logger.info("✅ Fixed geometry is now valid!")
-                else:
-                    logger.warning("⚠️ Fixed geometry still has issues:")
-                    logger.warning(fixed_result['validity_reason'])
+            # Validate the fixed version
+            logger.info("Validating fixed geometry...")
+            fixed_report = validator.validate_file(report['fixed_file'])
+            if fixed_report['valid']:
+                logger.info("✅ Fixed geometry is now valid!")
             else:
-                logger.error("❌ Could not fix geometry")
+                logger.warning("⚠️ Fixed geometry still has issues:")
+                for feature in fixed_report['features']:
+                    if not feature['valid']:
+                        logger.warning(feature.get('validity_reason', feature.get('error')))
+        
+        # Per-file machine-readable report
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            report_path = os.path.join(args.output_dir, f"{Path(report['file']).stem}_validation.json")
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            logger.info(f"Saved validation report to: {report_path}")
+    
+    if args.json_report:
+        with open(args.json_report, 'w', encoding='utf-8') as f:
+            json.dump({'files': reports, 'valid': all(r['valid'] for r in reports)}, f, indent=2, ensure_ascii=False)
+        logger.info(f"Saved combined report to: {args.json_report}")
 
 
 if __name__ == '__main__':
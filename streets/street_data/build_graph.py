@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Build Graph
+===========
+
+Stage-level dependency tracking for incremental rebuilds. Each stage declares
+its inputs (a fingerprint of the code it runs, its configuration and the
+artifacts of upstream stages). Their hashes are recorded in
+``build_state.json`` next to the stage artifacts, and a stage only runs again
+when one of them changes. When a stage re-runs but produces a byte-identical
+artifact, its downstream stages are skipped.
+
+The state is saved after every stage, so each finished stage is a checkpoint:
+a run that was interrupted can be resumed, reusing the stages that run already
+completed.
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def digest(value: Any) -> str:
+    """SHA-256 of bytes, or of the canonical JSON form of any other value."""
+    if isinstance(value, bytes):
+        data = value
+    else:
+        data = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents."""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def code_fingerprint(*objects) -> str:
+    """Hash of the source code of the functions, methods or classes a stage runs."""
+    sources = []
+    for obj in objects:
+        try:
+            sources.append(inspect.getsource(obj))
+        except (OSError, TypeError):
+            sources.append(repr(obj))
+    return digest(sources)
+
+
+def save_json_artifact(value: Any, path: str):
+    """Write a JSON artifact atomically."""
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(value, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def load_json_artifact(path: str) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@dataclass
+class StageResult:
+    """Outcome of one stage: whether it ran, why, and a handle on its artifact."""
+    name: str
+    ran: bool
+    reason: str
+    hash: Optional[str]
+    path: Optional[str]
+    seconds: float = 0.0
+    _load: Optional[Callable[[str], Any]] = field(default=None, repr=False)
+    _value: Any = field(default=None, repr=False)
+    _loaded: bool = field(default=False, repr=False)
+
+    def value(self) -> Any:
+        """The stage's artifact, loaded from disk on first use if the stage was skipped."""
+        if not self._loaded:
+            self._value = self._load(self.path) if self._load and self.path else None
+            self._loaded = True
+        return self._value
+
+
+class BuildGraph:
+    """Runs named stages, skipping those whose recorded inputs are unchanged."""
+
+    STATE_FILE = 'build_state.json'
+
+    def __init__(self, build_dir: str, incremental: bool = True, force: Iterable[str] = (),
+                 resume: bool = False, metrics=None):
+        """Initialize the build graph.
+
+        Args:
+            build_dir: Directory for stage artifacts and the build state file
+            incremental: Skip stages whose inputs are unchanged (otherwise every stage runs)
+            force: Names of stages to run regardless of their inputs
+            resume: Continue an unfinished previous run, reusing the stages it completed
+            metrics: Optional Instrumentation that times each stage that runs
+        """
+        self.build_dir = build_dir
+        self.incremental = incremental
+        self.force = set(force)
+        self.metrics = metrics
+        self.results: List[StageResult] = []
+
+        os.makedirs(build_dir, exist_ok=True)
+        self.state_path = os.path.join(build_dir, self.STATE_FILE)
+        self.state = self._load_state()
+
+        previous_run = self.state.get('run') or {}
+        self.resuming = bool(resume and previous_run and not previous_run.get('completed'))
+        if self.resuming:
+            logger.info(f"Resuming unfinished build {previous_run['id']} in {build_dir}")
+            self.run_id = previous_run['id']
+        else:
+            if resume:
+                logger.info(f"No unfinished build to resume in {build_dir}")
+            self.run_id = f"{time.time_ns():x}"
+            self.state['run'] = {'id': self.run_id, 'started_at': int(time.time()), 'completed': False}
+            self._save_state()
+
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if isinstance(state.get('stages'), dict):
+                return state
+        except (OSError, ValueError):
+            pass
+        return {'stages': {}}
+
+    def _save_state(self):
+        save_json_artifact(self.state, self.state_path)
+
+    def artifact_path(self, filename: str) -> str:
+        return os.path.join(self.build_dir, filename)
+
+    def _decide(self, name: str, inputs: Dict[str, str], path: str) -> Tuple[bool, str]:
+        """Decide whether a stage must run; returns (run, reason)."""
+        previous = self.state['stages'].get(name)
+
+        if name in self.force:
+            return True, 'forced'
+
+        changed = None
+        if previous is not None and os.path.exists(path):
+            recorded = previous.get('inputs', {})
+            changed = sorted(key for key in set(recorded) | set(inputs) if recorded.get(key) != inputs.get(key))
+
+        if self.resuming and previous and previous.get('run') == self.run_id and changed == []:
+            return False, 'resumed from checkpoint'
+        if not self.incremental:
+            return True, 'full rebuild'
+        if previous is None:
+            return True, 'no previous build'
+        if changed is None:
+            return True, 'artifact missing'
+        if changed:
+            return True, ', '.join(f"{key} changed" for key in changed)
+        return False, 'inputs unchanged'
+
+    def stage(self, name: str, inputs: Dict[str, Any], compute: Callable[[], Any],
+              path: Optional[str] = None,
+              save: Optional[Callable[[Any, str], None]] = save_json_artifact,
+              load: Optional[Callable[[str], Any]] = load_json_artifact) -> StageResult:
+        """Run a stage, or reuse its artifact if none of its inputs changed.
+
+        Args:
+            name: Stage name (unique within the build)
+            inputs: Named inputs; StageResults contribute their artifact hash,
+                any other value is hashed as JSON
+            compute: Produces the stage's value; only called when the stage runs
+            path: Artifact path (default: ``<build_dir>/<name>.json``)
+            save: Writes the value to ``path``; None if ``compute`` writes ``path`` itself
+            load: Reads the artifact back for downstream stages
+
+        Returns:
+            StageResult for the stage
+        """
+        path = path or self.artifact_path(f"{name}.json")
+        input_hashes = {
+            key: value.hash if isinstance(value, StageResult) else digest(value)
+            for key, value in inputs.items()
+        }
+
+        run, reason = self._decide(name, input_hashes, path)
+        previous = self.state['stages'].get(name, {})
+
+        if not run:
+            result = StageResult(name, False, reason, previous.get('hash'), path, _load=load)
+            logger.info(f"Stage {name}: skipped ({reason})")
+            self.results.append(result)
+            return result
+
+        logger.info(f"Stage {name}: running ({reason})")
+        start = time.time()
+        with self.metrics.stage(name) if self.metrics else nullcontext():
+            value = compute()
+            if save is not None:
+                save(value, path)
+        seconds = time.time() - start
+
+        artifact_hash = file_digest(path) if os.path.exists(path) else None
+        if artifact_hash is not None and artifact_hash == previous.get('hash'):
+            reason += '; output unchanged'
+
+        self.state['stages'][name] = {
+            'inputs': input_hashes,
+            'hash': artifact_hash,
+            'path': path,
+            'run': self.run_id,
+            'built_at': int(time.time()),
+            'seconds': round(seconds, 3)
+        }
+        self._save_state()
+
+        result = StageResult(name, True, reason, artifact_hash, path, seconds,
+                             _load=load, _value=value, _loaded=True)
+        self.results.append(result)
+        return result
+
+    def complete(self):
+        """Mark the current run as finished; later resumes start a fresh run."""
+        self.state['run']['completed'] = True
+        self._save_state()
+
+    def explain(self) -> str:
+        """Human-readable account of why each stage ran or was skipped."""
+        lines = []
+        width = max((len(result.name) for result in self.results), default=0)
+        for result in self.results:
+            status = 'ran' if result.ran else 'skipped'
+            lines.append(f"  {result.name:<{width}} {status:<8} {result.seconds:7.2f}s  {result.reason}")
+        return '\n'.join(lines)
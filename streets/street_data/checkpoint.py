@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Pipeline Checkpoints
+====================
+
+Storage formats for the street pipeline's stage checkpoints, plus per-unit
+progress tracking for batch runs (raw Overpass responses use the
+memory-mappable columnar store in overpass_store.py):
+
+- street lists are stored in a compact binary form: all coordinates in one
+  float64 array with line/street offsets, and the remaining fields as a small
+  JSON table, inside a compressed ``.npz`` archive
+- ``BatchCheckpoint`` records which units (cities, tiles) of a batch are done,
+  so an interrupted batch can be resumed without repeating finished units
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, fields
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STREETS_FORMAT_VERSION = 1
+
+
+def save_streets_binary(streets: List, path: str):
+    """Write StreetSegments as a compressed columnar archive.
+
+    Coordinates go into one (N, 2) float64 array; ``line_offsets`` and
+    ``street_offsets`` mark where each LineString and each street start. All
+    other fields are kept as a JSON table, so new StreetSegment fields are
+    stored without changing the format.
+    """
+    coords = []
+    line_offsets = [0]
+    street_offsets = [0]
+    records = []
+
+    for street in streets:
+        record = asdict(street)
+        for line in record.pop('coordinates'):
+            coords.extend(line)
+            line_offsets.append(len(coords))
+        street_offsets.append(len(line_offsets) - 1)
+        records.append(record)
+
+    meta = {'version': STREETS_FORMAT_VERSION, 'records': records}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(
+            f,
+            coords=np.asarray(coords, dtype=np.float64).reshape(-1, 2),
+            line_offsets=np.asarray(line_offsets, dtype=np.int64),
+            street_offsets=np.asarray(street_offsets, dtype=np.int64),
+            meta=np.frombuffer(json.dumps(meta, separators=(',', ':')).encode('utf-8'), dtype=np.uint8)
+        )
+    os.replace(tmp_path, path)
+
+
+def load_streets_binary(path: str, segment_class) -> List:
+    """Read streets written by save_streets_binary back into ``segment_class`` objects."""
+    with np.load(path) as archive:
+        coords = archive['coords'].tolist()
+        line_offsets = archive['line_offsets'].tolist()
+        street_offsets = archive['street_offsets'].tolist()
+        meta = json.loads(archive['meta'].tobytes().decode('utf-8'))
+
+    if meta.get('version') != STREETS_FORMAT_VERSION:
+        raise ValueError(f"Unsupported streets checkpoint version: {meta.get('version')}")
+
+    known = {f.name for f in fields(segment_class)}
+    streets = []
+    for i, record in enumerate(meta['records']):
+        lines = [coords[line_offsets[j]:line_offsets[j + 1]]
+                 for j in range(street_offsets[i], street_offsets[i + 1])]
+        streets.append(segment_class(coordinates=lines, **{k: v for k, v in record.items() if k in known}))
+    return streets
+
+
+class BatchCheckpoint:
+    """Tracks the status of each unit of a batch run in a small JSON file."""
+
+    def __init__(self, path: str, units: Iterable[str], resume: bool = False):
+        """Open (or start) a batch checkpoint.
+
+        Args:
+            path: Checkpoint file
+            units: Unit names in processing order
+            resume: Keep the progress of an unfinished batch; otherwise start fresh
+        """
+        self.path = path
+        self.units = list(units)
+        self.state = self._load() if resume else None
+
+        if self.state and self.state.get('completed'):
+            logger.info("Previous batch completed; nothing to resume")
+            self.state = None
+
+        if self.state is None:
+            self.state = {'started_at': int(time.time()), 'completed': False, 'units': {}}
+            self._save()
+        else:
+            done = sum(1 for u in self.units if self.status(u) == 'done')
+            logger.info(f"Resuming batch: {done}/{len(self.units)} units already done")
+
+    def _load(self) -> Optional[Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(f"{self.path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def status(self, unit: str) -> str:
+        return self.state['units'].get(unit, {}).get('status', 'pending')
+
+    def pending(self) -> List[str]:
+        """Units that still have to run, in order."""
+        return [u for u in self.units if self.status(u) != 'done']
+
+    def mark(self, unit: str, status: str, **details):
+        """Record a unit's status ('done', 'failed', ...) and persist it immediately."""
+        self.state['units'][unit] = dict(details, status=status, updated_at=int(time.time()))
+        if all(self.status(u) == 'done' for u in self.units):
+            self.state['completed'] = True
+        self._save()
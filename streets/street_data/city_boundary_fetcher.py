@@ -15,10 +15,20 @@ import json
 import logging
 import os
 import re
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple, Union
-import requests
-from shapely.geometry import Polygon, MultiPolygon, shape
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple, Union
+
+from serialization import decode_boundary, write_json
+
+# numpy, shapely and requests are imported where they are first needed, so loading
+# and saving boundary files doesn't pay for the geometry and network stacks
+if TYPE_CHECKING:
+    import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -34,12 +44,148 @@ class CityBoundary:
     area_km2: float
 
 
+def boundary_slug(city_name: str, state: Optional[str] = None) -> str:
+    """Build the storage key used for boundary files, e.g. ``san_francisco_ca``."""
+    safe_name = city_name.lower().replace(' ', '_').replace(',', '')
+    if state:
+        safe_state = state.lower().replace(' ', '_')
+        return f"{safe_name}_{safe_state}"
+    return safe_name
+
+
+def boundary_to_geojson(boundary: CityBoundary, extra_properties: Optional[Dict] = None) -> Dict:
+    """Convert a CityBoundary into the FeatureCollection layout used in ``boundary/*.geojson``."""
+    properties = {
+        "name": boundary.name,
+        "state": boundary.state,
+        "country": boundary.country,
+        "area_km2": boundary.area_km2,
+        "bbox": boundary.bbox
+    }
+    if extra_properties:
+        for key, value in extra_properties.items():
+            properties.setdefault(key, value)
+    
+    feature = {
+        "type": "Feature",
+        "properties": properties,
+        "geometry": boundary.geometry
+    }
+    
+    return {
+        "type": "FeatureCollection",
+        "features": [feature]
+    }
+
+
+def boundary_from_geojson(data: Dict) -> Optional[CityBoundary]:
+    """Build a CityBoundary from a saved boundary FeatureCollection.
+    
+    Returns:
+        CityBoundary object, or None if the document has no usable feature
+    """
+    if data.get('type') != 'FeatureCollection' or not data.get('features'):
+        return None
+    
+    feature = data['features'][0]
+    props = feature.get('properties') or {}
+    geometry = feature.get('geometry')
+    
+    if not geometry:
+        return None
+    
+    return CityBoundary(
+        name=props.get('name', 'Unknown'),
+        state=props.get('state'),
+        country=props.get('country', 'Unknown'),
+        geometry=geometry,
+        bbox=props.get('bbox', [0, 0, 0, 0]),
+        area_km2=props.get('area_km2', 0.0)
+    )
+
+
+class BoundaryIndex:
+    """STRtree over boundary polygons for batch point-in-city lookups.
+    
+    Points are given as [lat, lon] pairs, matching the street data format.
+    """
+    
+    def __init__(self, slugs: List[str], boundaries: List[CityBoundary]):
+        import numpy as np
+        import shapely
+        from shapely.geometry import shape
+        
+        self.slugs = list(slugs)
+        self.boundaries = list(boundaries)
+        self.geometries = np.array([shape(b.geometry) for b in self.boundaries], dtype=object)
+        shapely.prepare(self.geometries)
+        self.tree = shapely.STRtree(self.geometries)
+    
+    def __len__(self) -> int:
+        return len(self.slugs)
+    
+    def locate_indices(self, lats, lons) -> 'np.ndarray':
+        """Return the boundary index containing each point, or -1 when outside all boundaries.
+        
+        Args:
+            lats: Array-like of latitudes
+            lons: Array-like of longitudes
+            
+        Returns:
+            int64 array with one boundary index per point
+        """
+        import numpy as np
+        import shapely
+        
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+        result = np.full(len(lons), -1, dtype=np.int64)
+        if len(lons) == 0 or len(self.slugs) == 0:
+            return result
+        
+        # The bulk tree query returns [point, boundary] candidate pairs whose bounding
+        # boxes intersect; group them by boundary and run one vectorized exact test each
+        point_idx, boundary_idx = self.tree.query(shapely.points(lons, lats))
+        order = np.argsort(boundary_idx, kind='stable')
+        point_idx, boundary_idx = point_idx[order], boundary_idx[order]
+        splits = np.flatnonzero(np.diff(boundary_idx)) + 1
+        
+        for candidates, owners in zip(np.split(point_idx, splits), np.split(boundary_idx, splits)):
+            if len(candidates) == 0:
+                continue
+            inside = shapely.contains_xy(self.geometries[owners[0]], lons[candidates], lats[candidates])
+            result[candidates[inside]] = owners[0]
+        
+        return result
+    
+    def locate(self, points: Sequence[Sequence[float]]) -> List[Optional[str]]:
+        """Return the slug of the boundary containing each [lat, lon] point (None if outside)."""
+        import numpy as np
+        
+        coords = np.asarray(points, dtype=float).reshape(-1, 2)
+        indices = self.locate_indices(coords[:, 0], coords[:, 1])
+        return [self.slugs[i] if i >= 0 else None for i in indices]
+
+
 class CityBoundaryFetcher:
     """Fetches city boundary data from pre-validated GeoJSON repository."""
     
     # Base URL for the GeoJSON repository
     BASE_URL = "https://raw.githubusercontent.com/generalpiston/geojson-us-city-boundaries/refs/heads/master/cities"
     
+    # Archive of the whole repository, used for bulk prefetch and the city index
+    ARCHIVE_URL = "https://codeload.github.com/generalpiston/geojson-us-city-boundaries/zip/refs/heads/master"
+    
+    # Local bookkeeping files kept in the boundary directory
+    CITY_INDEX_FILE = 'city_index.json'
+    NEGATIVE_CACHE_FILE = '.missing_cities.json'
+    
+    # How long a 404 is remembered before the city is tried again (seconds)
+    NEGATIVE_CACHE_TTL = 7 * 24 * 3600
+    
+    # Concurrent downloads (and pooled connections) used by prefetch_boundaries
+    PREFETCH_WORKERS = 8
+    
     # State code mapping for common state names
     STATE_CODES = {
         'alabama': 'al', 'alaska': 'ak', 'arizona': 'az', 'arkansas': 'ar',
@@ -57,20 +203,51 @@ class CityBoundaryFetcher:
         'wisconsin': 'wi', 'wyoming': 'wy', 'district of columbia': 'dc'
     }
     
-    def __init__(self, boundary_dir: str = 'boundary'):
+    def __init__(self, boundary_dir: str = 'boundary', store_path: Optional[str] = None):
         """Initialize the boundary fetcher.
         
         Args:
             boundary_dir: Directory to store boundary files (default: 'boundary')
+            store_path: Optional path to a single-file SQLite boundary store. When set,
+                boundaries are saved to and loaded from the store instead of
+                individual GeoJSON files.
         """
         self.boundary_dir = boundary_dir
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'StreetNamesChallenge/1.0 (Educational Game; contact@example.com)'
-        })
+        self._session = None
+        self._session_lock = threading.Lock()
         
         # Create boundary directory if it doesn't exist
         os.makedirs(boundary_dir, exist_ok=True)
+        
+        # 404 cache and city index, loaded lazily
+        self._cache_lock = threading.Lock()
+        self._negative_cache = None
+        self._city_index = None
+        
+        # Optional indexed store (imported lazily to avoid a circular import)
+        self.store = None
+        self._boundary_index = None
+        if store_path:
+            from boundary_store import BoundaryStore
+            self.store = BoundaryStore(store_path)
+    
+    @property
+    def session(self):
+        """Pooled HTTP session shared by all prefetch worker threads, created on first use."""
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                
+                session = requests.Session()
+                session.headers.update({
+                    'User-Agent': 'StreetNamesChallenge/1.0 (Educational Game; contact@example.com)'
+                })
+                adapter = HTTPAdapter(pool_connections=self.PREFETCH_WORKERS, pool_maxsize=self.PREFETCH_WORKERS)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+            return self._session
     
     def get_city_boundary(self, city_name: str, state: Optional[str] = None, country: str = "United States") -> Optional[CityBoundary]:
         """
@@ -92,6 +269,8 @@ class CityBoundaryFetcher:
             logger.error("State is required for US city boundary lookup")
             return None
         
+        import requests
+        
         logger.info(f"Fetching boundary for {city_name}, {state}")
         
         # Normalize state to lowercase code
@@ -103,6 +282,11 @@ class CityBoundaryFetcher:
         # Normalize city name for URL
         city_slug = self._normalize_city_name(city_name)
         
+        # Skip the request entirely for cities known not to exist upstream
+        if not self._may_exist(state_code, city_slug):
+            logger.error(f"City boundary not found (cached): {city_name}, {state}")
+            return None
+        
         # Construct URL
         url = f"{self.BASE_URL}/{state_code}/{city_slug}.json"
         logger.debug(f"Fetching from URL: {url}")
@@ -126,6 +310,7 @@ class CityBoundaryFetcher:
                 
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
+                self._record_missing(state_code, city_slug)
                 logger.error(f"City boundary not found: {city_name}, {state}")
                 logger.info(f"Tried URL: {url}")
                 logger.info("Check if the city name and state are correct, or if the city is available in the repository")
@@ -213,6 +398,8 @@ class CityBoundaryFetcher:
     
     def _calculate_bbox(self, geometry: Dict) -> List[float]:
         """Calculate bounding box [south, west, north, east] from geometry."""
+        from shapely.geometry import shape
+        
         try:
             geom = shape(geometry)
             bounds = geom.bounds  # (minx, miny, maxx, maxy)
@@ -223,6 +410,8 @@ class CityBoundaryFetcher:
     
     def _calculate_area(self, geometry: Dict) -> float:
         """Calculate area in km² from geometry."""
+        from shapely.geometry import shape
+        
         try:
             geom = shape(geometry)
             # Convert to a projected coordinate system for accurate area calculation
@@ -239,47 +428,37 @@ class CityBoundaryFetcher:
     def save_boundary(self, boundary: CityBoundary, filename: Optional[str] = None) -> str:
         """Save boundary data to a GeoJSON file in the boundary directory.
         
+        When a boundary store is configured the boundary is written to the store
+        instead, keyed by the same name that would have been used for the file.
+        
         Args:
             boundary: CityBoundary object to save
             filename: Optional custom filename. If not provided, generates from city name.
         
         Returns:
-            str: Full path to the saved file
+            str: Full path to the saved file (``<store>#<key>`` for store entries)
         """
         if filename is None:
             # Generate filename from city name
-            safe_name = boundary.name.lower().replace(' ', '_').replace(',', '')
-            if boundary.state:
-                safe_state = boundary.state.lower().replace(' ', '_')
-                filename = f"{safe_name}_{safe_state}.geojson"
-            else:
-                filename = f"{safe_name}.geojson"
+            filename = f"{boundary_slug(boundary.name, boundary.state)}.geojson"
         
         # Ensure filename has .geojson extension
         if not filename.endswith('.geojson'):
             filename += '.geojson'
         
+        self._boundary_index = None
+        
+        if self.store is not None:
+            key = self.store.put(boundary, slug=filename[:-8], source=self.BASE_URL)
+            location = f"{self.store.path}#{key}"
+            logger.info(f"Saved boundary to {location}")
+            return location
+        
         filepath = os.path.join(self.boundary_dir, filename)
         
-        feature = {
-            "type": "Feature",
-            "properties": {
-                "name": boundary.name,
-                "state": boundary.state,
-                "country": boundary.country,
-                "area_km2": boundary.area_km2,
-                "bbox": boundary.bbox
-            },
-            "geometry": boundary.geometry
-        }
-        
-        geojson_data = {
-            "type": "FeatureCollection",
-            "features": [feature]
-        }
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(geojson_data, f, indent=2, ensure_ascii=False)
+        geojson_data = boundary_to_geojson(boundary)
+        
+        write_json(geojson_data, filepath, indent=True)
         
         logger.info(f"Saved boundary to {filepath}")
         return filepath
@@ -287,6 +466,9 @@ class CityBoundaryFetcher:
     def load_boundary(self, filename: str) -> Optional[CityBoundary]:
         """Load boundary data from a GeoJSON file in the boundary directory.
         
+        With a boundary store configured, the store is checked first. A GeoJSON
+        file that is not in the store yet is imported on first load.
+        
         Args:
             filename: Name of the GeoJSON file to load
             
@@ -296,6 +478,12 @@ class CityBoundaryFetcher:
         if not filename.endswith('.geojson'):
             filename += '.geojson'
         
+        if self.store is not None:
+            boundary = self.store.get(filename[:-8])
+            if boundary:
+                logger.info(f"Loaded boundary from {self.store.path}#{filename[:-8]}")
+                return boundary
+        
         filepath = os.path.join(self.boundary_dir, filename)
         
         if not os.path.exists(filepath):
@@ -303,31 +491,18 @@ class CityBoundaryFetcher:
             return None
         
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(filepath, 'rb') as f:
+                boundary = decode_boundary(f.read(), CityBoundary)
             
-            if data.get('type') != 'FeatureCollection' or not data.get('features'):
-                logger.error(f"Invalid GeoJSON format in {filepath}")
+            if not boundary:
+                logger.error(f"No boundary feature with geometry in {filepath}")
                 return None
             
-            feature = data['features'][0]
-            props = feature.get('properties', {})
-            geometry = feature.get('geometry')
+            logger.info(f"Loaded boundary from {filepath}")
             
-            if not geometry:
-                logger.error(f"No geometry found in {filepath}")
-                return None
+            if self.store is not None:
+                self.store.import_geojson(filepath)
             
-            boundary = CityBoundary(
-                name=props.get('name', 'Unknown'),
-                state=props.get('state'),
-                country=props.get('country', 'Unknown'),
-                geometry=geometry,
-                bbox=props.get('bbox', [0, 0, 0, 0]),
-                area_km2=props.get('area_km2', 0.0)
-            )
-            
-            logger.info(f"Loaded boundary from {filepath}")
             return boundary
             
         except Exception as e:
@@ -338,33 +513,408 @@ class CityBoundaryFetcher:
         """List all saved boundary files in the boundary directory.
         
         Returns:
-            List of boundary filenames (without .geojson extension)
+            List of boundary filenames (without .geojson extension), including
+            any entries held in the boundary store
         """
-        if not os.path.exists(self.boundary_dir):
-            return []
+        boundaries = set()
+        
+        if self.store is not None:
+            boundaries.update(self.store.list_slugs())
         
-        boundaries = []
-        for filename in os.listdir(self.boundary_dir):
-            if filename.endswith('.geojson'):
-                boundaries.append(filename[:-8])  # Remove .geojson extension
+        if os.path.exists(self.boundary_dir):
+            for filename in os.listdir(self.boundary_dir):
+                if filename.endswith('.geojson'):
+                    boundaries.add(filename[:-8])  # Remove .geojson extension
         
         return sorted(boundaries)
     
+    def find_boundary(self, city_name: str, state: Optional[str] = None) -> Optional[CityBoundary]:
+        """Look up a saved boundary by city name and state.
+        
+        Uses the boundary store index when available, otherwise falls back to
+        the GeoJSON file naming convention.
+        
+        Args:
+            city_name: Name of the city (e.g., "San Francisco")
+            state: State name or abbreviation
+            
+        Returns:
+            CityBoundary object if found, None otherwise
+        """
+        if self.store is not None:
+            boundary = self.store.find(city_name, state)
+            if boundary:
+                return boundary
+        
+        filename = boundary_slug(city_name, state)
+        if not os.path.exists(os.path.join(self.boundary_dir, f"{filename}.geojson")):
+            return None
+        return self.load_boundary(filename)
+    
+    def find_boundaries_in_bbox(self, bbox: List[float]) -> List[CityBoundary]:
+        """Find saved boundaries whose bounding box intersects ``bbox``.
+        
+        Args:
+            bbox: Bounding box [south, west, north, east]
+            
+        Returns:
+            List of matching CityBoundary objects
+        """
+        if self.store is not None:
+            return [self.store.get(slug) for slug in self.store.query_bbox(bbox)]
+        
+        south, west, north, east = bbox
+        matches = []
+        for name in self.list_saved_boundaries():
+            boundary = self.load_boundary(name)
+            if not boundary:
+                continue
+            b_south, b_west, b_north, b_east = boundary.bbox
+            if b_south <= north and b_north >= south and b_west <= east and b_east >= west:
+                matches.append(boundary)
+        return matches
+    
+    def build_boundary_index(self, names: Optional[List[str]] = None) -> BoundaryIndex:
+        """Build an STRtree index over saved boundaries for reverse lookups.
+        
+        Args:
+            names: Boundary names to include (default: all saved boundaries)
+            
+        Returns:
+            BoundaryIndex over the loaded boundary polygons
+        """
+        slugs, boundaries = [], []
+        for name in names or self.list_saved_boundaries():
+            boundary = self.load_boundary(name)
+            if boundary:
+                slugs.append(name)
+                boundaries.append(boundary)
+        
+        index = BoundaryIndex(slugs, boundaries)
+        logger.info(f"Built boundary index over {len(index)} cities")
+        return index
+    
+    def locate_points(self, points: Sequence[Sequence[float]]) -> List[Optional[str]]:
+        """Find which saved city each [lat, lon] point falls in.
+        
+        The boundary index is built on first use and reused until a boundary is saved.
+        
+        Args:
+            points: Sequence of [lat, lon] pairs
+            
+        Returns:
+            Boundary name (e.g. ``oakland_ca``) per point, or None for points outside all cities
+        """
+        if self._boundary_index is None:
+            self._boundary_index = self.build_boundary_index()
+        return self._boundary_index.locate(points)
+    
+    def _negative_cache_path(self) -> str:
+        return os.path.join(self.boundary_dir, self.NEGATIVE_CACHE_FILE)
+    
+    def _load_negative_cache(self) -> Dict[str, float]:
+        """Load the 404 cache ({"<state>/<slug>": timestamp}), dropping expired entries."""
+        if self._negative_cache is None:
+            cache = {}
+            try:
+                with open(self._negative_cache_path(), 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                pass
+            cutoff = time.time() - self.NEGATIVE_CACHE_TTL
+            self._negative_cache = {key: ts for key, ts in cache.items() if ts >= cutoff}
+        return self._negative_cache
+    
+    def _record_missing(self, state_code: str, city_slug: str):
+        """Remember that a city returned 404 so it is not requested again for a while."""
+        with self._cache_lock:
+            cache = self._load_negative_cache()
+            cache[f"{state_code}/{city_slug}"] = time.time()
+            with open(self._negative_cache_path(), 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=2, sort_keys=True)
+    
+    def _load_city_index(self) -> Dict[str, List[str]]:
+        """Load the local index of upstream city slugs per state code."""
+        if self._city_index is None:
+            try:
+                with open(os.path.join(self.boundary_dir, self.CITY_INDEX_FILE), 'r', encoding='utf-8') as f:
+                    self._city_index = json.load(f).get('states', {})
+            except (OSError, ValueError):
+                self._city_index = {}
+        return self._city_index
+    
+    def _may_exist(self, state_code: str, city_slug: str) -> bool:
+        """Check the city index and 404 cache before making a network request."""
+        index = self._load_city_index()
+        if state_code in index:
+            return city_slug in index[state_code]
+        
+        with self._cache_lock:
+            return f"{state_code}/{city_slug}" not in self._load_negative_cache()
+    
     def get_available_cities(self, state: str) -> List[str]:
-        """Get a list of available cities for a given state from the repository.
+        """Get a list of available cities for a given state from the local city index.
         
-        This method attempts to fetch the directory listing, but note that
-        GitHub doesn't provide directory listings via their raw content API.
-        This is more of a placeholder for potential future enhancement.
+        GitHub's raw content API doesn't provide directory listings, so the index
+        is built from the repository archive by build_city_index() (or
+        prefetch_from_archive()) and looked up locally.
         
         Args:
             state: State name or abbreviation
             
         Returns:
-            List of available city names (empty if not supported)
+            List of available city slugs (empty if the index has not been built)
         """
-        logger.warning("get_available_cities is not implemented - GitHub raw API doesn't support directory listings")
-        return []
+        state_code = self._normalize_state_code(state)
+        index = self._load_city_index()
+        if not index:
+            logger.warning("City index not built yet - run build_city_index() or --build-index first")
+            return []
+        return list(index.get(state_code, []))
+    
+    def is_city_available(self, city_name: str, state: str) -> Optional[bool]:
+        """Check whether a city exists upstream without touching the network.
+        
+        Returns:
+            True/False when the city index or 404 cache knows the answer, None otherwise
+        """
+        state_code = self._normalize_state_code(state)
+        if not state_code:
+            return False
+        city_slug = self._normalize_city_name(city_name)
+        
+        index = self._load_city_index()
+        if state_code in index:
+            return city_slug in index[state_code]
+        
+        with self._cache_lock:
+            if f"{state_code}/{city_slug}" in self._load_negative_cache():
+                return False
+        return None
+    
+    def _download_archive(self) -> str:
+        """Download the upstream repository archive to a temporary file and return its path."""
+        logger.info(f"Downloading boundary archive from {self.ARCHIVE_URL}")
+        fd, path = tempfile.mkstemp(suffix='.zip')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                with self.session.get(self.ARCHIVE_URL, timeout=300, stream=True) as response:
+                    response.raise_for_status()
+                    for chunk in response.iter_content(chunk_size=1 << 20):
+                        f.write(chunk)
+        except Exception:
+            os.remove(path)
+            raise
+        logger.info(f"Downloaded archive ({os.path.getsize(path) / 1e6:.1f} MB)")
+        return path
+    
+    @staticmethod
+    def _archive_city_members(archive: zipfile.ZipFile) -> Dict[Tuple[str, str], str]:
+        """Map (state_code, city_slug) to archive member names for ``cities/<st>/<slug>.json``."""
+        members = {}
+        for name in archive.namelist():
+            parts = name.split('/')
+            if len(parts) >= 3 and parts[-3] == 'cities' and parts[-1].endswith('.json'):
+                members[(parts[-2].lower(), parts[-1][:-5])] = name
+        return members
+    
+    def _write_city_index(self, members, source: str):
+        """Write the state -> city slug index used for offline availability checks."""
+        states = {}
+        for state_code, city_slug in members:
+            states.setdefault(state_code, []).append(city_slug)
+        for slugs in states.values():
+            slugs.sort()
+        
+        with open(os.path.join(self.boundary_dir, self.CITY_INDEX_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'source': source, 'generated_at': int(time.time()), 'states': states}, f)
+        
+        self._city_index = states
+        logger.info(f"Indexed {len(members)} cities across {len(states)} states")
+    
+    def build_city_index(self, archive_path: Optional[str] = None) -> Dict[str, List[str]]:
+        """Build the local city index from the upstream repository archive.
+        
+        Args:
+            archive_path: Local copy of the archive (default: download it)
+            
+        Returns:
+            Mapping of state code to available city slugs
+        """
+        downloaded = archive_path is None
+        path = self._download_archive() if downloaded else archive_path
+        try:
+            with zipfile.ZipFile(path) as archive:
+                self._write_city_index(self._archive_city_members(archive), archive_path or self.ARCHIVE_URL)
+        finally:
+            if downloaded:
+                os.remove(path)
+        return self._city_index
+    
+    def prefetch_from_archive(self, states: List[str], archive_path: Optional[str] = None,
+                              skip_existing: bool = True) -> Dict[str, str]:
+        """Save every city boundary for the given states from the repository archive.
+        
+        This reads boundaries straight out of one archive download instead of
+        requesting each city, and refreshes the city index as a side effect.
+        
+        Args:
+            states: State names or abbreviations to extract
+            archive_path: Local copy of the archive (default: download it)
+            skip_existing: Leave boundaries that are already saved untouched
+            
+        Returns:
+            Mapping of "<state>/<slug>" to status ('saved', 'cached' or 'error')
+        """
+        state_codes = {self._normalize_state_code(s) for s in states} - {None}
+        saved = set(self.list_saved_boundaries())
+        results = {}
+        
+        downloaded = archive_path is None
+        path = self._download_archive() if downloaded else archive_path
+        try:
+            with zipfile.ZipFile(path) as archive:
+                members = self._archive_city_members(archive)
+                self._write_city_index(members, archive_path or self.ARCHIVE_URL)
+                
+                for (state_code, city_slug), member in sorted(members.items()):
+                    if state_code not in state_codes:
+                        continue
+                    key = f"{state_code}/{city_slug}"
+                    city_name = city_slug.replace('-', ' ').title()
+                    if skip_existing and boundary_slug(city_name, state_code.upper()) in saved:
+                        results[key] = 'cached'
+                        continue
+                    
+                    try:
+                        data = json.loads(archive.read(member))
+                        boundary = self._process_geojson_data(data, city_name, state_code.upper(), "United States")
+                    except ValueError as e:
+                        logger.error(f"Invalid JSON for {key} in archive: {e}")
+                        boundary = None
+                    
+                    if boundary:
+                        self.save_boundary(boundary, boundary_slug(city_name, state_code.upper()))
+                        results[key] = 'saved'
+                    else:
+                        results[key] = 'error'
+        finally:
+            if downloaded:
+                os.remove(path)
+        
+        logger.info(f"Prefetched {sum(1 for v in results.values() if v == 'saved')} boundaries from archive")
+        return results
+    
+    def prefetch_boundaries(self, cities: List[Tuple[str, str]], max_workers: Optional[int] = None,
+                            skip_existing: bool = True) -> Dict[str, str]:
+        """Fetch and save many city boundaries concurrently.
+        
+        Downloads run on a thread pool sharing this fetcher's pooled session.
+        Cities known to be missing (city index or cached 404) are skipped without
+        a request. Saving happens on the calling thread so the boundary store's
+        SQLite connection is never shared between threads.
+        
+        Args:
+            cities: List of (city_name, state) tuples
+            max_workers: Concurrent downloads (default: PREFETCH_WORKERS)
+            skip_existing: Don't re-download boundaries that are already saved
+            
+        Returns:
+            Mapping of boundary name to status ('saved', 'cached', 'missing' or 'error')
+        """
+        max_workers = max_workers or self.PREFETCH_WORKERS
+        saved = set(self.list_saved_boundaries())
+        results = {}
+        pending = []
+        
+        for city_name, state in cities:
+            key = boundary_slug(city_name, state)
+            if skip_existing and key in saved:
+                results[key] = 'cached'
+            elif self.is_city_available(city_name, state) is False:
+                results[key] = 'missing'
+            else:
+                pending.append((key, city_name, state))
+        
+        logger.info(f"Prefetching {len(pending)} boundaries with {max_workers} workers "
+                    f"({len(results)} already resolved locally)")
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.get_city_boundary, city_name, state): (key, city_name, state)
+                for key, city_name, state in pending
+            }
+            for future in as_completed(futures):
+                key, city_name, state = futures[future]
+                try:
+                    boundary = future.result()
+                except Exception as e:
+                    logger.error(f"Error prefetching {city_name}, {state}: {e}")
+                    results[key] = 'error'
+                    continue
+                
+                if boundary:
+                    self.save_boundary(boundary, key)
+                    results[key] = 'saved'
+                elif self.is_city_available(city_name, state) is False:
+                    results[key] = 'missing'
+                else:
+                    results[key] = 'error'
+        
+        counts = {}
+        for status in results.values():
+            counts[status] = counts.get(status, 0) + 1
+        logger.info(f"Prefetch complete: {counts}")
+        return results
+
+
+def run_point_lookup(fetcher: CityBoundaryFetcher, args) -> int:
+    """Handle the --locate, --locate-file and --locate-benchmark CLI options."""
+    index = fetcher.build_boundary_index()
+    if not len(index):
+        print("❌ No saved boundaries to search")
+        return 1
+    
+    points = []
+    for value in args.locate or []:
+        lat, lon = (float(v) for v in value.split(','))
+        points.append([lat, lon])
+    if args.locate_file:
+        with open(args.locate_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    try:
+                        lat, lon = (float(v) for v in line.split(',')[:2])
+                    except ValueError:
+                        continue  # Header or malformed row
+                    points.append([lat, lon])
+    
+    if points:
+        for (lat, lon), slug in zip(points, index.locate(points)):
+            print(f"📍 {lat:.6f},{lon:.6f} -> {slug or 'no city'}")
+    
+    if args.locate_benchmark:
+        import numpy as np
+        
+        n = args.locate_benchmark
+        bounds = np.array([g.bounds for g in index.geometries])
+        rng = np.random.default_rng(0)
+        
+        # Spread points over the saved boundaries' bounding boxes so most hit a city
+        which = rng.integers(0, len(bounds), n)
+        lons = rng.uniform(bounds[which, 0], bounds[which, 2])
+        lats = rng.uniform(bounds[which, 1], bounds[which, 3])
+        
+        start = time.perf_counter()
+        result = index.locate_indices(lats, lons)
+        elapsed = time.perf_counter() - start
+        
+        print(f"⏱️ Located {n:,} points against {len(index)} cities in {elapsed:.3f}s "
+              f"({n / elapsed:,.0f} points/s)")
+        print(f"   Inside a city: {(result >= 0).sum():,} / {n:,}")
+    
+    return 0
 
 
 def main():
@@ -372,11 +922,31 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Fetch city boundary data from pre-validated GeoJSON repository')
-    parser.add_argument('city', help='City name')
-    parser.add_argument('--state', required=True, help='State name or abbreviation (required)')
+    parser.add_argument('city', nargs='?', help='City name')
+    parser.add_argument('--state', help='State name or abbreviation (required when fetching a city)')
     parser.add_argument('--country', default='United States', help='Country name (default: United States)')
     parser.add_argument('--boundary-dir', default='boundary', help='Directory to store boundary files')
     parser.add_argument('--output', help='Custom output filename (will be saved in boundary directory)')
+    parser.add_argument('--store', help='Use a single-file SQLite boundary store at this path')
+    parser.add_argument('--import-geojson', action='store_true',
+                        help='Import all boundary/*.geojson files into the store (requires --store)')
+    parser.add_argument('--export-geojson', metavar='DIR',
+                        help='Export all stored boundaries as GeoJSON files into DIR (requires --store)')
+    parser.add_argument('--prefetch', metavar='FILE',
+                        help='Prefetch boundaries for every "City, ST" line in FILE concurrently')
+    parser.add_argument('--prefetch-state', action='append', metavar='STATE',
+                        help='Prefetch every city in STATE from the repository archive (repeatable)')
+    parser.add_argument('--build-index', action='store_true',
+                        help='Build the local index of available cities from the repository archive')
+    parser.add_argument('--archive', help='Use a local copy of the repository archive instead of downloading it')
+    parser.add_argument('--list-cities', metavar='STATE', help='List available cities for STATE from the local index')
+    parser.add_argument('--workers', type=int, default=CityBoundaryFetcher.PREFETCH_WORKERS,
+                        help='Concurrent downloads for --prefetch')
+    parser.add_argument('--locate', action='append', metavar='LAT,LON',
+                        help='Report which saved city contains this point (repeatable)')
+    parser.add_argument('--locate-file', help='CSV file of lat,lon rows to assign to saved cities')
+    parser.add_argument('--locate-benchmark', type=int, metavar='N',
+                        help='Measure reverse-lookup throughput for N random points')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
     
     args = parser.parse_args()
@@ -386,8 +956,56 @@ def main():
     else:
         logging.basicConfig(level=logging.INFO)
     
+    if (args.import_geojson or args.export_geojson) and not args.store:
+        parser.error("--import-geojson and --export-geojson require --store")
+    lookup_requested = args.locate or args.locate_file or args.locate_benchmark
+    bulk_requested = args.prefetch or args.prefetch_state or args.build_index or args.list_cities
+    if not args.city and not (args.import_geojson or args.export_geojson or lookup_requested or bulk_requested):
+        parser.error("a city name is required unless importing, exporting, prefetching or locating points")
+    if args.city and not args.state:
+        parser.error("--state is required when fetching a city")
+    
     try:
-        fetcher = CityBoundaryFetcher(args.boundary_dir)
+        fetcher = CityBoundaryFetcher(args.boundary_dir, store_path=args.store)
+        
+        if args.import_geojson:
+            imported = fetcher.store.import_geojson_dir(args.boundary_dir)
+            print(f"📥 Imported {len(imported)} boundaries into {args.store}")
+        
+        if args.export_geojson:
+            exported = fetcher.store.export_geojson_dir(args.export_geojson)
+            print(f"📤 Exported {len(exported)} boundaries to {args.export_geojson}")
+        
+        if args.build_index and not args.prefetch_state:
+            index = fetcher.build_city_index(args.archive)
+            print(f"🗂️ Indexed {sum(len(v) for v in index.values()):,} cities in {len(index)} states")
+        
+        if args.prefetch_state:
+            results = fetcher.prefetch_from_archive(args.prefetch_state, args.archive)
+            saved = sum(1 for status in results.values() if status == 'saved')
+            print(f"📥 Saved {saved} of {len(results)} boundaries for {', '.join(args.prefetch_state)}")
+        
+        if args.prefetch:
+            cities = []
+            with open(args.prefetch, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip() and not line.startswith('#') and ',' in line:
+                        city_name, state = line.rsplit(',', 1)
+                        cities.append((city_name.strip(), state.strip()))
+            results = fetcher.prefetch_boundaries(cities, max_workers=args.workers)
+            for key, status in sorted(results.items()):
+                print(f"  {key}: {status}")
+        
+        if args.list_cities:
+            for city_slug in fetcher.get_available_cities(args.list_cities):
+                print(city_slug)
+        
+        if lookup_requested:
+            return run_point_lookup(fetcher, args)
+        
+        if not args.city:
+            return 0
+        
         boundary = fetcher.get_city_boundary(args.city, args.state, args.country)
         
         if boundary:
@@ -410,4 +1028,4 @@ def main():
 
 
 if __name__ == '__main__':
-    exit(main()) 
\ No newline at end of file
+    exit(main())
\ No newline at end of file
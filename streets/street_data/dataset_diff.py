@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Dataset Diffs and Patches
+=========================
+
+Compares two generated ``<city>_streets.json`` datasets and writes a compact
+patch, so clients can download only what changed between regenerations.
+
+Streets are matched by a stable identity (their full name, which is unique
+after merging) rather than by position or generated id. Each street gets a
+digest of its content, so the diff is a single linear pass over two dicts;
+only streets whose digests differ are compared field by field.
+
+A patch holds the added streets, the removed street keys and, for changed
+streets, just the fields that changed (usually coordinates and length).
+Datasets are versioned by a hash of their street digests, which ignores
+formatting and the generation time. ``publish`` keeps a snapshot of every
+version and a per-region ``manifest.json`` listing versions, patches and
+their content hashes (for CDN cache keys).
+
+Usage:
+    python dataset_diff.py data/oakland_ca_streets.json --out-dir data/patches
+    python dataset_diff.py new.json --previous old.json --out-dir data/patches
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import time
+from typing import Dict, Iterable, Optional
+
+from build_graph import digest, file_digest
+from serialization import read_json, write_json
+from street_importance import importance_order
+
+logger = logging.getLogger(__name__)
+
+PATCH_FORMAT_VERSION = 1
+
+# Per-player state, not part of the dataset content
+CLIENT_FIELDS = ('discovered', 'discovery_time')
+
+# Length of the version ids and content hashes written to manifests
+HASH_LENGTH = 16
+
+
+def street_key(street: Dict) -> str:
+    """Stable identity of a street across regenerations."""
+    return street.get('full_name') or street['id']
+
+
+def street_digest(street: Dict) -> str:
+    """Digest of a street's content (client state excluded)."""
+    return digest({k: v for k, v in street.items() if k not in CLIENT_FIELDS})[:HASH_LENGTH]
+
+
+def index_streets(dataset: Dict) -> Dict[str, Dict]:
+    """Map street key -> street; later duplicates of a key win."""
+    return {street_key(street): street for street in dataset.get('streets', [])}
+
+
+def dataset_version(digests: Iterable[str]) -> str:
+    """Version id of a dataset: hash of its sorted street digests."""
+    return digest(sorted(digests))[:HASH_LENGTH]
+
+
+def diff_datasets(old: Dict, new: Dict) -> Dict:
+    """Build a patch that turns ``old`` into ``new``.
+
+    Args:
+        old: Previous dataset (``<city>_streets.json`` content)
+        new: Regenerated dataset
+
+    Returns:
+        Patch dict with ``added`` streets, ``removed`` keys and ``changed``
+        entries holding the key and the fields that differ
+    """
+    old_streets = index_streets(old)
+    new_streets = index_streets(new)
+    old_digests = {key: street_digest(street) for key, street in old_streets.items()}
+    new_digests = {key: street_digest(street) for key, street in new_streets.items()}
+
+    added, changed = [], []
+    for key, street in new_streets.items():
+        previous_digest = old_digests.get(key)
+        if previous_digest is None:
+            added.append(street)
+        elif previous_digest != new_digests[key]:
+            previous = old_streets[key]
+            fields = {name: value for name, value in street.items()
+                      if name not in CLIENT_FIELDS and previous.get(name) != value}
+            dropped = [name for name in previous if name not in street and name not in CLIENT_FIELDS]
+            entry = {'key': key, 'fields': fields}
+            if dropped:
+                entry['dropped'] = dropped
+            changed.append(entry)
+    removed = [key for key in old_streets if key not in new_streets]
+
+    return {
+        'format': 'street-patch',
+        'version': PATCH_FORMAT_VERSION,
+        'region': new.get('region'),
+        'from': dataset_version(old_digests.values()),
+        'to': dataset_version(new_digests.values()),
+        'generated_at': new.get('generated_at'),
+        'added': added,
+        'removed': removed,
+        'changed': changed
+    }
+
+
+def apply_patch(dataset: Dict, patch: Dict) -> Dict:
+    """Apply a patch to a dataset, checking the base and result versions.
+
+    Street order follows the base dataset, with added streets appended;
+    streets with importance scores are re-sorted by importance instead.
+    Client state (discovered, discovery_time) of unchanged and changed
+    streets is preserved.
+
+    Raises:
+        ValueError: If the dataset is not the patch's base version or the
+            result does not match the target version
+    """
+    streets = index_streets(dataset)
+    if dataset_version(street_digest(s) for s in streets.values()) != patch['from']:
+        raise ValueError(f"Dataset is not version {patch['from']}")
+
+    for key in patch['removed']:
+        streets.pop(key, None)
+    for entry in patch['changed']:
+        street = dict(streets[entry['key']], **entry['fields'])
+        for name in entry.get('dropped', []):
+            street.pop(name, None)
+        streets[entry['key']] = street
+    for street in patch['added']:
+        streets[street_key(street)] = street
+
+    result = list(streets.values())
+    if result and all('importance' in s for s in result):
+        result.sort(key=importance_order)
+    if dataset_version(street_digest(s) for s in result) != patch['to']:
+        raise ValueError(f"Patched dataset does not match version {patch['to']}")
+
+    return dict(dataset, streets=result, total_streets=len(result),
+                total_miles=round(sum(s.get('length', 0) for s in result), 2),
+                generated_at=patch.get('generated_at', dataset.get('generated_at')))
+
+
+def _write_json(value: Dict, path: str, indent: bool = False):
+    write_json(value, f"{path}.tmp", indent=indent)
+    os.replace(f"{path}.tmp", path)
+
+
+def _load_json(path: str) -> Dict:
+    return read_json(path)
+
+
+def publish(dataset_path: str, out_dir: str, previous_path: Optional[str] = None) -> Dict:
+    """Record a regenerated dataset as a new version and write the patch from the previous one.
+
+    Args:
+        dataset_path: Newly generated ``<city>_streets.json``
+        out_dir: Patch directory; files go to ``<out_dir>/<region>/``
+        previous_path: Dataset to diff against (default: latest published version)
+
+    Returns:
+        The updated manifest
+    """
+    dataset = _load_json(dataset_path)
+    region = dataset.get('region') or os.path.basename(dataset_path).replace('_streets.json', '')
+    region_dir = os.path.join(out_dir, region)
+    os.makedirs(os.path.join(region_dir, 'versions'), exist_ok=True)
+
+    manifest_path = os.path.join(region_dir, 'manifest.json')
+    manifest = _load_json(manifest_path) if os.path.exists(manifest_path) else {
+        'region': region, 'latest': None, 'versions': [], 'patches': []
+    }
+
+    version = dataset_version(street_digest(s) for s in index_streets(dataset).values())
+    if not any(v['version'] == version for v in manifest['versions']):
+        snapshot = os.path.join(region_dir, 'versions', f"{version}.json")
+        shutil.copyfile(dataset_path, snapshot)
+        manifest['versions'].append({
+            'version': version,
+            'file': os.path.relpath(snapshot, region_dir),
+            'sha256': file_digest(snapshot)[:HASH_LENGTH],
+            'bytes': os.path.getsize(snapshot),
+            'streets': len(dataset.get('streets', [])),
+            'generated_at': dataset.get('generated_at')
+        })
+
+    if previous_path is None and manifest['latest'] and manifest['latest'] != version:
+        previous_path = os.path.join(region_dir, 'versions', f"{manifest['latest']}.json")
+
+    if previous_path:
+        patch = diff_datasets(_load_json(previous_path), dataset)
+        if patch['from'] != patch['to']:
+            patch_path = os.path.join(region_dir, f"{patch['from']}-{patch['to']}.json")
+            _write_json(patch, patch_path)
+            manifest['patches'] = [p for p in manifest['patches']
+                                   if (p['from'], p['to']) != (patch['from'], patch['to'])]
+            manifest['patches'].append({
+                'from': patch['from'],
+                'to': patch['to'],
+                'file': os.path.basename(patch_path),
+                'sha256': file_digest(patch_path)[:HASH_LENGTH],
+                'bytes': os.path.getsize(patch_path),
+                'added': len(patch['added']),
+                'removed': len(patch['removed']),
+                'changed': len(patch['changed'])
+            })
+            logger.info(f"Patch {patch['from']} -> {patch['to']}: {len(patch['added'])} added, "
+                        f"{len(patch['removed'])} removed, {len(patch['changed'])} changed "
+                        f"({os.path.getsize(patch_path):,} bytes vs {os.path.getsize(dataset_path):,})")
+
+    manifest['latest'] = version
+    manifest['updated_at'] = int(time.time())
+    _write_json(manifest, manifest_path, indent=True)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Diff regenerated street datasets and publish patches')
+    parser.add_argument('dataset', help='Newly generated <city>_streets.json')
+    parser.add_argument('--previous', help='Dataset to diff against (default: latest published version)')
+    parser.add_argument('--out-dir', default=os.path.join('data', 'patches'),
+                        help='Patch directory (default: data/patches)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    manifest = publish(args.dataset, args.out_dir, args.previous)
+    print(f"{manifest['region']}: latest version {manifest['latest']}, "
+          f"{len(manifest['versions'])} versions, {len(manifest['patches'])} patches")
+
+
+if __name__ == '__main__':
+    main()
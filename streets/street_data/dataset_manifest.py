@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Dataset Manifest
+================
+
+Maintains ``<output_dir>/manifest.json``, the catalog of every generated
+city. The game loads it once at startup instead of probing each region's
+file. For each city it lists:
+
+- the file per format (streets, intersections, ...) with byte size and content hash
+- bbox and an initial map view (center and zoom)
+- street count, total miles and generation time
+
+Every build updates its city's entry; the file is rewritten atomically (temp
+file + rename) under a lock, so readers never see a partial catalog and
+parallel builds do not drop each other's entries.
+
+Usage:
+    python dataset_manifest.py data/     # rebuild the manifest from existing *_streets.json files
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import glob
+import logging
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from build_graph import file_digest
+from serialization import read_json, write_json
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# Length of the content hashes (also used by clients as cache-busting keys)
+HASH_LENGTH = 16
+
+# Output files per format, relative to the output directory
+FORMAT_FILES = {
+    'json': '{name}_streets.json',
+    'intersections': '{name}_intersections.json',
+    'shards': '{name}_shards/index.json'
+}
+
+
+def initial_view(bbox: List[float]) -> Dict:
+    """Map center and zoom level that fit a [south, west, north, east] bbox."""
+    south, west, north, east = bbox
+    span = max(north - south, (east - west) * math.cos(math.radians((north + south) / 2)), 1e-6)
+    # A 256 px world tile spans 360° at zoom 0; aim for the bbox to fill ~512 px
+    zoom = max(3, min(16, math.floor(math.log2(360 / span)) + 1))
+    return {
+        'center': [round((south + north) / 2, 6), round((west + east) / 2, 6)],
+        'zoom': zoom,
+        'minZoom': max(2, zoom - 2),
+        'maxZoom': 18
+    }
+
+
+def streets_bbox(streets: List[Dict]) -> Optional[List[float]]:
+    """[south, west, north, east] of all street coordinates ([lat, lon] MultiLineStrings)."""
+    lats, lons = [], []
+    for street in streets:
+        for line in street['coordinates']:
+            for lat, lon in line:
+                lats.append(lat)
+                lons.append(lon)
+    if not lats:
+        return None
+    return [round(min(lats), 6), round(min(lons), 6), round(max(lats), 6), round(max(lons), 6)]
+
+
+def file_entry(output_dir: str, path: str) -> Dict:
+    return {
+        'file': os.path.relpath(path, output_dir).replace(os.sep, '/'),
+        'bytes': os.path.getsize(path),
+        'sha256': file_digest(path)[:HASH_LENGTH]
+    }
+
+
+def city_entry(output_dir: str, name: str, data: Optional[Dict] = None) -> Optional[Dict]:
+    """Manifest entry for one generated city (None if its streets file is missing).
+
+    Args:
+        output_dir: Directory with the generated files
+        name: Output name, e.g. ``oakland_ca``
+        data: Streets file content, if already loaded
+    """
+    files = {}
+    for fmt, pattern in FORMAT_FILES.items():
+        path = os.path.join(output_dir, pattern.format(name=name))
+        if os.path.exists(path):
+            files[fmt] = file_entry(output_dir, path)
+    if 'json' not in files:
+        return None
+
+    if data is None:
+        data = read_json(os.path.join(output_dir, files['json']['file']))
+
+    streets = data.get('streets', [])
+    first = streets[0] if streets else {}
+    bbox = streets_bbox(streets)
+    return {
+        'name': first.get('city') or name,
+        'state': first.get('state'),
+        'files': files,
+        'bbox': bbox,
+        'view': initial_view(bbox) if bbox else None,
+        'streets': len(streets),
+        'total_miles': data.get('total_miles', round(sum(s.get('length', 0) for s in streets), 2)),
+        'generated_at': data.get('generated_at')
+    }
+
+
+@contextmanager
+def _locked(path: str):
+    """Hold an exclusive lock on ``path.lock`` (no-op where fcntl is unavailable)."""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _load_manifest(path: str) -> Dict:
+    try:
+        manifest = read_json(path)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {'version': MANIFEST_VERSION, 'cities': {}}
+
+
+def _save_manifest(manifest: Dict, path: str):
+    manifest['updated_at'] = int(time.time())
+    manifest['cities'] = dict(sorted(manifest['cities'].items()))
+    write_json(manifest, f"{path}.tmp", indent=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def update_manifest(output_dir: str, name: str, data: Optional[Dict] = None) -> Dict:
+    """Add or refresh one city's entry in ``<output_dir>/manifest.json``.
+
+    A city whose streets file no longer exists is removed.
+
+    Returns:
+        The updated manifest
+    """
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    with _locked(path):
+        manifest = _load_manifest(path)
+        entry = city_entry(output_dir, name, data)
+        if entry:
+            manifest['cities'][name] = entry
+        else:
+            manifest['cities'].pop(name, None)
+        _save_manifest(manifest, path)
+    logger.info(f"Updated {path} ({len(manifest['cities'])} cities)")
+    return manifest
+
+
+def rebuild_manifest(output_dir: str) -> Dict:
+    """Rewrite the manifest from every ``*_streets.json`` in ``output_dir``."""
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    suffix = FORMAT_FILES['json'].format(name='')
+    with _locked(path):
+        manifest = {'version': MANIFEST_VERSION, 'cities': {}}
+        for streets_path in sorted(glob.glob(os.path.join(output_dir, f"*{suffix}"))):
+            name = os.path.basename(streets_path)[:-len(suffix)]
+            entry = city_entry(output_dir, name)
+            if entry:
+                manifest['cities'][name] = entry
+        _save_manifest(manifest, path)
+    return manifest
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Rebuild the generated dataset manifest')
+    parser.add_argument('output_dir', nargs='?', default='data', help='Generated data directory (default: data)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    manifest = rebuild_manifest(args.output_dir)
+    for name, entry in manifest['cities'].items():
+        print(f"  {name:<24} {entry['streets']:>6} streets  {entry['files']['json']['bytes']:>12,} bytes")
+
+
+if __name__ == '__main__':
+    main()
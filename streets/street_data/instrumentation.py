@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Pipeline Instrumentation
+========================
+
+Per-stage timing and memory measurements for the street data pipeline.
+
+Stages are timed with ``Instrumentation.stage(name)``. For every stage it
+records wall time, CPU time, peak memory and item counts (elements, streets,
+bytes). Peak memory comes from tracemalloc when memory tracing is enabled and
+from the process RSS high-water mark otherwise. Nested stages are reported
+with dotted names (``fetch.ttfb``), and a stage entered repeatedly
+accumulates into one record. Steps run in a hot loop (``parse.length``, once
+per street) are timed by the caller and added with ``add_time``, so the
+measurement does not slow the loop down.
+
+Results can be exported as JSON or in the Prometheus text format.
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import json
+import logging
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Process RSS high-water mark in bytes (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def write_profile(profiler, path: str, sort: str = 'cumulative', limit: int = 60):
+    """Save cProfile stats to ``path`` and a report sorted by ``sort`` to ``path.txt``."""
+    profiler.dump_stats(path)
+    with open(f"{path}.txt", 'w', encoding='utf-8') as f:
+        stats = pstats.Stats(profiler, stream=f)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    logger.info(f"Wrote profile to {path} (sorted by {sort}: {path}.txt)")
+
+
+@dataclass
+class StageMetrics:
+    """Measurements for one (possibly repeated) stage."""
+    name: str
+    labels: Dict[str, str] = field(default_factory=dict)
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    calls: int = 0
+    peak_memory_bytes: Optional[int] = None
+    memory_source: str = 'rss'
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+class Instrumentation:
+    """Collects stage metrics for one run."""
+
+    def __init__(self, trace_memory: bool = False, labels: Optional[Dict[str, str]] = None):
+        """Initialize the collector.
+
+        Args:
+            trace_memory: Measure peak Python heap per stage with tracemalloc
+                (slower); otherwise report the process peak RSS
+            labels: Extra labels attached to every exported metric (e.g. the city)
+        """
+        self.trace_memory = trace_memory
+        self.labels = dict(labels or {})
+        self.stages: Dict[tuple, StageMetrics] = {}
+        self._stack: List[List] = []  # [record, peak bytes seen so far]
+        self._unit_labels: Dict[str, str] = {}
+
+        self._started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def stop(self):
+        """Stop tracemalloc if this collector started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def unit(self, **labels):
+        """Label the stages recorded inside the block (e.g. ``unit='oakland_ca'`` in batch runs)."""
+        previous = self._unit_labels
+        self._unit_labels = dict(previous, **labels)
+        try:
+            yield
+        finally:
+            self._unit_labels = previous
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage; nested stages are recorded as ``parent.child``."""
+        full_name = f"{self._stack[-1][0].name}.{name}" if self._stack else name
+        key = (tuple(sorted(self._unit_labels.items())), full_name)
+        record = self.stages.get(key)
+        if record is None:
+            record = self.stages[key] = StageMetrics(full_name, dict(self._unit_labels))
+
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            if self._stack:
+                # Keep the parent's peak before resetting it for this stage
+                self._stack[-1][1] = max(self._stack[-1][1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+
+        frame = [record, 0]
+        self._stack.append(frame)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record.wall_seconds += time.perf_counter() - wall_start
+            record.cpu_seconds += time.process_time() - cpu_start
+            record.calls += 1
+            self._stack.pop()
+
+            if tracing:
+                peak = max(frame[1], tracemalloc.get_traced_memory()[1])
+                record.memory_source = 'tracemalloc'
+                record.peak_memory_bytes = max(record.peak_memory_bytes or 0, peak)
+                if self._stack:
+                    self._stack[-1][1] = max(self._stack[-1][1], peak)
+            else:
+                record.peak_memory_bytes = peak_rss_bytes()
+
+    def add_time(self, name: str, seconds: float, calls: int = 1):
+        """Add wall time measured by the caller to a sub-stage of the innermost active stage.
+
+        For steps too small and frequent for ``stage()``; CPU time and memory are not measured.
+        """
+        if not self._stack:
+            return
+        full_name = f"{self._stack[-1][0].name}.{name}"
+        key = (tuple(sorted(self._unit_labels.items())), full_name)
+        record = self.stages.get(key)
+        if record is None:
+            record = self.stages[key] = StageMetrics(full_name, dict(self._unit_labels))
+        if self.trace_memory and tracemalloc.is_tracing():
+            record.memory_source = 'tracemalloc'
+        record.wall_seconds += seconds
+        record.calls += calls
+
+    def add_count(self, key: str, value: int):
+        """Add to a count (elements, streets, bytes...) of the innermost active stage."""
+        if not self._stack:
+            return
+        counts = self._stack[-1][0].counts
+        counts[key] = counts.get(key, 0) + value
+
+    def to_dict(self) -> Dict:
+        return {
+            'labels': self.labels,
+            'generated_at': int(time.time()),
+            'stages': [asdict(record) for record in self.stages.values()]
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = 'street_pipeline') -> str:
+        """Export in the Prometheus text exposition format."""
+        def labels(record: StageMetrics, **extra) -> str:
+            values = dict(self.labels, **record.labels, stage=record.name, **extra)
+            return '{' + ','.join(f'{k}="{v}"' for k, v in sorted(values.items())) + '}'
+
+        metrics = [
+            ('stage_wall_seconds', 'Wall-clock time spent in the stage', lambda r: r.wall_seconds),
+            ('stage_cpu_seconds', 'CPU time spent in the stage', lambda r: r.cpu_seconds),
+            ('stage_calls', 'Number of times the stage ran', lambda r: r.calls),
+            ('stage_peak_memory_bytes', 'Peak memory while the stage ran', lambda r: r.peak_memory_bytes),
+        ]
+
+        lines = []
+        for suffix, help_text, getter in metrics:
+            lines.append(f"# HELP {prefix}_{suffix} {help_text}")
+            lines.append(f"# TYPE {prefix}_{suffix} gauge")
+            for record in self.stages.values():
+                value = getter(record)
+                if value is not None:
+                    lines.append(f"{prefix}_{suffix}{labels(record)} {value}")
+
+        lines.append(f"# HELP {prefix}_stage_items Items processed by the stage")
+        lines.append(f"# TYPE {prefix}_stage_items gauge")
+        for record in self.stages.values():
+            for kind, value in sorted(record.counts.items()):
+                lines.append(f"{prefix}_stage_items{labels(record, kind=kind)} {value}")
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str, fmt: Optional[str] = None):
+        """Write metrics to ``path``; the format defaults to Prometheus for ``.prom``/``.txt`` files."""
+        fmt = fmt or ('prometheus' if path.endswith(('.prom', '.txt')) else 'json')
+        text = self.to_prometheus() if fmt == 'prometheus' else self.to_json()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        logger.info(f"Wrote {fmt} stage metrics to {path}")
+
+    def summary(self) -> str:
+        """Aligned table of all stages for the console."""
+        lines = [f"  {'stage':<22} {'wall s':>8} {'cpu s':>8} {'calls':>7} {'peak MB':>9}  counts"]
+        for record in self.stages.values():
+            peak = f"{record.peak_memory_bytes / 1e6:9.1f}" if record.peak_memory_bytes else f"{'-':>9}"
+            counts = ', '.join(f"{k}={v}" for k, v in sorted(record.counts.items()))
+            unit = ' '.join(record.labels.values())
+            lines.append(f"  {record.name:<22} {record.wall_seconds:8.3f} {record.cpu_seconds:8.3f} "
+                         f"{record.calls:7d} {peak}  {counts}{f'  [{unit}]' if unit else ''}")
+        return '\n'.join(lines)
@@ -10,30 +10,36 @@ Author: Street Names Challenge Team
 License: MIT
 """
 
-import json
 import logging
 import os
+import shutil
 import sys
+import tempfile
 import time
-from dataclasses import dataclass, asdict
-from typing import List, Dict, Optional, Tuple
-import requests
-from geopy.distance import geodesic
-from city_boundary_fetcher import CityBoundaryFetcher, CityBoundary
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Iterator, List, Dict, Optional, Tuple, Union
+from city_boundary_fetcher import CityBoundaryFetcher, CityBoundary, boundary_slug
+from boundary_simplifier import BoundarySimplifier
+from overpass_planner import (OverpassQueryPlanner, QueryPlan, bbox_area_km2, overpass_header, quadrants,
+                              query_extent, query_timeout, restrict_query)
+from serialization import dumps, loads, write_json
+from instrumentation import Instrumentation, write_profile
+from street_importance import best_highway_class
 
+# requests, geopy and the numpy-based modules (overpass_store, street_intersections,
+# street_shards) are imported where they are first needed, keeping imports fast
+if TYPE_CHECKING:
+    from overpass_store import OverpassStore
+    from spill_store import SpillStore
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('osm_fetch.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger(__name__)
 
 
+class OverpassQueryTooLarge(Exception):
+    """The server cannot answer a query whole: it ran out of time or memory,
+    or the response was cut off every time. Retrying the same query won't help."""
+
+
 @dataclass
 class StreetSegment:
     """Represents a street segment with game-specific metadata.
@@ -41,6 +47,11 @@ class StreetSegment:
     The coordinates field contains MultiLineString geometry:
     - For complete streets: List[List[List[float]]] where each inner list is a LineString
     - For single segments: List[List[List[float]]] with one LineString
+    
+    way_ids lists the OSM ways the geometry came from. highway is the OSM road
+    class (the most important one for merged streets), and importance the score
+    the output is sorted by (see street_importance.py). bbox, line_bboxes and
+    label ([lat, lon] anchor) are precomputed for the map (see street_geometry.py).
     """
     id: str
     name: str
@@ -52,6 +63,12 @@ class StreetSegment:
     state: str
     discovered: bool = False
     discovery_time: Optional[int] = None
+    way_ids: List[int] = field(default_factory=list)
+    highway: Optional[str] = None
+    importance: Optional[float] = None
+    bbox: Optional[List[float]] = None  # [south, west, north, east]
+    line_bboxes: Optional[List[List[float]]] = None
+    label: Optional[List[float]] = None
 
 
 class OSMStreetFetcher:
@@ -67,6 +84,21 @@ class OSMStreetFetcher:
         }
     }
     
+    # Public Overpass API endpoint (override with overpass_url, e.g. for overpass_stub_server.py)
+    OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+    
+    # First retry waits this long; each further retry doubles it
+    RETRY_BACKOFF_SECONDS = 1.0
+    
+    # The client waits this much longer than the query's [timeout] for the response
+    TIMEOUT_MARGIN_SECONDS = 30
+    
+    # Quadrant splits allowed for a query the server can't answer whole (4^5 pieces at most)
+    MAX_SPLIT_DEPTH = 5
+    
+    # Finished quadrants of a split query, under the output directory, so a retry skips them
+    QUADRANT_DIR = os.path.join('.build', 'quadrants')
+    
     # Common street suffixes and their standardized forms
     STREET_SUFFIXES = {
         'street': 'ST',
@@ -92,21 +124,58 @@ class OSMStreetFetcher:
         'ter': 'TER'
     }
     
-    def __init__(self, output_dir: str = 'data', boundary_dir: str = 'boundary'):
-        """Initialize the fetcher with output and boundary directories."""
+    def __init__(self, output_dir: str = 'data', boundary_dir: str = 'boundary',
+                 boundary_store: Optional[str] = None, validate_boundaries: bool = True,
+                 metrics: Optional[Instrumentation] = None, overpass_url: Optional[str] = None,
+                 shard_bytes: Optional[int] = None, max_memory: Optional[int] = None):
+        """Initialize the fetcher with output and boundary directories.
+        
+        Args:
+            output_dir: Directory for generated street data files
+            boundary_dir: Directory for boundary GeoJSON files
+            boundary_store: Optional path to a SQLite boundary store (see boundary_store.py)
+            validate_boundaries: Validate (and repair) boundaries before use, caching
+                results in ``<boundary_dir>/.validation_cache``
+            metrics: Collector for per-stage timings (see instrumentation.py)
+            overpass_url: Overpass interpreter endpoint (default: the public server)
+            shard_bytes: Also write spatial shards of about this many bytes (see street_shards.py)
+            max_memory: Parse and merge out of core, within about this many bytes of
+                buffers and cache (see spill_store.py); None keeps everything in memory
+        """
         self.output_dir = output_dir
+        self.overpass_url = overpass_url or self.OVERPASS_URL
+        self.shard_bytes = shard_bytes
+        self.max_memory = max_memory
+        self.metrics = metrics or Instrumentation()
         self.boundary_dir = boundary_dir
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'StreetNamesChallenge/1.0 (Educational Game; contact@example.com)'
-        })
+        self.validate_boundaries = validate_boundaries
+        self._validation_cache = None
+        self._session = None
+        self._length_timer = [0.0, 0]  # seconds, calls of length calculations in the current parse
         
         # Initialize boundary fetcher
-        self.boundary_fetcher = CityBoundaryFetcher(boundary_dir)
+        self.boundary_fetcher = CityBoundaryFetcher(boundary_dir, store_path=boundary_store)
+        
+        # Query/filter/display resolution levels, cached next to the boundaries
+        self.simplifier = BoundarySimplifier(boundary_dir)
+        
+        # Chooses containment-safe spatial filters for Overpass queries
+        self.planner = OverpassQueryPlanner()
         
         # Create output directory if it doesn't exist
         os.makedirs(output_dir, exist_ok=True)
     
+    @property
+    def session(self):
+        """HTTP session for Overpass requests, created on first use."""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+            self._session.headers.update({
+                'User-Agent': 'StreetNamesChallenge/1.0 (Educational Game; contact@example.com)'
+            })
+        return self._session
+    
     def fetch_streets_for_region(self, region: str) -> List[StreetSegment]:
         """Fetch street data for a specific region using city boundaries."""
         if region not in self.REGIONS:
@@ -116,25 +185,29 @@ class OSMStreetFetcher:
         logger.info(f"Fetching street data for {region_info['name']}")
         
         # Try to get city boundary, fall back to bbox if not available
-        boundary = self._get_or_fetch_boundary(region_info)
+        with self.metrics.stage('boundary'):
+            boundary = self._get_or_fetch_boundary(region_info)
         
-        if boundary:
-            logger.info(f"Using city boundary polygon ({boundary.geometry['type']})")
-            query = self._build_overpass_query_with_polygon(boundary.geometry)
-        else:
-            logger.warning(f"Using fallback bounding box for {region_info['name']}")
-            bbox = region_info['bbox']
-            query = self._build_overpass_query_with_bbox(bbox)
+        with self.metrics.stage('query'):
+            if boundary:
+                logger.info(f"Using city boundary polygon ({boundary.geometry['type']})")
+                query = self._build_overpass_query_with_polygon(boundary.geometry, self._query_geometry(boundary))
+            else:
+                logger.warning(f"Using fallback bounding box for {region_info['name']}")
+                bbox = region_info['bbox']
+                query = self._build_overpass_query_with_bbox(bbox)
         
         # Fetch data from Overpass API
-        raw_data = self._fetch_from_overpass(query)
+        with self.metrics.stage('fetch'):
+            raw_data = self.fetch_overpass(query)
         
         # Process the raw data
         streets = self._process_overpass_data(raw_data, region_info, boundary)
         
         # Filter streets to only include those within the city boundary
         if boundary:
-            streets = self._filter_streets_by_boundary(streets, boundary)
+            with self.metrics.stage('filter'):
+                streets = self._filter_streets_by_boundary(streets, boundary)
             logger.info(f"Filtered to {len(streets)} streets within city boundary")
         
         logger.info(f"Processed {len(streets)} street segments")
@@ -154,14 +227,17 @@ class OSMStreetFetcher:
         logger.info(f"Fetching street data for {city_name}, {state}")
         
         # Get or fetch city boundary
-        boundary = self.boundary_fetcher.get_city_boundary(city_name, state, country)
-        
-        if not boundary:
-            logger.error(f"Could not get boundary for {city_name}, {state}")
-            return []
-        
-        # Save boundary for future use
-        self.boundary_fetcher.save_boundary(boundary)
+        with self.metrics.stage('boundary'):
+            boundary = self.boundary_fetcher.get_city_boundary(city_name, state, country)
+            
+            if not boundary:
+                logger.error(f"Could not get boundary for {city_name}, {state}")
+                return []
+            
+            # Save boundary for future use
+            self.boundary_fetcher.save_boundary(boundary)
+            
+            boundary = self._validate_boundary(boundary)
         
         # Create region info from boundary
         region_info = {
@@ -172,17 +248,20 @@ class OSMStreetFetcher:
         }
         
         logger.info(f"Using city boundary polygon ({boundary.geometry['type']})")
-        query = self._build_overpass_query_with_polygon(boundary.geometry)
+        with self.metrics.stage('query'):
+            query = self._build_overpass_query_with_polygon(boundary.geometry, self._query_geometry(boundary))
         
         # Fetch data from Overpass API
-        raw_data = self._fetch_from_overpass(query)
+        with self.metrics.stage('fetch'):
+            raw_data = self.fetch_overpass(query)
         
         # Process the raw data
         streets = self._process_overpass_data(raw_data, region_info, boundary)
         
         # Filter streets to only include those within the city boundary
         if boundary:
-            streets = self._filter_streets_by_boundary(streets, boundary)
+            with self.metrics.stage('filter'):
+                streets = self._filter_streets_by_boundary(streets, boundary)
             logger.info(f"Filtered to {len(streets)} streets within city boundary")
         
         logger.info(f"Processed {len(streets)} street segments for {boundary.name}")
@@ -194,19 +273,14 @@ class OSMStreetFetcher:
         state = region_info.get('state')
         
         # Generate expected filename
-        safe_name = city_name.lower().replace(' ', '_').replace(',', '')
-        if state:
-            safe_state = state.lower().replace(' ', '_')
-            filename = f"{safe_name}_{safe_state}"
-        else:
-            filename = safe_name
+        filename = boundary_slug(city_name, state)
         
         # Try to load existing boundary
         boundary = self.boundary_fetcher.load_boundary(filename)
         
         if boundary:
             logger.info(f"Loaded existing boundary for {city_name}")
-            return boundary
+            return self._validate_boundary(boundary)
         
         # Fetch new boundary
         logger.info(f"Fetching new boundary for {city_name}, {state}")
@@ -216,44 +290,61 @@ class OSMStreetFetcher:
             # Save for future use
             self.boundary_fetcher.save_boundary(boundary)
             logger.info(f"Saved new boundary for {city_name}")
-            return boundary
+            return self._validate_boundary(boundary)
         
         logger.warning(f"Could not fetch boundary for {city_name}, {state}")
         return None
     
-    def _build_overpass_query_with_polygon(self, geometry: Dict) -> str:
-        """Build Overpass API query using a polygon boundary."""
+    def _validate_boundary(self, boundary: CityBoundary) -> CityBoundary:
+        """Validate a boundary before use, substituting the repaired geometry if needed.
+        
+        Results are cached by a hash of the geometry, so an unchanged boundary is
+        only analysed once.
+        """
+        if not self.validate_boundaries:
+            return boundary
+        
+        from boundary_validator import ValidationCache, validate_and_repair
+        
+        if self._validation_cache is None:
+            self._validation_cache = ValidationCache(os.path.join(self.boundary_dir, '.validation_cache'))
+        
+        geometry, entry, hit = validate_and_repair(boundary.geometry, self._validation_cache)
+        status = 'valid' if entry['valid'] else f"invalid ({entry['validity_reason']})"
+        logger.info(f"Boundary validation cache {'hit' if hit else 'miss'} for {boundary.name}: "
+                    f"{status} [{entry['hash'][:12]}]")
+        
+        if entry['repaired_geometry']:
+            logger.info(f"Using {entry['repair_method']} repaired boundary for {boundary.name}")
+            boundary = replace(boundary, geometry=geometry)
+        elif not entry['valid']:
+            logger.warning(f"Could not repair boundary for {boundary.name}; using it as-is")
+        
+        return boundary
+    
+    def _query_geometry(self, boundary: CityBoundary) -> Optional[Dict]:
+        """Get the containment-safe query level of a boundary (cached alongside it)."""
+        try:
+            return self.simplifier.get_level(boundary, 'query')
+        except Exception as e:
+            logger.warning(f"Could not build query geometry for {boundary.name}: {e}")
+            return None
+    
+    def _build_overpass_query_with_polygon(self, geometry: Dict, query_geometry: Optional[Dict] = None) -> str:
+        """Build Overpass API query using a polygon boundary.
+        
+        The query planner picks the cheapest set of spatial filters that still
+        covers every part of the boundary (see overpass_planner.py); its polygon
+        clauses come from the boundary's cached query level when one is given.
+        """
         try:
-            # Convert GeoJSON geometry to Overpass polygon format
-            polygon_coords = self._geojson_to_overpass_polygon(geometry)
+            plan = self.planner.plan(geometry, query_geometry)
             
-            if not polygon_coords:
+            if not plan.clauses:
                 raise ValueError("Could not convert geometry to Overpass polygon format")
             
-            logger.info(f"Using polygon boundary for Overpass query with {len(polygon_coords.split())} coordinate pairs")
-            
-            # Include all street types that could be city streets - including primary roads like Market St
-            # Use polygon area filter instead of bounding box
-            query = f"""
-            [out:json][timeout:120];
-            (
-              // Get all city streets within the polygon area
-              // Include primary roads (like Market Street) but exclude motorways/trunks
-              way["highway"~"^(primary|secondary|tertiary|unclassified|residential|living_street)$"]
-                  ["name"]
-                  (poly:"{polygon_coords}");
-              
-              // Get associatedStreet relations which group street segments
-              relation["type"="associatedStreet"]
-                  ["name"]
-                  (poly:"{polygon_coords}");
-            );
-            
-            // Output with full geometry including member ways for relations
-            (._;>;);
-            out geom;
-            """
-            return query
+            logger.info(f"Overpass query plan: {plan.describe()}")
+            return self._build_overpass_query_from_plan(plan)
             
         except Exception as e:
             logger.error(f"Error processing geometry for Overpass polygon query: {e}")
@@ -269,7 +360,7 @@ class OSMStreetFetcher:
                 logger.info(f"Using fallback bounding box: {south:.4f},{west:.4f},{north:.4f},{east:.4f}")
                 
                 query = f"""
-                [out:json][timeout:120];
+                {overpass_header(bbox_area_km2([south, west, north, east]))}
                 (
                   way["highway"~"^(primary|secondary|tertiary|unclassified|residential|living_street)$"]
                       ["name"]
@@ -287,8 +378,8 @@ class OSMStreetFetcher:
             except Exception as e2:
                 logger.error(f"Error with fallback bounding box query: {e2}")
                 # Last resort: simple query without spatial filtering
-                query = """
-                [out:json][timeout:120];
+                query = f"""
+                {overpass_header(None)}
                 (
                   way["highway"~"^(secondary|tertiary|unclassified|residential|living_street)$"]["name"];
                   relation["type"="associatedStreet"]["name"];
@@ -298,13 +389,39 @@ class OSMStreetFetcher:
                 """
                 return query
     
+    def _build_overpass_query_from_plan(self, plan: QueryPlan) -> str:
+        """Build an Overpass API query with one way/relation statement pair per planned clause."""
+        statements = []
+        for clause in plan.clauses:
+            area = f"({clause.filter})"
+            # Include primary roads (like Market Street) but exclude motorways/trunks,
+            # plus associatedStreet relations which group street segments
+            statements.append(f"""
+              way["highway"~"^(primary|secondary|tertiary|unclassified|residential|living_street)$"]
+                  ["name"]
+                  {area};
+              relation["type"="associatedStreet"]
+                  ["name"]
+                  {area};""")
+        
+        query = f"""
+            {overpass_header(plan.area_km2)}
+            ({''.join(statements)}
+            );
+            
+            // Output with full geometry including member ways for relations
+            (._;>;);
+            out geom;
+            """
+        return query
+    
     def _build_overpass_query_with_bbox(self, bbox: List[float]) -> str:
         """Build Overpass API query using bounding box (fallback method)."""
         south, west, north, east = bbox
         
         # Include all street types that could be city streets - including primary roads
         query = f"""
-        [out:json][timeout:120];
+        {overpass_header(bbox_area_km2(bbox))}
         (
           // Get all city streets including primary roads like Market Street
           way["highway"~"^(primary|secondary|tertiary|unclassified|residential|living_street)$"]
@@ -323,65 +440,6 @@ class OSMStreetFetcher:
         """
         return query
     
-    def _geojson_to_overpass_polygon(self, geometry: Dict) -> str:
-        """Convert GeoJSON geometry to Overpass polygon format.
-        
-        Overpass polygon format expects: "lat1 lon1 lat2 lon2 lat3 lon3 ..."
-        Note: For very complex polygons with many coordinates, we may need to simplify.
-        """
-        coords_list = []
-        
-        try:
-            if geometry['type'] == 'Polygon':
-                # Use outer ring only for simplicity
-                coords = geometry['coordinates'][0]
-                # GeoJSON uses [lon, lat] but Overpass expects lat lon
-                for lon, lat in coords:
-                    coords_list.append(f"{lat}")
-                    coords_list.append(f"{lon}")
-            
-            elif geometry['type'] == 'MultiPolygon':
-                # Use the largest polygon (by number of coordinates) as the primary boundary
-                largest_polygon = max(geometry['coordinates'], key=lambda p: len(p[0]))
-                coords = largest_polygon[0]  # outer ring of largest polygon
-                # GeoJSON uses [lon, lat] but Overpass expects lat lon
-                for lon, lat in coords:
-                    coords_list.append(f"{lat}")
-                    coords_list.append(f"{lon}")
-            
-            else:
-                logger.warning(f"Unsupported geometry type for polygon query: {geometry['type']}")
-                return ""
-            
-            # Overpass has limits on polygon complexity
-            # If we have too many coordinates, simplify by taking every Nth point
-            # Note: coords_list has alternating lat/lon values, so we need pairs
-            max_coords = 400  # Conservative limit to avoid Overpass timeouts (200 coordinate pairs)
-            if len(coords_list) > max_coords:
-                # Keep coordinate pairs together by working with pairs
-                original_pairs = len(coords_list) // 2
-                target_pairs = max_coords // 2
-                step = max(1, original_pairs // target_pairs)
-                
-                # Extract every step-th coordinate pair
-                simplified_coords = []
-                for i in range(0, len(coords_list), 2):  # Step through pairs
-                    pair_index = i // 2
-                    if pair_index % step == 0:
-                        simplified_coords.append(coords_list[i])      # lat
-                        simplified_coords.append(coords_list[i + 1])  # lon
-                
-                coords_list = simplified_coords
-                logger.info(f"Simplified polygon from {original_pairs} to {len(coords_list)//2} coordinate pairs")
-            
-            result = " ".join(coords_list)
-            logger.debug(f"Generated polygon string with {len(coords_list)//2} coordinate pairs")
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error converting GeoJSON to Overpass polygon: {e}")
-            return ""
-    
     def _filter_streets_by_boundary(self, streets: List[StreetSegment], boundary: CityBoundary) -> List[StreetSegment]:
         """Filter streets to only include those within or significantly intersecting the city boundary."""
         from shapely.geometry import shape, Point, LineString
@@ -438,6 +496,7 @@ class OSMStreetFetcher:
                     filtered_streets.append(street)
             
             logger.info(f"Filtered {len(streets)} streets to {len(filtered_streets)} within boundary")
+            self.metrics.add_count('streets', len(filtered_streets))
             return filtered_streets
             
         except Exception as e:
@@ -445,25 +504,143 @@ class OSMStreetFetcher:
             logger.warning("Returning all streets without boundary filtering")
             return streets
     
+    def fetch_overpass(self, query: str) -> Dict:
+        """Fetch a query, splitting its area into quadrants when it is too large.
+        
+        When the server can't answer the query whole (see OverpassQueryTooLarge),
+        the extent of its spatial filters is cut into four quadrants and each
+        quadrant is fetched, recursively, up to MAX_SPLIT_DEPTH times. The piece
+        results are merged into one response.
+        
+        Each finished quadrant is checkpointed under ``QUADRANT_DIR`` (one
+        directory per query), so when a split fetch fails part-way, fetching the
+        same query again only requests the quadrants still missing. The
+        directory is removed once the whole query has been fetched.
+        """
+        try:
+            return self._fetch_from_overpass(query)
+        except OverpassQueryTooLarge as e:
+            extent = query_extent(query)
+            if extent is None:
+                raise
+            logger.warning(f"Query too large ({e}); splitting it into quadrants")
+            from build_graph import digest
+            tile_dir = os.path.join(self.output_dir, self.QUADRANT_DIR, digest(query)[:16])
+            data = self._fetch_quadrants(query, extent, 1, tile_dir)
+            shutil.rmtree(tile_dir, ignore_errors=True)
+            return data
+    
+    def _fetch_quadrants(self, query: str, bbox: List[float], depth: int, tile_dir: str, key: str = '') -> Dict:
+        """Fetch ``query`` restricted to each quadrant of ``bbox`` and merge the results.
+        
+        Quadrants are named by quadkey (``key`` plus 0 SW, 1 SE, 2 NW, 3 NE). Their
+        progress is kept in a BatchCheckpoint per split and each finished quadrant
+        in ``<tile_dir>/<quadkey>.overpass.npz``; finished quadrants are loaded
+        instead of fetched, and quadrants already found too large are split at once.
+        """
+        from checkpoint import BatchCheckpoint
+        from overpass_store import load_overpass_store, save_overpass_store
+        
+        self.metrics.add_count('splits', 1)
+        pieces = {key + str(digit): piece for digit, piece in enumerate(quadrants(bbox))}
+        checkpoint = BatchCheckpoint(os.path.join(tile_dir, f"split_{key or 'root'}.json"), pieces, resume=True)
+        responses = []
+        for unit, piece in pieces.items():
+            path = os.path.join(tile_dir, f"{unit}.overpass.npz")
+            if checkpoint.status(unit) == 'done' and os.path.exists(path):
+                logger.info(f"Quadrant {unit} already fetched; loading it")
+                self.metrics.add_count('quadrants_resumed', 1)
+                responses.append(load_overpass_store(path).to_overpass())
+                continue
+            
+            if checkpoint.status(unit) == 'split':
+                response = self._fetch_quadrants(query, piece, depth + 1, tile_dir, unit)
+            else:
+                try:
+                    response = self._fetch_from_overpass(restrict_query(query, piece))
+                except OverpassQueryTooLarge as e:
+                    if depth >= self.MAX_SPLIT_DEPTH:
+                        checkpoint.mark(unit, 'failed', error=str(e))
+                        raise
+                    logger.warning(f"Quadrant {[round(v, 5) for v in piece]} too large ({e}); splitting it further")
+                    checkpoint.mark(unit, 'split', bbox=piece)
+                    response = self._fetch_quadrants(query, piece, depth + 1, tile_dir, unit)
+            
+            save_overpass_store(response, path)
+            checkpoint.mark(unit, 'done', bbox=piece, elements=len(response.get('elements', [])))
+            responses.append(response)
+        return self._merge_overpass_responses(responses)
+    
+    @staticmethod
+    def _merge_overpass_responses(responses: List[Dict]) -> Dict:
+        """One response with the elements of all ``responses``, each (type, id) once.
+        
+        Elements on quadrant edges come back from several pieces; the first copy is kept,
+        as is the metadata (version, osm3s...) of the first response.
+        """
+        merged = {key: value for key, value in responses[0].items() if key != 'elements'}
+        seen = set()
+        elements = []
+        for response in responses:
+            for el in response.get('elements', []):
+                key = (el.get('type'), el.get('id'))
+                if key not in seen:
+                    seen.add(key)
+                    elements.append(el)
+        merged['elements'] = elements
+        return merged
+    
     def _fetch_from_overpass(self, query: str, max_retries: int = 3) -> Dict:
-        """Fetch data from Overpass API with retry logic."""
-        url = "https://overpass-api.de/api/interpreter"
+        """Fetch data from Overpass API with retry logic.
         
+        Rate limits (429), overload (504) and connection errors are retried with
+        backoff. Failures that would repeat raise OverpassQueryTooLarge at once:
+        a "runtime error" remark (the server ran out of time or memory and sent
+        what it had), a response slower than the query's [timeout], or a body
+        cut off on two attempts in a row.
+        """
+        import requests
+        
+        timeout = query_timeout(query) + self.TIMEOUT_MARGIN_SECONDS
+        truncated = 0
         for attempt in range(max_retries):
             try:
                 logger.info(f"Fetching data from Overpass API (attempt {attempt + 1}/{max_retries})")
                 
-                response = self.session.post(url, data=query, timeout=120)
-                response.raise_for_status()
+                # Headers arrive first (time to first byte), then the body is downloaded
+                with self.metrics.stage('ttfb'):
+                    response = self.session.post(self.overpass_url, data=query, timeout=timeout, stream=True)
+                    response.raise_for_status()
+                
+                with self.metrics.stage('download'):
+                    content = response.content
+                self.metrics.add_count('bytes', len(content))
+                
+                with self.metrics.stage('json_decode'):
+                    data = loads(content)
                 
-                data = response.json()
+                remark = data.get('remark', '')
+                if 'runtime error' in remark:
+                    raise OverpassQueryTooLarge(remark)
+                
+                self.metrics.add_count('elements', len(data.get('elements', [])))
                 logger.info(f"Successfully fetched {len(data.get('elements', []))} elements")
                 return data
                 
-            except requests.exceptions.RequestException as e:
+            except requests.exceptions.ReadTimeout as e:
+                raise OverpassQueryTooLarge(f"no response within {timeout}s") from e
+                
+            except (requests.exceptions.RequestException, ValueError) as e:
                 logger.warning(f"Attempt {attempt + 1} failed: {e}")
+                # A body cut off mid-download (or undecodable) once may be the network; twice is the query
+                if isinstance(e, (requests.exceptions.ChunkedEncodingError, ValueError)):
+                    truncated += 1
+                    if truncated >= 2:
+                        raise OverpassQueryTooLarge(f"response cut off on {truncated} attempts") from e
+                else:
+                    truncated = 0
                 if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
+                    wait_time = self.RETRY_BACKOFF_SECONDS * 2 ** attempt
                     logger.info(f"Waiting {wait_time} seconds before retry...")
                     time.sleep(wait_time)
                 else:
@@ -471,151 +648,266 @@ class OSMStreetFetcher:
         
         raise Exception("Failed to fetch data after all retries")
     
-    def _process_overpass_data(self, data: Dict, region_info: Dict, boundary: Optional[CityBoundary] = None) -> List[StreetSegment]:
-        """Process raw Overpass API data into StreetSegment objects with MultiLineString geometry."""
+    def _process_overpass_data(self, data: Union[Dict, 'OverpassStore'], region_info: Dict, boundary: Optional[CityBoundary] = None) -> List[StreetSegment]:
+        """Process raw Overpass API data into StreetSegment objects with MultiLineString geometry.
+        
+        With a ``max_memory`` budget, parsing and merging go through a spill store
+        in a scratch directory under ``output_dir`` (see spill_store.py).
+        """
+        if self.max_memory:
+            with tempfile.TemporaryDirectory(prefix='.spill-', dir=self.output_dir) as tmp:
+                with self.metrics.stage('parse'):
+                    store = self._parse_overpass_data_spilled(data, region_info, os.path.join(tmp, 'parse.sqlite'))
+                try:
+                    with self.metrics.stage('merge'):
+                        return self._merge_spilled_streets(store)
+                finally:
+                    store.close()
+        
+        with self.metrics.stage('parse'):
+            streets = self._parse_overpass_data(data, region_info)
+        with self.metrics.stage('merge'):
+            return self._deduplicate_and_merge_streets(streets)
+    
+    @staticmethod
+    def _iter_overpass_records(data: Union[Dict, 'OverpassStore']) -> Tuple[Iterator[Tuple[int, Tuple[Dict, List]]], Iterator[Tuple[int, Dict, List[int]]]]:
+        """Streams of ways ((id, (tags, [[lat, lon], ...])), with geometry only) and relations
+        ((id, tags, member way ids)) of a decoded response or an OverpassStore."""
+        if not isinstance(data, dict):
+            return data.iter_way_records(), data.iter_relation_records()
+        
+        elements = data.get('elements', [])
+        ways = ((el['id'], (el.get('tags', {}), [[node['lat'], node['lon']] for node in el['geometry']]))
+                for el in elements if el.get('type') == 'way' and 'geometry' in el)
+        relations = ((el['id'], el.get('tags', {}),
+                      [m.get('ref') for m in el.get('members', []) if m.get('type') == 'way'])
+                     for el in elements if el.get('type') == 'relation')
+        return ways, relations
+    
+    @staticmethod
+    def _overpass_records(data: Union[Dict, 'OverpassStore']) -> Tuple[Dict[int, Tuple[Dict, List]], List[Tuple[int, Dict, List[int]]]]:
+        """Ways (id -> (tags, [[lat, lon], ...]), with geometry only) and relations
+        ((id, tags, member way ids)) of a decoded response or an OverpassStore."""
+        if not isinstance(data, dict):
+            return data.way_records(), data.relation_records()
+        ways, relations = OSMStreetFetcher._iter_overpass_records(data)
+        return dict(ways), list(relations)
+    
+    def _street_name(self, tags: Dict) -> Optional[Tuple[str, str]]:
+        """(base name, suffix) of a way or relation, or None if it is not a city street."""
+        name = tags.get('name', '').strip()
+        
+        if not name or len(name) < 2:
+            return None
+        
+        # Skip highways, freeways, and other non-street roads by name
+        if self._is_highway_or_freeway(name):
+            logger.debug(f"Skipping highway/freeway: {name}")
+            return None
+        
+        # Parse street name and suffix
+        parsed_name, suffix = self._parse_street_name(name)
+        
+        if not parsed_name:
+            return None
+        return parsed_name, suffix
+    
+    def _relation_street(self, relation_id: int, tags: Dict, street_name: Tuple[str, str],
+                         member_ways: List[Tuple[int, Dict, List]], region_info: Dict) -> Optional[StreetSegment]:
+        """Street for an associatedStreet relation from its member ways ((id, tags, coords)), or None."""
+        parsed_name, suffix = street_name
+        if not member_ways:
+            return None
+        
+        # Convert to MultiLineString coordinates
+        multilinestring_coords = []
+        way_ids = []
+        highway_classes = [tags.get('highway')]
+        total_length = 0.0
+        
+        for way_id, way_tags, line_coords in member_ways:
+            if len(line_coords) >= 2:
+                multilinestring_coords.append(line_coords)
+                way_ids.append(way_id)
+                highway_classes.append(way_tags.get('highway'))
+                total_length += self._timed_length(line_coords)
+        
+        if not multilinestring_coords or total_length < 0.01:
+            return None
+        
+        # Skip very long routes (likely bus routes or highways that span multiple cities)
+        if total_length > 50:  # Skip routes longer than 50 miles
+            logger.debug(f"Skipping long route: {tags.get('name')} ({total_length:.2f} miles)")
+            return None
+        
+        # Create street segment with MultiLineString geometry
+        street_id = f"{region_info['city'].lower().replace(' ', '_')}_rel_{relation_id}"
+        
+        return StreetSegment(
+            id=street_id,
+            name=parsed_name,
+            suffix=suffix,
+            full_name=f"{parsed_name} {suffix}".strip() if suffix else parsed_name,
+            coordinates=multilinestring_coords,  # This is now a MultiLineString
+            length=round(total_length, 2),
+            city=region_info['city'],
+            state=region_info['state'],
+            way_ids=way_ids,
+            highway=best_highway_class(highway_classes)
+        )
+    
+    def _way_street(self, way_id: int, tags: Dict, street_name: Tuple[str, str],
+                    coordinates: List[List[float]], region_info: Dict) -> Optional[StreetSegment]:
+        """Street for a way that is not part of a relation, or None."""
+        parsed_name, suffix = street_name
+        
+        # Coordinates form a single LineString in MultiLineString format
+        if len(coordinates) < 2:
+            return None
+        
+        # Calculate length in miles
+        length = self._timed_length(coordinates)
+        
+        if length < 0.01:  # Skip very short segments (less than ~50 feet)
+            return None
+        
+        # Skip very long routes (likely bus routes or highways that span multiple cities)
+        if length > 50:  # Skip routes longer than 50 miles
+            logger.debug(f"Skipping long route: {tags.get('name')} ({length:.2f} miles)")
+            return None
+        
+        # Create street segment with MultiLineString geometry (single line)
+        street_id = f"{region_info['city'].lower().replace(' ', '_')}_way_{way_id}"
+        
+        return StreetSegment(
+            id=street_id,
+            name=parsed_name,
+            suffix=suffix,
+            full_name=f"{parsed_name} {suffix}".strip() if suffix else parsed_name,
+            coordinates=[coordinates],  # Wrap single line in array for MultiLineString format
+            length=round(length, 2),
+            city=region_info['city'],
+            state=region_info['state'],
+            way_ids=[way_id],
+            highway=tags.get('highway')
+        )
+    
+    def _parse_overpass_data(self, data: Union[Dict, 'OverpassStore'], region_info: Dict) -> List[StreetSegment]:
+        """Parse raw Overpass API data into (not yet merged) StreetSegment objects.
+        
+        Args:
+            data: Decoded Overpass response, or an OverpassStore (see overpass_store.py)
+            region_info: City and state the streets belong to
+        """
         streets = []
         processed_names = set()
-        elements = data.get('elements', [])
+        n_elements = len(data.get('elements', [])) if isinstance(data, dict) else len(data)
+        self._length_timer = [0.0, 0]
         
-        # Create lookup for nodes and ways
-        nodes = {el['id']: el for el in elements if el.get('type') == 'node'}
-        ways = {el['id']: el for el in elements if el.get('type') == 'way'}
-        relations = [el for el in elements if el.get('type') == 'relation']
+        # Create lookup for ways
+        ways, relations = self._overpass_records(data)
         
         # Process relations first (complete streets)
         processed_way_ids = set()
         
-        for relation in relations:
-            tags = relation.get('tags', {})
-            name = tags.get('name', '').strip()
-            
-            if not name or len(name) < 2:
-                continue
-            
-            # Skip highways, freeways, and other non-street roads by name
-            if self._is_highway_or_freeway(name):
-                logger.debug(f"Skipping highway/freeway: {name}")
-                continue
-                
-            # Parse street name and suffix
-            parsed_name, suffix = self._parse_street_name(name)
-            
-            if not parsed_name:
+        for relation_id, tags, member_refs in relations:
+            street_name = self._street_name(tags)
+            if not street_name:
                 continue
             
             # Get member ways and build MultiLineString
-            member_ways = []
-            for member in relation.get('members', []):
-                if member.get('type') == 'way' and member.get('ref') in ways:
-                    way = ways[member['ref']]
-                    if 'geometry' in way:
-                        member_ways.append(way)
-                        processed_way_ids.add(way['id'])
-            
-            if not member_ways:
-                continue
-            
-            # Convert to MultiLineString coordinates
-            multilinestring_coords = []
-            total_length = 0.0
-            
-            for way in member_ways:
-                line_coords = []
-                for node in way['geometry']:
-                    line_coords.append([node['lat'], node['lon']])
-                
-                if len(line_coords) >= 2:
-                    multilinestring_coords.append(line_coords)
-                    total_length += self._calculate_length(line_coords)
+            member_ways = [(ref, *ways[ref]) for ref in member_refs if ref in ways]
+            processed_way_ids.update(ref for ref, _, _ in member_ways)
             
-            if not multilinestring_coords or total_length < 0.01:
-                continue
-            
-            # Skip very long routes (likely bus routes or highways that span multiple cities)
-            if total_length > 50:  # Skip routes longer than 50 miles
-                logger.debug(f"Skipping long route: {name} ({total_length:.2f} miles)")
-                continue
-            
-            # Create street segment with MultiLineString geometry
-            street_id = f"{region_info['city'].lower().replace(' ', '_')}_rel_{relation['id']}"
-            
-            street = StreetSegment(
-                id=street_id,
-                name=parsed_name,
-                suffix=suffix,
-                full_name=f"{parsed_name} {suffix}".strip() if suffix else parsed_name,
-                coordinates=multilinestring_coords,  # This is now a MultiLineString
-                length=round(total_length, 2),
-                city=region_info['city'],
-                state=region_info['state']
-            )
-            
-            streets.append(street)
-            processed_names.add(parsed_name)
+            street = self._relation_street(relation_id, tags, street_name, member_ways, region_info)
+            if street:
+                streets.append(street)
+                processed_names.add(street.name)
         
         # Process individual ways that weren't part of relations
-        for way in ways.values():
-            if way['id'] in processed_way_ids or 'geometry' not in way:
-                continue
-                
-            tags = way.get('tags', {})
-            name = tags.get('name', '').strip()
-            
-            if not name or len(name) < 2:
-                continue
-            
-            # Skip highways, freeways, and other non-street roads by name
-            if self._is_highway_or_freeway(name):
-                logger.debug(f"Skipping highway/freeway: {name}")
-                continue
-            
-            # Parse street name and suffix
-            parsed_name, suffix = self._parse_street_name(name)
-            
-            if not parsed_name:
-                continue
-            
-            # Extract coordinates as single LineString in MultiLineString format
-            coordinates = []
-            for node in way['geometry']:
-                coordinates.append([node['lat'], node['lon']])
-            
-            if len(coordinates) < 2:
-                continue
-            
-            # Calculate length in miles
-            length = self._calculate_length(coordinates)
-            
-            if length < 0.01:  # Skip very short segments (less than ~50 feet)
+        for way_id, (tags, coordinates) in ways.items():
+            if way_id in processed_way_ids:
                 continue
             
-            # Skip very long routes (likely bus routes or highways that span multiple cities)
-            if length > 50:  # Skip routes longer than 50 miles
-                logger.debug(f"Skipping long route: {name} ({length:.2f} miles)")
+            street_name = self._street_name(tags)
+            if not street_name:
                 continue
             
-            # Create street segment with MultiLineString geometry (single line)
-            street_id = f"{region_info['city'].lower().replace(' ', '_')}_way_{way['id']}"
-            
-            street = StreetSegment(
-                id=street_id,
-                name=parsed_name,
-                suffix=suffix,
-                full_name=f"{parsed_name} {suffix}".strip() if suffix else parsed_name,
-                coordinates=[coordinates],  # Wrap single line in array for MultiLineString format
-                length=round(length, 2),
-                city=region_info['city'],
-                state=region_info['state']
-            )
-            
-            streets.append(street)
-            processed_names.add(parsed_name)
+            street = self._way_street(way_id, tags, street_name, coordinates, region_info)
+            if street:
+                streets.append(street)
+                processed_names.add(street.name)
         
         logger.info(f"Found {len(processed_names)} unique street names")
         logger.info(f"Processed {len([s for s in streets if len(s.coordinates) > 1])} MultiLineString streets")
         logger.info(f"Processed {len([s for s in streets if len(s.coordinates) == 1])} single LineString streets")
         
-        return self._deduplicate_and_merge_streets(streets)
+        self.metrics.add_time('length', *self._length_timer)
+        self.metrics.add_count('elements', n_elements)
+        self.metrics.add_count('streets', len(streets))
+        return streets
+    
+    def _parse_overpass_data_spilled(self, data: Union[Dict, 'OverpassStore'], region_info: Dict,
+                                     path: str) -> 'SpillStore':
+        """Parse like _parse_overpass_data, keeping ways, relations and streets in a spill store.
+        
+        Only one relation (with its member ways) or way is held as Python objects
+        at a time; the ways of an OverpassStore are read in batches.
+        
+        Args:
+            data: Decoded Overpass response, or an OverpassStore (see overpass_store.py)
+            region_info: City and state the streets belong to
+            path: Where the finished spill store is written
+        
+        Returns:
+            The finished SpillStore, open for reading
+        """
+        from spill_store import SpillStore
+        
+        store = SpillStore.create(path, self.max_memory)
+        n_elements = len(data.get('elements', [])) if isinstance(data, dict) else len(data)
+        self._length_timer = [0.0, 0]
+        
+        ways, relations = self._iter_overpass_records(data)
+        for way_id, (tags, coordinates) in ways:
+            store.add_way(way_id, tags, coordinates)
+        for relation_id, tags, member_refs in relations:
+            store.add_relation(relation_id, tags, member_refs)
+        
+        # Process relations first (complete streets)
+        for relation_id, tags, member_refs in store.relations():
+            street_name = self._street_name(tags)
+            if not street_name:
+                continue
+            
+            found = store.ways(member_refs)
+            member_ways = [(ref, *found[ref]) for ref in member_refs if ref in found]
+            store.mark_used(ref for ref, _, _ in member_ways)
+            
+            street = self._relation_street(relation_id, tags, street_name, member_ways, region_info)
+            if street:
+                store.add_street(street)
+        
+        # Process individual ways that weren't part of relations
+        for way_id, tags, coordinates in store.unused_ways():
+            street_name = self._street_name(tags)
+            if not street_name:
+                continue
+            
+            street = self._way_street(way_id, tags, street_name, coordinates, region_info)
+            if street:
+                store.add_street(street)
+        
+        store.finish()
+        counts = store.street_counts()
+        logger.info(f"Found {counts['names']} unique street names")
+        logger.info(f"Processed {counts['multi']} MultiLineString streets")
+        logger.info(f"Processed {counts['streets'] - counts['multi']} single LineString streets")
+        
+        self.metrics.add_time('length', *self._length_timer)
+        self.metrics.add_count('elements', n_elements)
+        self.metrics.add_count('streets', counts['streets'])
+        return store
     
     def _is_highway_or_freeway(self, name: str) -> bool:
         """Check if a street name indicates a highway, freeway, or other non-city street."""
@@ -727,8 +1019,22 @@ class OSMStreetFetcher:
         
         return total_distance
     
+    def _timed_length(self, coordinates) -> float:
+        """_calculate_length, adding its time to the parse's ``length`` total.
+        
+        Called once per way or relation, so it only reads the clock; the total is
+        recorded once per parse (see Instrumentation.add_time).
+        """
+        start = time.perf_counter()
+        length = self._calculate_length(coordinates)
+        self._length_timer[0] += time.perf_counter() - start
+        self._length_timer[1] += 1
+        return length
+    
     def _calculate_linestring_length(self, coordinates: List[List[float]]) -> float:
         """Calculate the length of a single LineString in miles."""
+        from geopy.distance import geodesic
+        
         total_distance = 0.0
         
         for i in range(len(coordinates) - 1):
@@ -751,12 +1057,17 @@ class OSMStreetFetcher:
         merged_streets = []
         for name, segments in name_groups.items():
             if len(segments) == 1:
-                merged_streets.append(segments[0])
+                merged_streets.append(self._deduplicate_geometry(segments[0]))
             else:
                 # Merge segments with the same name
                 merged = self._merge_street_segments(segments)
                 merged_streets.extend(merged)
         
+        removed = sum(len(s.coordinates) for s in streets) - sum(len(s.coordinates) for s in merged_streets)
+        if removed:
+            logger.info(f"Removed {removed} duplicate LineStrings while merging")
+        
+        self.metrics.add_count('streets', len(merged_streets))
         return sorted(merged_streets, key=lambda s: s.name)
     
     def _merge_street_segments(self, segments: List[StreetSegment]) -> List[StreetSegment]:
@@ -769,56 +1080,140 @@ class OSMStreetFetcher:
                 suffix_groups[key] = []
             suffix_groups[key].append(segment)
         
-        merged = []
-        for key, group in suffix_groups.items():
-            if len(group) == 1:
-                merged.append(group[0])
-            else:
-                # Combine segments with same name and suffix
-                base_segment = group[0]
-                total_length = sum(s.length for s in group)
-                
-                # Combine all MultiLineString coordinates
-                combined_coordinates = []
-                for segment in group:
-                    # Each segment now has MultiLineString format coordinates
-                    combined_coordinates.extend(segment.coordinates)
-                
-                merged_segment = StreetSegment(
-                    id=base_segment.id,
-                    name=base_segment.name,
-                    suffix=base_segment.suffix,
-                    full_name=base_segment.full_name,
-                    coordinates=combined_coordinates,  # Combined MultiLineString
-                    length=round(total_length, 2),
-                    city=base_segment.city,
-                    state=base_segment.state
-                )
-                merged.append(merged_segment)
+        return [self._merge_suffix_group(group) for group in suffix_groups.values()]
+    
+    def _merge_suffix_group(self, group: List[StreetSegment]) -> StreetSegment:
+        """Combine segments with the same name and suffix into one street."""
+        if len(group) == 1:
+            return self._deduplicate_geometry(group[0])
+        
+        base_segment = group[0]
+        
+        # Combine all MultiLineString coordinates
+        combined_coordinates = []
+        for segment in group:
+            # Each segment now has MultiLineString format coordinates
+            combined_coordinates.extend(segment.coordinates)
+        
+        merged_segment = StreetSegment(
+            id=base_segment.id,
+            name=base_segment.name,
+            suffix=base_segment.suffix,
+            full_name=base_segment.full_name,
+            coordinates=combined_coordinates,  # Combined MultiLineString
+            length=0.0,  # Measured on the unique lines by _deduplicate_geometry
+            city=base_segment.city,
+            state=base_segment.state,
+            way_ids=[way_id for segment in group for way_id in segment.way_ids],
+            highway=best_highway_class(segment.highway for segment in group)
+        )
+        return self._deduplicate_geometry(merged_segment, recompute_length=True)
+    
+    def _merge_spilled_streets(self, store: 'SpillStore') -> List[StreetSegment]:
+        """Merge the streets of a spill store like _deduplicate_and_merge_streets.
         
-        return merged
+        The store returns the streets sorted by name (an external sort), one
+        (name, suffix) group at a time, so only one group is held unmerged.
+        """
+        merged_streets = [self._merge_suffix_group(group) for group in store.street_groups(StreetSegment)]
+        
+        removed = store.street_counts()['lines'] - sum(len(s.coordinates) for s in merged_streets)
+        if removed:
+            logger.info(f"Removed {removed} duplicate LineStrings while merging")
+        
+        self.metrics.add_count('streets', len(merged_streets))
+        return merged_streets
+    
+    @staticmethod
+    def _line_key(line: List[List[float]]) -> tuple:
+        """Direction-independent key of a LineString: a line and its reverse share a key."""
+        forward = tuple(map(tuple, line))
+        return min(forward, forward[::-1])
+    
+    def _deduplicate_geometry(self, segment: StreetSegment, recompute_length: bool = False) -> StreetSegment:
+        """Drop repeated LineStrings (exact or reversed) and duplicate way ids.
+        
+        Overlapping associatedStreet relations or repeated tiles can contribute
+        the same way twice; the length is then recomputed from the unique lines,
+        as it always is with ``recompute_length`` (merged streets, so their length
+        is rounded once instead of summing rounded segment lengths).
+        """
+        seen = set()
+        unique = []
+        for line in segment.coordinates:
+            key = self._line_key(line)
+            if key not in seen:
+                seen.add(key)
+                unique.append(line)
+        
+        way_ids = list(dict.fromkeys(segment.way_ids))
+        if len(unique) == len(segment.coordinates) and not recompute_length:
+            return segment if way_ids == segment.way_ids else replace(segment, way_ids=way_ids)
+        
+        if len(unique) < len(segment.coordinates):
+            logger.debug(f"Removed {len(segment.coordinates) - len(unique)} duplicate lines from {segment.full_name}")
+        return replace(segment, coordinates=unique, way_ids=way_ids,
+                       length=round(self._calculate_length(unique), 2))
     
     def save_streets_data(self, streets: List[StreetSegment], region: str) -> str:
-        """Save streets data to JSON file."""
+        """Save streets data to JSON file.
+        
+        With ``shard_bytes`` set, the streets are also written as spatial shards to
+        ``<region>_shards/`` (see street_shards.py); otherwise stale shards are removed.
+        """
         # Convert to dictionaries
         streets_data = {
             "region": region,
             "generated_at": int(time.time()),
             "total_streets": len(streets),
             "total_miles": round(sum(s.length for s in streets), 2),
-            "streets": [asdict(street) for street in streets]
+            "streets": streets
         }
         
         # Save to file
         filename = f"{region}_streets.json"
         filepath = os.path.join(self.output_dir, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(streets_data, f, indent=2, ensure_ascii=False)
+        write_json(streets_data, filepath, indent=True)
         
+        self.metrics.add_count('streets', len(streets))
+        self.metrics.add_count('bytes', os.path.getsize(filepath))
         logger.info(f"Saved {len(streets)} streets to {filepath}")
         logger.info(f"Total miles: {streets_data['total_miles']}")
         
+        shard_dir = os.path.join(self.output_dir, f"{region}_shards")
+        if self.shard_bytes:
+            from street_shards import write_shards
+            records = [dumps(street).decode('utf-8') for street in streets]
+            write_shards(streets, records, region, self.output_dir, self.shard_bytes,
+                         generated_at=streets_data['generated_at'])
+        elif os.path.isdir(shard_dir):
+            shutil.rmtree(shard_dir)
+        
+        return filepath
+    
+    def compute_intersections(self, streets: List[StreetSegment],
+                              data: Optional[Union[Dict, 'OverpassStore']] = None) -> Dict:
+        """Find which streets cross each other (see street_intersections.py).
+        
+        Args:
+            streets: Final street list
+            data: Raw Overpass response, used to match streets by shared node ids
+        """
+        from street_intersections import compute_intersections
+        
+        index = compute_intersections(streets, data)
+        self.metrics.add_count('intersections', len(index['points']))
+        return index
+    
+    def save_intersections(self, index: Dict, region: str) -> str:
+        """Save an intersection index to compact JSON next to the streets file."""
+        filepath = os.path.join(self.output_dir, f"{region}_intersections.json")
+        
+        write_json(dict(index, region=region), filepath)
+        
+        self.metrics.add_count('bytes', os.path.getsize(filepath))
+        logger.info(f"Saved {len(index['points'])} intersections to {filepath}")
         return filepath
     
     def generate_summary_report(self, streets: List[StreetSegment], region: str):
@@ -854,6 +1249,7 @@ class OSMStreetFetcher:
 def main():
     """Main function to run the street data fetcher."""
     import argparse
+    from street_pipeline import StreetDataPipeline
     
     parser = argparse.ArgumentParser(description='Fetch street data from OpenStreetMap using city boundaries')
     
@@ -863,6 +1259,8 @@ def main():
                            help='Predefined region to fetch (e.g., san-francisco)')
     input_group.add_argument('--city', 
                            help='City name to fetch (e.g., "San Francisco")')
+    input_group.add_argument('--cities', metavar='FILE',
+                           help='Build every city in FILE (one "City, ST" per line), checkpointing each city')
     
     parser.add_argument('--state', 
                        help='State name or abbreviation (required when using --city)')
@@ -872,42 +1270,111 @@ def main():
                        help='Output directory for data files (default: data)')
     parser.add_argument('--boundary-dir', default='boundary',
                        help='Directory for boundary files (default: boundary)')
+    parser.add_argument('--boundary-store',
+                       help='Path to a SQLite boundary store to use instead of GeoJSON files')
+    parser.add_argument('--no-validate', action='store_true',
+                       help='Skip boundary validation and repair before fetching')
+    parser.add_argument('--overpass-url',
+                       help='Overpass interpreter endpoint (default: the public server; '
+                            'see overpass_stub_server.py for a local stand-in)')
+    parser.add_argument('--shard-bytes', type=int, metavar='BYTES',
+                       help='Also split the output into spatial shards of about BYTES each for lazy loading')
+    parser.add_argument('--max-memory', type=int, metavar='MB',
+                       help='Parse and merge out of core (spilling to disk) within about this much memory')
+    parser.add_argument('--street-filters', default='street_filters.json',
+                       help='Street filters file applied in the filter stage (default: street_filters.json)')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Re-run only the stages whose inputs changed since the last build')
+    parser.add_argument('--force', action='append', default=[], metavar='STAGE',
+                       choices=StreetDataPipeline.STAGES,
+                       help='Re-run a stage even if its inputs are unchanged (repeatable)')
+    parser.add_argument('--explain', action='store_true',
+                       help='Show why each build stage ran or was skipped')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue an interrupted run from its last checkpoint')
+    parser.add_argument('--metrics', metavar='FILE',
+                       help='Write per-stage timing/memory metrics to FILE')
+    parser.add_argument('--metrics-format', choices=['json', 'prometheus'],
+                       help='Metrics format (default: prometheus for .prom/.txt files, else json)')
+    parser.add_argument('--trace-memory', action='store_true',
+                       help='Measure peak Python memory per stage with tracemalloc (slower)')
+    parser.add_argument('--profile', metavar='FILE',
+                       help='Run under cProfile, saving stats to FILE and a sorted report to FILE.txt')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Enable verbose logging')
     
     args = parser.parse_args()
     
-    if args.verbose:
-        logging.getLogger().setLevel(logging.DEBUG)
+    # Configure logging (the library modules only create loggers)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('osm_fetch.log'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
     
     # Validate arguments
     if args.city and not args.state:
         parser.error("--state is required when using --city")
     
+    metrics = Instrumentation(trace_memory=args.trace_memory)
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
     try:
         # Initialize fetcher
-        fetcher = OSMStreetFetcher(args.output_dir, args.boundary_dir)
+        fetcher = OSMStreetFetcher(args.output_dir, args.boundary_dir, args.boundary_store,
+                                   validate_boundaries=not args.no_validate, metrics=metrics,
+                                   overpass_url=args.overpass_url, shard_bytes=args.shard_bytes,
+                                   max_memory=args.max_memory * 1024 * 1024 if args.max_memory else None)
+        
+        pipeline = StreetDataPipeline(fetcher, args.street_filters, incremental=args.incremental,
+                                      force=args.force, resume=args.resume)
+        
+        if args.cities:
+            cities = []
+            with open(args.cities, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip() and not line.startswith('#') and ',' in line:
+                        city_name, state = line.rsplit(',', 1)
+                        cities.append((city_name.strip(), state.strip()))
+            
+            results = pipeline.build_cities(cities, args.country)
+            for name, (status, path) in sorted(results.items()):
+                print(f"  {name}: {status}{f' ({path})' if path else ''}")
+                if args.explain and name in pipeline.graphs:
+                    print(pipeline.graphs[name].explain())
+            
+            failed = [name for name, (status, _) in results.items() if status == 'failed']
+            if failed:
+                logger.error(f"{len(failed)} of {len(results)} cities failed; rerun with --resume to retry them")
+                sys.exit(1)
+            return
         
-        # Fetch streets data
+        # Fetch, process and save streets data
         if args.region:
             logger.info(f"Fetching streets for predefined region: {args.region}")
-            streets = fetcher.fetch_streets_for_region(args.region)
             output_name = args.region
+            streets, filepath = pipeline.build_region(args.region)
         else:
             logger.info(f"Fetching streets for city: {args.city}, {args.state}")
-            streets = fetcher.fetch_streets_for_city(args.city, args.state, args.country)
             # Generate output name from city
-            safe_city = args.city.lower().replace(' ', '_').replace(',', '')
-            safe_state = args.state.lower().replace(' ', '_')
-            output_name = f"{safe_city}_{safe_state}"
+            output_name = boundary_slug(args.city, args.state)
+            streets, filepath = pipeline.build_city(args.city, args.state, args.country, output_name)
+        
+        if args.explain and pipeline.graph:
+            print(f"\nBuild stages for {output_name}:")
+            print(pipeline.graph.explain())
         
         if not streets:
             logger.error("No street data was fetched!")
             sys.exit(1)
         
-        # Save data
-        filepath = fetcher.save_streets_data(streets, output_name)
-        
         # Generate summary
         fetcher.generate_summary_report(streets, output_name)
         
@@ -917,11 +1384,20 @@ def main():
         print(f"🎮 Ready to integrate with the Street Names Challenge game!")
         
     except KeyboardInterrupt:
-        logger.info("Operation cancelled by user")
+        logger.info("Operation cancelled by user; rerun with --resume to continue from the last checkpoint")
         sys.exit(1)
     except Exception as e:
         logger.error(f"Error: {e}")
         sys.exit(1)
+    finally:
+        if profiler:
+            profiler.disable()
+            write_profile(profiler, args.profile)
+        if args.metrics:
+            metrics.write(args.metrics, args.metrics_format)
+        if args.metrics or args.profile:
+            print("\nStage metrics:")
+            print(metrics.summary())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Overpass Query Planner
+======================
+
+Chooses the spatial filters used to query Overpass for a city boundary. Every
+candidate plan is guaranteed to cover the whole boundary, including every
+component of a MultiPolygon; the planner estimates the area each plan would
+download and picks the cheapest:
+
+- ``polygons``:        one ``poly:`` clause per component, simplified while
+                       still containing the component (taken from the
+                       boundary's cached ``query`` level when given, see
+                       boundary_simplifier.py)
+- ``split-polygons``:  as above, with components cut through large holes so
+                       the hole area is not downloaded
+- ``bbox``:            one bounding box around the whole boundary
+- ``component-bboxes``: one bounding box per component
+
+It also sizes the ``[timeout]`` and ``[maxsize]`` settings of a query from the
+area it covers, and cuts a query into quadrants when the server cannot answer
+it whole (see OSMStreetFetcher.fetch_overpass).
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from boundary_simplifier import METERS_PER_DEGREE, containing_simplification, count_points
+
+logger = logging.getLogger(__name__)
+
+# Query settings scale with the area covered, between these bounds
+MIN_TIMEOUT_S = 120
+MAX_TIMEOUT_S = 900
+TIMEOUT_S_PER_KM2 = 0.5
+MIN_MAXSIZE = 512 * 1024 ** 2  # the server default
+MAX_MAXSIZE = 2 * 1024 ** 3
+MAXSIZE_PER_KM2 = 4 * 1024 ** 2
+
+# Timeout the server applies when a query sets none
+DEFAULT_TIMEOUT_S = 180
+
+_HEADER = re.compile(r'\[out:json\](\[(?:timeout|maxsize):\d+\])*;')
+_TIMEOUT = re.compile(r'\[timeout:(\d+)\]')
+_BBOX_FILTER = re.compile(r'\(\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*,'
+                          r'\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*\)')
+_POLY_FILTER = re.compile(r'\(poly:"([^"]*)"\)')
+_SPATIAL_FILTER = re.compile(f"{_POLY_FILTER.pattern}|{_BBOX_FILTER.pattern}")
+
+
+@dataclass
+class QueryClause:
+    """One spatial filter of an Overpass query."""
+    kind: str  # 'poly' or 'bbox'
+    filter: str  # Overpass filter text, e.g. 'poly:"lat lon ..."' or '37.7,-122.5,37.8,-122.3'
+    area_km2: float
+    points: int = 0
+
+
+@dataclass
+class QueryPlan:
+    """The chosen set of clauses plus the cost of every candidate considered."""
+    strategy: str
+    clauses: List[QueryClause]
+    boundary_area_km2: float
+    candidates: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def area_km2(self) -> float:
+        return sum(c.area_km2 for c in self.clauses)
+
+    def describe(self) -> str:
+        """One-line summary for the fetch log."""
+        alternatives = ', '.join(f"{name} {cost:,.1f}" for name, cost in sorted(self.candidates.items(),
+                                                                               key=lambda item: item[1]))
+        return (f"strategy={self.strategy}, {len(self.clauses)} clause(s), "
+                f"{sum(c.points for c in self.clauses)} points, est. {self.area_km2:,.1f} km² "
+                f"for a {self.boundary_area_km2:,.1f} km² boundary (costs: {alternatives})")
+
+
+class OverpassQueryPlanner:
+    """Plans containment-safe Overpass spatial filters for a boundary geometry."""
+
+    # Coordinate pairs allowed in one poly: clause
+    MAX_POLY_POINTS = 200
+
+    # Outward tolerance used when simplifying each component
+    TOLERANCE_M = 75
+
+    # Fixed cost charged per clause (km²), so many tiny clauses aren't free
+    CLAUSE_OVERHEAD_KM2 = 5.0
+
+    # Holes covering at least this share of their component's outline are cut around
+    HOLE_SPLIT_RATIO = 0.01
+    MAX_SPLIT_DEPTH = 3
+
+    def __init__(self, tolerance_m: Optional[float] = None, max_poly_points: Optional[int] = None):
+        self.tolerance_m = tolerance_m or self.TOLERANCE_M
+        self.max_poly_points = max_poly_points or self.MAX_POLY_POINTS
+
+    @staticmethod
+    def _km2(geom, latitude: float) -> float:
+        """Approximate area in km² of a lon/lat geometry at the given latitude."""
+        return geom.area * (METERS_PER_DEGREE / 1000) ** 2 * math.cos(math.radians(latitude))
+
+    @staticmethod
+    def _poly_filter(polygon) -> str:
+        """Format a polygon's outer ring as an Overpass poly: filter (lat lon order)."""
+        coords = polygon.exterior.coords
+        return 'poly:"' + ' '.join(f"{lat} {lon}" for lon, lat in coords) + '"'
+
+    @staticmethod
+    def _bbox_filter(bounds) -> str:
+        west, south, east, north = bounds
+        return f"{south},{west},{north},{east}"
+
+    def _split_large_holes(self, polygon, depth: int = 0) -> List:
+        """Cut a polygon through its largest hole, recursively, so the pieces have no large holes."""
+        import shapely
+        from shapely.geometry import box
+
+        if depth >= self.MAX_SPLIT_DEPTH or not polygon.interiors:
+            return [polygon]
+
+        outline_area = shapely.Polygon(polygon.exterior).area
+        holes = [shapely.Polygon(ring) for ring in polygon.interiors]
+        largest = max(holes, key=lambda h: h.area)
+        if largest.area < outline_area * self.HOLE_SPLIT_RATIO:
+            return [polygon]
+
+        minx, miny, maxx, maxy = polygon.bounds
+        cx, cy = largest.centroid.x, largest.centroid.y
+        # Cut across the polygon's longer side so the pieces stay compact
+        if maxx - minx >= maxy - miny:
+            halves = [box(minx, miny, cx, maxy), box(cx, miny, maxx, maxy)]
+        else:
+            halves = [box(minx, miny, maxx, cy), box(minx, cy, maxx, maxy)]
+
+        pieces = []
+        for half in halves:
+            for part in shapely.get_parts(polygon.intersection(half)):
+                if part.geom_type == 'Polygon' and not part.is_empty:
+                    pieces.extend(self._split_large_holes(part, depth + 1))
+        return pieces
+
+    def _polygon_clauses(self, polygons, latitude: float) -> List[QueryClause]:
+        import shapely
+
+        tolerance = self.tolerance_m / METERS_PER_DEGREE
+        clauses = []
+        for polygon in polygons:
+            covering = containing_simplification(polygon, tolerance, self.max_poly_points)
+            # Buffering can merge nearby parts; emit one clause per resulting ring
+            for part in shapely.get_parts(covering):
+                clauses.append(QueryClause('poly', self._poly_filter(part), self._km2(part, latitude),
+                                           count_points(part)))
+        return clauses
+
+    def _query_level_clauses(self, query_geometry: Dict, geom, latitude: float) -> Optional[List[QueryClause]]:
+        """One clause per part of a cached query level, or None if it does not cover ``geom``."""
+        import shapely
+        from shapely.geometry import shape
+
+        query = shape(query_geometry)
+        if not query.covers(geom):
+            logger.warning("Cached query level does not cover the boundary; simplifying the components instead")
+            return None
+        parts = [p for p in shapely.get_parts(query) if p.geom_type == 'Polygon' and not p.is_empty]
+        clauses = []
+        for part in parts:
+            if count_points(part) > self.max_poly_points:
+                # Over the per-clause budget: simplify the part further, still containing it
+                clauses.extend(self._polygon_clauses([part], latitude))
+            else:
+                clauses.append(QueryClause('poly', self._poly_filter(part), self._km2(part, latitude),
+                                           count_points(part)))
+        return clauses
+
+    def _cost(self, clauses: List[QueryClause]) -> float:
+        return sum(c.area_km2 for c in clauses) + self.CLAUSE_OVERHEAD_KM2 * len(clauses)
+
+    def plan(self, geometry: Dict, query_geometry: Optional[Dict] = None) -> QueryPlan:
+        """Plan the spatial filters for a GeoJSON Polygon or MultiPolygon.
+
+        Args:
+            geometry: Boundary geometry (GeoJSON)
+            query_geometry: The boundary's cached ``query`` resolution level, used
+                for the ``polygons`` clauses instead of simplifying each component
+
+        Returns:
+            QueryPlan with the cheapest covering set of clauses
+        """
+        import shapely
+        from shapely.geometry import box, shape
+
+        geom = shape(geometry)
+        latitude = geom.centroid.y
+        components = [p for p in shapely.get_parts(geom) if p.geom_type == 'Polygon' and not p.is_empty]
+
+        polygons = None
+        if query_geometry:
+            polygons = self._query_level_clauses(query_geometry, geom, latitude)
+        candidates = {
+            'polygons': polygons or self._polygon_clauses(components, latitude),
+            'bbox': [QueryClause('bbox', self._bbox_filter(geom.bounds), self._km2(box(*geom.bounds), latitude))],
+        }
+
+        if len(components) > 1:
+            candidates['component-bboxes'] = [
+                QueryClause('bbox', self._bbox_filter(p.bounds), self._km2(box(*p.bounds), latitude))
+                for p in components
+            ]
+
+        split = [piece for p in components for piece in self._split_large_holes(p)]
+        if len(split) > len(components):
+            candidates['split-polygons'] = self._polygon_clauses(split, latitude)
+
+        costs = {name: self._cost(clauses) for name, clauses in candidates.items()}
+        strategy = min(costs, key=costs.get)
+
+        return QueryPlan(
+            strategy=strategy,
+            clauses=candidates[strategy],
+            boundary_area_km2=self._km2(geom, latitude),
+            candidates=costs
+        )
+
+
+def bbox_area_km2(bbox: List[float]) -> float:
+    """Approximate area in km² of a [south, west, north, east] box."""
+    south, west, north, east = bbox
+    km_per_degree = METERS_PER_DEGREE / 1000
+    return ((north - south) * km_per_degree * (east - west) * km_per_degree
+            * math.cos(math.radians((south + north) / 2)))
+
+
+def query_limits(area_km2: Optional[float]) -> Tuple[int, int]:
+    """``[timeout]`` seconds and ``[maxsize]`` bytes for a query covering ``area_km2``.
+
+    Queries without a spatial filter (``area_km2`` None) get the maximum.
+    """
+    if area_km2 is None:
+        return MAX_TIMEOUT_S, MAX_MAXSIZE
+    timeout = min(max(60 + TIMEOUT_S_PER_KM2 * area_km2, MIN_TIMEOUT_S), MAX_TIMEOUT_S)
+    maxsize = min(max(MAXSIZE_PER_KM2 * area_km2, MIN_MAXSIZE), MAX_MAXSIZE)
+    return int(timeout), int(maxsize)
+
+
+def overpass_header(area_km2: Optional[float]) -> str:
+    """Query header with output format and the limits for ``area_km2``."""
+    timeout, maxsize = query_limits(area_km2)
+    return f"[out:json][timeout:{timeout}][maxsize:{maxsize}];"
+
+
+def query_timeout(query: str) -> int:
+    """The ``[timeout]`` a query asks the server for."""
+    match = _TIMEOUT.search(query)
+    return int(match.group(1)) if match else DEFAULT_TIMEOUT_S
+
+
+def query_extent(query: str) -> Optional[List[float]]:
+    """[south, west, north, east] around every spatial filter of a query, or None without any."""
+    lats, lons = [], []
+    for match in _BBOX_FILTER.finditer(query):
+        south, west, north, east = (float(v) for v in match.groups())
+        lats += [south, north]
+        lons += [west, east]
+    for match in _POLY_FILTER.finditer(query):
+        values = [float(v) for v in match.group(1).split()]
+        lats += values[0::2]
+        lons += values[1::2]
+    if not lats:
+        return None
+    return [min(lats), min(lons), max(lats), max(lons)]
+
+
+def quadrants(bbox: List[float]) -> List[List[float]]:
+    """Split a [south, west, north, east] box into SW, SE, NW and NE quarters."""
+    south, west, north, east = bbox
+    mid_lat, mid_lon = (south + north) / 2, (west + east) / 2
+    return [[south, west, mid_lat, mid_lon], [south, mid_lon, mid_lat, east],
+            [mid_lat, west, north, mid_lon], [mid_lat, mid_lon, north, east]]
+
+
+def restrict_query(query: str, bbox: List[float]) -> str:
+    """Limit every spatial filter of a query to ``bbox`` and size its limits to match.
+
+    Overpass ANDs chained filters, so ``(poly:"...")(s,w,n,e)`` selects what
+    touches both; every element of the original result touches at least one
+    quadrant of its extent, so the quadrant queries together return all of it.
+    """
+    south, west, north, east = bbox
+    extra = f"({south},{west},{north},{east})"
+    restricted = _SPATIAL_FILTER.sub(lambda m: m.group(0) + extra, query)
+    return _HEADER.sub(overpass_header(bbox_area_km2(bbox)), restricted, count=1)
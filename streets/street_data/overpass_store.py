@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Columnar Overpass Store
+=======================
+
+Keeps a raw Overpass response in columnar form, so re-running parsing or
+filtering on a large city does not decode the whole JSON response again.
+
+Every element property becomes a flat array, and variable-length parts
+(tags, geometry, way nodes, relation members) become value arrays plus
+``*_offsets`` marking where each element's values start:
+
+- ``ids``, ``types``: element id and type (index into the type table)
+- ``tag_offsets``, ``tag_keys``, ``tag_values``: tags as indices into one string table
+- ``geometry_offsets``, ``coords``: way geometry as (N, 2) [lat, lon] rows
+- ``node_offsets``, ``way_nodes``: node ids of each way's vertices
+- ``member_offsets``, ``member_types``, ``member_refs``, ``member_roles``: relation members
+- ``points``: [lat, lon] of node elements (NaN for other types)
+- ``bounds``: [minlat, minlon, maxlat, maxlon] of ways (NaN where absent)
+- ``extras``: any other element keys, as JSON in the string table (-1 if none)
+
+The arrays are written as one uncompressed ``.npz`` file with fixed zip
+timestamps (identical responses give identical files, so build-graph hashes
+stay stable). Opening the store memory-maps each array in place, so loading
+costs nothing until data is read.
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import json
+import os
+import struct
+import zipfile
+from typing import Dict, Iterator, List, Tuple, Union
+
+import numpy as np
+
+STORE_FORMAT_VERSION = 1
+
+# Fixed timestamp for zip entries, so the file depends only on the data
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# Elements converted to Python objects at a time by the record iterators
+RECORD_BATCH = 65536
+
+# Element keys held in dedicated columns; other keys go to ``extras``
+COLUMN_KEYS = {'type', 'id', 'lat', 'lon', 'tags', 'geometry', 'nodes', 'members', 'bounds'}
+BOUNDS_KEYS = ('minlat', 'minlon', 'maxlat', 'maxlon')
+
+# Zip local file header: signature, versions, flags, sizes, name and extra field lengths
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+
+
+class OverpassStore:
+    """Columnar view of an Overpass response (see the module docstring for the layout)."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict):
+        self.arrays = arrays
+        self.meta = meta
+        self._strings = None
+
+    def __len__(self) -> int:
+        return len(self.arrays['ids'])
+
+    @classmethod
+    def from_overpass(cls, data: Dict) -> 'OverpassStore':
+        """Convert a decoded Overpass response."""
+        strings: Dict[str, int] = {}
+        type_names: Dict[str, int] = {}
+
+        def string_id(value) -> int:
+            return strings.setdefault(str(value), len(strings))
+
+        elements = data.get('elements', [])
+        ids, types = [], []
+        tag_offsets, tag_keys, tag_values = [0], [], []
+        geometry_offsets, coords = [0], []
+        node_offsets, way_nodes = [0], []
+        member_offsets, member_types, member_refs, member_roles = [0], [], [], []
+        points = np.full((len(elements), 2), np.nan)
+        bounds = np.full((len(elements), 4), np.nan)
+        extras = np.full(len(elements), -1, dtype=np.int32)
+
+        for i, element in enumerate(elements):
+            ids.append(element['id'])
+            types.append(type_names.setdefault(element.get('type', ''), len(type_names)))
+            for key, value in element.get('tags', {}).items():
+                tag_keys.append(string_id(key))
+                tag_values.append(string_id(value))
+            tag_offsets.append(len(tag_keys))
+            for point in element.get('geometry') or []:
+                coords.append((point['lat'], point['lon']) if point else (np.nan, np.nan))
+            geometry_offsets.append(len(coords))
+            way_nodes.extend(element.get('nodes') or [])
+            node_offsets.append(len(way_nodes))
+            for member in element.get('members') or []:
+                member_types.append(type_names.setdefault(member.get('type', ''), len(type_names)))
+                member_refs.append(member['ref'])
+                member_roles.append(string_id(member.get('role', '')))
+            member_offsets.append(len(member_refs))
+            if 'lat' in element:
+                points[i] = (element['lat'], element['lon'])
+            if 'bounds' in element:
+                bounds[i] = [element['bounds'][key] for key in BOUNDS_KEYS]
+            extra = {key: value for key, value in element.items() if key not in COLUMN_KEYS}
+            if extra:
+                extras[i] = string_id(json.dumps(extra, sort_keys=True, separators=(',', ':')))
+
+        blob = ''.join(strings).encode('utf-8')
+        string_offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+        string_offsets[1:] = np.cumsum([len(s.encode('utf-8')) for s in strings])
+
+        arrays = {
+            'ids': np.asarray(ids, dtype=np.int64),
+            'types': np.asarray(types, dtype=np.uint8),
+            'tag_offsets': np.asarray(tag_offsets, dtype=np.int64),
+            'tag_keys': np.asarray(tag_keys, dtype=np.int32),
+            'tag_values': np.asarray(tag_values, dtype=np.int32),
+            'geometry_offsets': np.asarray(geometry_offsets, dtype=np.int64),
+            'coords': np.asarray(coords, dtype=np.float64).reshape(-1, 2),
+            'node_offsets': np.asarray(node_offsets, dtype=np.int64),
+            'way_nodes': np.asarray(way_nodes, dtype=np.int64),
+            'member_offsets': np.asarray(member_offsets, dtype=np.int64),
+            'member_types': np.asarray(member_types, dtype=np.uint8),
+            'member_refs': np.asarray(member_refs, dtype=np.int64),
+            'member_roles': np.asarray(member_roles, dtype=np.int32),
+            'points': points,
+            'bounds': bounds,
+            'extras': extras,
+            'string_blob': np.frombuffer(blob, dtype=np.uint8),
+            'string_offsets': string_offsets
+        }
+        meta = {
+            'version': STORE_FORMAT_VERSION,
+            'type_names': list(type_names),
+            'header': {key: value for key, value in data.items() if key != 'elements'}
+        }
+        return cls(arrays, meta)
+
+    @classmethod
+    def open(cls, path: str) -> 'OverpassStore':
+        """Open a store written by ``save``, memory-mapping its arrays."""
+        arrays = _memmap_npz(path)
+        meta = json.loads(arrays.pop('meta').tobytes().decode('utf-8'))
+        if meta.get('version') != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported Overpass store version: {meta.get('version')}")
+        return cls(arrays, meta)
+
+    def save(self, path: str):
+        """Write the store atomically as an uncompressed, memory-mappable ``.npz``."""
+        meta = np.frombuffer(json.dumps(self.meta, separators=(',', ':')).encode('utf-8'), dtype=np.uint8)
+        tmp_path = f"{path}.tmp"
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED) as archive:
+            for name, array in sorted(dict(self.arrays, meta=meta).items()):
+                with archive.open(zipfile.ZipInfo(f"{name}.npy", ZIP_DATE_TIME), 'w', force_zip64=True) as f:
+                    np.lib.format.write_array(f, np.ascontiguousarray(array), allow_pickle=False)
+        os.replace(tmp_path, path)
+
+    @property
+    def strings(self) -> List[str]:
+        """The string table (decoded on first use)."""
+        if self._strings is None:
+            blob = self.arrays['string_blob'].tobytes()
+            offsets = self.arrays['string_offsets'].tolist()
+            self._strings = [blob[a:b].decode('utf-8') for a, b in zip(offsets, offsets[1:])]
+        return self._strings
+
+    def _type_indices(self, type_name: str) -> np.ndarray:
+        names = self.meta['type_names']
+        if type_name not in names:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(self.arrays['types'] == names.index(type_name))
+
+    def tags(self, i: int) -> Dict[str, str]:
+        """Tags of element ``i``."""
+        a, b = self.arrays['tag_offsets'][i:i + 2]
+        strings = self.strings
+        return {strings[k]: strings[v] for k, v in zip(self.arrays['tag_keys'][a:b].tolist(),
+                                                       self.arrays['tag_values'][a:b].tolist())}
+
+    def _tags_of(self, indices: List[int]) -> List[Dict[str, str]]:
+        """Tags of many elements (ascending indices), converting only their part of the tag columns to lists."""
+        if not indices:
+            return []
+        offsets = self.arrays['tag_offsets'][indices[0]:indices[-1] + 2].tolist()
+        base = offsets[0]
+        keys = self.arrays['tag_keys'][base:offsets[-1]].tolist()
+        values = self.arrays['tag_values'][base:offsets[-1]].tolist()
+        strings = self.strings
+        tags = []
+        for i in indices:
+            a, b = offsets[i - indices[0]] - base, offsets[i - indices[0] + 1] - base
+            tags.append({strings[k]: strings[v] for k, v in zip(keys[a:b], values[a:b])})
+        return tags
+
+    def iter_way_records(self, batch: int = RECORD_BATCH) -> Iterator[Tuple[int, Tuple[Dict[str, str], List[List[float]]]]]:
+        """(way id, (tags, [[lat, lon], ...])) for every way with geometry, ``batch`` ways at a time."""
+        offsets = self.arrays['geometry_offsets']
+        ways = self._type_indices('way')
+        ways = ways[offsets[ways + 1] > offsets[ways]]
+        for start in range(0, len(ways), batch):
+            chunk = ways[start:start + batch]
+            first, last = int(offsets[chunk[0]]), int(offsets[chunk[-1] + 1])
+            coords = self.arrays['coords'][first:last].tolist()
+            starts = (offsets[chunk] - first).tolist()
+            ends = (offsets[chunk + 1] - first).tolist()
+            ids = self.arrays['ids'][chunk].tolist()
+            for way_id, a, b, tags in zip(ids, starts, ends, self._tags_of(chunk.tolist())):
+                yield way_id, (tags, coords[a:b])
+
+    def way_records(self) -> Dict[int, Tuple[Dict[str, str], List[List[float]]]]:
+        """Map way id -> (tags, [[lat, lon], ...]) for every way with geometry."""
+        return dict(self.iter_way_records(batch=max(len(self), 1)))
+
+    def iter_relation_records(self, batch: int = RECORD_BATCH) -> Iterator[Tuple[int, Dict[str, str], List[int]]]:
+        """(relation id, tags, member way ids) for every relation, ``batch`` relations at a time."""
+        offsets = self.arrays['member_offsets']
+        names = self.meta['type_names']
+        way_type = names.index('way') if 'way' in names else -1
+        relations = self._type_indices('relation').tolist()
+        for start in range(0, len(relations), batch):
+            chunk = relations[start:start + batch]
+            for i, tags in zip(chunk, self._tags_of(chunk)):
+                a, b = offsets[i], offsets[i + 1]
+                refs = self.arrays['member_refs'][a:b][self.arrays['member_types'][a:b] == way_type]
+                yield int(self.arrays['ids'][i]), tags, refs.tolist()
+
+    def relation_records(self) -> List[Tuple[int, Dict[str, str], List[int]]]:
+        """(relation id, tags, member way ids) for every relation."""
+        return list(self.iter_relation_records(batch=max(len(self), 1)))
+
+    def vertex_node_ids(self) -> Tuple[np.ndarray, np.ndarray]:
+        """[lat, lon] rows and node ids of every way vertex, for ways whose node list matches their geometry."""
+        ways = self._type_indices('way')
+        geometry_offsets = self.arrays['geometry_offsets']
+        node_offsets = self.arrays['node_offsets']
+        counts = geometry_offsets[ways + 1] - geometry_offsets[ways]
+        ways = ways[(counts > 0) & (counts == node_offsets[ways + 1] - node_offsets[ways])]
+
+        geometry_rows = _ranges(geometry_offsets[ways], geometry_offsets[ways + 1])
+        node_rows = _ranges(node_offsets[ways], node_offsets[ways + 1])
+        coords = np.asarray(self.arrays['coords'][geometry_rows])
+        node_ids = np.asarray(self.arrays['way_nodes'][node_rows])
+        valid = ~np.isnan(coords).any(axis=1)
+        return coords[valid], node_ids[valid]
+
+    def to_overpass(self) -> Dict:
+        """Rebuild the Overpass response as decoded JSON."""
+        a = {name: array if name in ('points', 'bounds') else array.tolist() for name, array in self.arrays.items()}
+        names = self.meta['type_names']
+        strings = self.strings
+        elements = []
+        for i, element_id in enumerate(a['ids']):
+            element = {'type': names[a['types'][i]], 'id': element_id}
+            if a['extras'][i] >= 0:
+                element.update(json.loads(strings[a['extras'][i]]))
+            if not np.isnan(a['points'][i]).any():
+                element['lat'], element['lon'] = a['points'][i].tolist()
+            if not np.isnan(a['bounds'][i]).any():
+                element['bounds'] = dict(zip(BOUNDS_KEYS, a['bounds'][i].tolist()))
+            t0, t1 = a['tag_offsets'][i], a['tag_offsets'][i + 1]
+            if t1 > t0:
+                element['tags'] = {strings[k]: strings[v] for k, v in zip(a['tag_keys'][t0:t1], a['tag_values'][t0:t1])}
+            n0, n1 = a['node_offsets'][i], a['node_offsets'][i + 1]
+            if n1 > n0:
+                element['nodes'] = a['way_nodes'][n0:n1]
+            g0, g1 = a['geometry_offsets'][i], a['geometry_offsets'][i + 1]
+            if g1 > g0:
+                element['geometry'] = [None if lat != lat else {'lat': lat, 'lon': lon}
+                                       for lat, lon in a['coords'][g0:g1]]
+            m0, m1 = a['member_offsets'][i], a['member_offsets'][i + 1]
+            if m1 > m0:
+                element['members'] = [{'type': names[a['member_types'][m]], 'ref': a['member_refs'][m],
+                                        'role': strings[a['member_roles'][m]]} for m in range(m0, m1)]
+            elements.append(element)
+        return dict(self.meta['header'], elements=elements)
+
+
+def _ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatenated ``arange(start, end)`` for each pair, without a Python loop."""
+    lengths = ends - starts
+    if not len(lengths) or not lengths.sum():
+        return np.zeros(0, dtype=np.int64)
+    shift = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return np.arange(lengths.sum()) + shift
+
+
+def _memmap_npz(path: str) -> Dict[str, np.ndarray]:
+    """Memory-map every array of an uncompressed ``.npz`` file in place."""
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: {info.filename} is compressed and cannot be memory-mapped")
+            f.seek(info.header_offset)
+            header = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+            f.seek(info.header_offset + _LOCAL_HEADER.size + header[-2] + header[-1])
+            version = np.lib.format.read_magic(f)
+            read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                           else np.lib.format.read_array_header_2_0)
+            shape, fortran_order, dtype = read_header(f)
+            name = info.filename[:-len('.npy')]
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                                         order='F' if fortran_order else 'C')
+    return arrays
+
+
+def save_overpass_store(data: Union[Dict, OverpassStore], path: str):
+    """Write a decoded Overpass response (or a store) to ``path``."""
+    store = data if isinstance(data, OverpassStore) else OverpassStore.from_overpass(data)
+    store.save(path)
+
+
+def load_overpass_store(path: str) -> OverpassStore:
+    return OverpassStore.open(path)
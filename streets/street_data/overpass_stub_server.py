@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Overpass Stand-in Server
+========================
+
+A local HTTP server that answers Overpass interpreter requests, so the fetch
+path (retries, concurrency, streaming) can be exercised and measured offline.
+Point the fetcher at it with ``--overpass-url http://127.0.0.1:<port>/api/interpreter``.
+
+Responses are selected by a hash of the (whitespace-normalized) query:
+
+- ``<fixtures_dir>/<query_key>.json`` is served if it exists (recorded fixture)
+- with ``record_from`` set, unknown queries are forwarded there and recorded
+- otherwise a synthetic response (synthetic_overpass.py) seeded by the key
+
+Faults can be injected per request: latency before the headers, bandwidth
+throttling of the body, 429/504 errors, truncated bodies, "runtime error"
+remarks (HTTP 200 with part of the result, as when the real server runs out
+of time or memory), and a limit on concurrent slots (requests over the limit get 429, like the real server).
+A fixed ``script`` of outcomes is consumed first, which makes tests
+deterministic; random rates apply afterwards.
+
+Usage:
+    python overpass_stub_server.py --port 8085 --fixtures fixtures/
+    python overpass_stub_server.py --latency 0.5 --bandwidth 200000 --rate-429 0.1 --slots 2
+    python overpass_stub_server.py --record-from https://overpass-api.de/api/interpreter --fixtures fixtures/
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from synthetic_overpass import generate_overpass_response
+
+logger = logging.getLogger(__name__)
+
+# Area used for synthetic responses when none is given (San Francisco)
+DEFAULT_BBOX = [37.7049, -122.5096, 37.8084, -122.3573]
+
+# Body chunk size used when throttling bandwidth
+CHUNK_BYTES = 16 * 1024
+
+
+def query_key(query: str) -> str:
+    """Fixture key for a query: hash of the query with whitespace collapsed."""
+    normalized = ' '.join(query.split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def save_fixture(fixtures_dir: str, query: str, body: bytes) -> str:
+    """Store a response body as the fixture for ``query``."""
+    os.makedirs(fixtures_dir, exist_ok=True)
+    path = os.path.join(fixtures_dir, f"{query_key(query)}.json")
+    with open(f"{path}.tmp", 'wb') as f:
+        f.write(body)
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+@dataclass
+class FaultConfig:
+    """Fault injection settings.
+
+    Outcomes are 'ok', '429', '504', 'truncate' and 'remark'. ``script`` outcomes are
+    used in request order before the random rates apply.
+    """
+    latency: float = 0.0  # seconds before the response headers
+    bandwidth: Optional[int] = None  # body bytes per second (None: unthrottled)
+    rate_429: float = 0.0
+    rate_504: float = 0.0
+    truncate_rate: float = 0.0
+    remark_rate: float = 0.0
+    slots: Optional[int] = None  # concurrent requests served; the rest get 429
+    script: List[str] = field(default_factory=list)
+    seed: Optional[int] = None
+
+
+class OverpassStubServer:
+    """Threaded stand-in for the Overpass interpreter endpoint."""
+
+    def __init__(self, fixtures_dir: Optional[str] = None, faults: Optional[FaultConfig] = None,
+                 synthetic_bbox: Optional[List[float]] = None, synthetic_elements: int = 2000,
+                 record_from: Optional[str] = None, host: str = '127.0.0.1', port: int = 0):
+        """Configure the server (call start() or use it as a context manager).
+
+        Args:
+            fixtures_dir: Directory of recorded responses named ``<query_key>.json``
+            faults: Fault injection settings
+            synthetic_bbox: Area for synthetic responses, as [south, west, north, east]
+            synthetic_elements: Size of synthetic responses
+            record_from: Upstream endpoint for queries without a fixture; responses are recorded
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+        """
+        self.fixtures_dir = fixtures_dir
+        self.faults = faults or FaultConfig()
+        self.synthetic_bbox = synthetic_bbox or DEFAULT_BBOX
+        self.synthetic_elements = synthetic_elements
+        self.record_from = record_from
+
+        self.stats: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._script = list(self.faults.script)
+        self._random = random.Random(self.faults.seed)
+        self._active = 0
+        self._bodies: Dict[str, bytes] = {}
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api/interpreter"
+
+    def start(self) -> 'OverpassStubServer':
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Overpass stand-in listening on {self.url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> 'OverpassStubServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def _next_outcome(self) -> str:
+        with self._lock:
+            if self._script:
+                return self._script.pop(0)
+            roll = self._random.random()
+        for outcome, rate in (('429', self.faults.rate_429), ('504', self.faults.rate_504),
+                              ('truncate', self.faults.truncate_rate), ('remark', self.faults.remark_rate)):
+            if roll < rate:
+                return outcome
+            roll -= rate
+        return 'ok'
+
+    def _acquire_slot(self) -> bool:
+        with self._lock:
+            if self.faults.slots is not None and self._active >= self.faults.slots:
+                return False
+            self._active += 1
+            return True
+
+    def _release_slot(self):
+        with self._lock:
+            self._active -= 1
+
+    def response_body(self, query: str) -> bytes:
+        """Body served for ``query``: recorded fixture, upstream recording or synthetic data."""
+        key = query_key(query)
+        with self._lock:
+            cached = self._bodies.get(key)
+        if cached is not None:
+            return cached
+
+        path = os.path.join(self.fixtures_dir, f"{key}.json") if self.fixtures_dir else None
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                body = f.read()
+        elif self.record_from:
+            response = requests.post(self.record_from, data=query, timeout=300)
+            response.raise_for_status()
+            body = response.content
+            if self.fixtures_dir:
+                logger.info(f"Recorded fixture {save_fixture(self.fixtures_dir, query, body)}")
+        else:
+            data = generate_overpass_response(self.synthetic_bbox, self.synthetic_elements, seed=int(key, 16))
+            body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+        with self._lock:
+            self._bodies[key] = body
+        return body
+
+    def status_text(self) -> str:
+        """Plain-text status in the spirit of Overpass ``/api/status``."""
+        with self._lock:
+            free = None if self.faults.slots is None else self.faults.slots - self._active
+        slots = 'unlimited' if free is None else free
+        return f"Connected as: stand-in\nRate limit: {self.faults.slots or 0}\n{slots} slots available now.\n"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                logger.debug(f"{self.address_string()} {format % args}")
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path == '/api/status':
+                    self._send_text(200, server.status_text())
+                elif parsed.path == '/stats':
+                    with server._lock:
+                        self._send_text(200, json.dumps(server.stats), 'application/json')
+                elif parsed.path == '/api/interpreter':
+                    self._interpret(parse_qs(parsed.query).get('data', [''])[0])
+                else:
+                    self._send_text(404, 'Not found\n')
+
+            def do_POST(self):
+                if urlparse(self.path).path != '/api/interpreter':
+                    self._send_text(404, 'Not found\n')
+                    return
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+                # The fetcher posts the raw query; browsers and other clients send a data= form field
+                if body.startswith('data='):
+                    body = parse_qs(body).get('data', [''])[0]
+                self._interpret(body)
+
+            def _send_text(self, status: int, text: str, content_type: str = 'text/plain'):
+                payload = text.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _interpret(self, query: str):
+                server._count('requests')
+                if not server._acquire_slot():
+                    server._count('rejected_slots')
+                    self._send_text(429, 'Too Many Requests: no free slot\n')
+                    return
+                try:
+                    if server.faults.latency:
+                        time.sleep(server.faults.latency)
+
+                    outcome = server._next_outcome()
+                    server._count(outcome)
+                    if outcome == '429':
+                        self._send_text(429, 'Too Many Requests\n')
+                        return
+                    if outcome == '504':
+                        self._send_text(504, 'Gateway Timeout\n')
+                        return
+
+                    body = server.response_body(query)
+                    if outcome == 'remark':
+                        # The real server sends what it collected before running out of time
+                        data = json.loads(body)
+                        data['elements'] = data['elements'][:len(data['elements']) // 2]
+                        data['remark'] = ('runtime error: Query timed out in "query" at line 4 '
+                                          'after 120 seconds.')
+                        body = json.dumps(data).encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+
+                    if outcome == 'truncate':
+                        # Full Content-Length, then the connection drops halfway
+                        body = body[:len(body) // 2]
+                        self.close_connection = True
+                    self._send_body(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    server._count('client_disconnects')
+                finally:
+                    server._release_slot()
+
+            def _send_body(self, body: bytes):
+                bandwidth = server.faults.bandwidth
+                if not bandwidth:
+                    self.wfile.write(body)
+                    return
+                for start in range(0, len(body), CHUNK_BYTES):
+                    chunk = body[start:start + CHUNK_BYTES]
+                    self.wfile.write(chunk)
+                    self.wfile.flush()
+                    time.sleep(len(chunk) / bandwidth)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Overpass stand-in with fault injection')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8085, help='Port to listen on (default: 8085)')
+    parser.add_argument('--fixtures', help='Directory of recorded responses (<query key>.json)')
+    parser.add_argument('--record-from', metavar='URL', help='Forward unknown queries to URL and record them')
+    parser.add_argument('--bbox', type=float, nargs=4, metavar=('S', 'W', 'N', 'E'),
+                        help='Area for synthetic responses (default: San Francisco)')
+    parser.add_argument('--elements', type=int, default=2000, help='Size of synthetic responses')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds before the response headers')
+    parser.add_argument('--bandwidth', type=int, help='Throttle bodies to this many bytes per second')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Share of requests answered with 429')
+    parser.add_argument('--rate-504', type=float, default=0.0, help='Share of requests answered with 504')
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help='Share of responses cut off halfway')
+    parser.add_argument('--remark-rate', type=float, default=0.0,
+                        help='Share of responses cut short with a "runtime error" remark')
+    parser.add_argument('--slots', type=int, help='Concurrent requests served (others get 429)')
+    parser.add_argument('--script', default='', help='Comma-separated outcomes for the first requests '
+                                                     '(ok, 429, 504, truncate, remark)')
+    parser.add_argument('--seed', type=int, help='Seed for random faults')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    faults = FaultConfig(latency=args.latency, bandwidth=args.bandwidth, rate_429=args.rate_429,
+                         rate_504=args.rate_504, truncate_rate=args.truncate_rate,
+                         remark_rate=args.remark_rate, slots=args.slots,
+                         script=[s.strip() for s in args.script.split(',') if s.strip()], seed=args.seed)
+    server = OverpassStubServer(args.fixtures, faults, args.bbox, args.elements, args.record_from,
+                                args.host, args.port)
+    print(f"Overpass stand-in at {server.url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"Requests: {json.dumps(server.stats)}")
+
+
+if __name__ == '__main__':
+    main()
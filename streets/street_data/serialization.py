@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+JSON Serialization Backends
+===========================
+
+One entry point for the JSON I/O of the street data tools: Overpass
+responses, street data files, boundary GeoJSON and validation input.
+
+The fastest installed backend is used:
+
+- ``msgspec``: fastest; also decodes street and boundary files into typed
+  structs (``StreetSegmentStruct``, ``CityBoundaryStruct``), validating them
+  while parsing
+- ``orjson``: fast encoding and decoding of plain values and dataclasses
+- ``json``: the standard library, always available
+
+Set ``STREET_DATA_JSON=json|orjson|msgspec`` (or call ``set_backend``) to
+choose one explicitly, e.g. to compare them (see benchmark_serialization.py).
+Every backend writes the same layout: compact by default, or 2-space
+indentation with ``indent=True``, non-ASCII text written as UTF-8.
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import json
+import os
+from dataclasses import asdict, fields, is_dataclass
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+BACKENDS = ('msgspec', 'orjson', 'json')
+
+
+def available_backends() -> List[str]:
+    """Installed backends, fastest first."""
+    installed = {'msgspec': MSGSPEC_AVAILABLE, 'orjson': ORJSON_AVAILABLE, 'json': True}
+    return [name for name in BACKENDS if installed[name]]
+
+
+def set_backend(name: Optional[str] = None) -> str:
+    """Select a backend by name (default: the fastest installed one).
+
+    Raises:
+        ValueError: If the backend is unknown or not installed
+    """
+    global BACKEND
+    if name is None:
+        name = available_backends()[0]
+    if name not in available_backends():
+        raise ValueError(f"JSON backend '{name}' is not available (installed: {', '.join(available_backends())})")
+    BACKEND = name
+    return name
+
+
+BACKEND = set_backend(os.environ.get('STREET_DATA_JSON') or None)
+
+
+if MSGSPEC_AVAILABLE:
+    class StreetSegmentStruct(msgspec.Struct, kw_only=True):
+        """Typed form of osm_street_fetcher.StreetSegment."""
+        id: str
+        name: str
+        suffix: str
+        full_name: str
+        coordinates: List[List[List[float]]]
+        length: float
+        city: str
+        state: Optional[str]
+        discovered: bool = False
+        discovery_time: Optional[int] = None
+        way_ids: List[int] = []
+        highway: Optional[str] = None
+        importance: Optional[float] = None
+        bbox: Optional[List[float]] = None
+        line_bboxes: Optional[List[List[float]]] = None
+        label: Optional[List[float]] = None
+
+    class StreetsFileStruct(msgspec.Struct):
+        """A ``<city>_streets.json`` file."""
+        streets: List[StreetSegmentStruct]
+        region: Optional[str] = None
+        generated_at: Optional[int] = None
+        total_streets: Optional[int] = None
+        total_miles: Optional[float] = None
+
+    class CityBoundaryStruct(msgspec.Struct):
+        """Typed form of city_boundary_fetcher.CityBoundary, as stored in boundary feature properties."""
+        name: str = 'Unknown'
+        state: Optional[str] = None
+        country: str = 'Unknown'
+        bbox: List[float] = msgspec.field(default_factory=lambda: [0, 0, 0, 0])
+        area_km2: float = 0.0
+
+    class BoundaryFeatureStruct(msgspec.Struct):
+        properties: Optional[CityBoundaryStruct] = None
+        geometry: Optional[Dict[str, Any]] = None
+
+    class BoundaryFileStruct(msgspec.Struct):
+        """A ``boundary/*.geojson`` FeatureCollection."""
+        type: str
+        features: List[BoundaryFeatureStruct] = []
+
+    _msgspec_encoder = msgspec.json.Encoder()
+    _msgspec_decoder = msgspec.json.Decoder()
+    _streets_decoder = msgspec.json.Decoder(StreetsFileStruct)
+    _boundary_decoder = msgspec.json.Decoder(BoundaryFileStruct)
+
+
+def _default(value: Any) -> Any:
+    if is_dataclass(value):
+        return asdict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """Encode a value (dataclasses included) as UTF-8 JSON.
+
+    Args:
+        value: Value to encode
+        indent: Indent with 2 spaces instead of the compact form
+        sort_keys: Sort object keys
+    """
+    if BACKEND == 'msgspec' and not sort_keys:
+        data = _msgspec_encoder.encode(value)
+        return msgspec.json.format(data, indent=2) if indent else data
+    if BACKEND in ('msgspec', 'orjson') and ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+        if sort_keys:
+            # orjson keeps dataclass fields in declaration order; sort them like json does
+            option |= orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+        return orjson.dumps(value, default=_default, option=option)
+    return json.dumps(value, indent=2 if indent else None, separators=None if indent else (',', ':'),
+                      sort_keys=sort_keys, ensure_ascii=False, default=_default).encode('utf-8')
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON from bytes or text.
+
+    Raises:
+        ValueError: If the document is not valid JSON
+    """
+    if BACKEND == 'msgspec':
+        try:
+            return _msgspec_decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+    if BACKEND == 'orjson':
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def read_json(path: str) -> Any:
+    """Decode a JSON file."""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def write_json(value: Any, path: str, indent: bool = False, sort_keys: bool = False):
+    """Encode a value to a JSON file (see ``dumps``)."""
+    with open(path, 'wb') as f:
+        f.write(dumps(value, indent=indent, sort_keys=sort_keys))
+
+
+def decode_streets(data: bytes, segment_class) -> List:
+    """Decode a streets file into ``segment_class`` objects (typed and validated with msgspec).
+
+    Raises:
+        ValueError: If the document is not a valid streets file
+    """
+    if BACKEND == 'msgspec':
+        try:
+            streets = _streets_decoder.decode(data).streets
+        except (msgspec.DecodeError, msgspec.ValidationError) as e:
+            raise ValueError(str(e)) from e
+        return [segment_class(**msgspec.structs.asdict(street)) for street in streets]
+
+    known = {f.name for f in fields(segment_class)}
+    return [segment_class(**{k: v for k, v in street.items() if k in known})
+            for street in loads(data)['streets']]
+
+
+def decode_boundary(data: bytes, boundary_class) -> Optional[Any]:
+    """Decode a boundary FeatureCollection into a ``boundary_class`` object.
+
+    Returns:
+        The boundary of the first feature, or None if the document has no
+        feature with a geometry
+
+    Raises:
+        ValueError: If the document is not valid JSON (or, with msgspec, not a
+            valid boundary file)
+    """
+    if BACKEND == 'msgspec':
+        try:
+            document = _boundary_decoder.decode(data)
+        except (msgspec.DecodeError, msgspec.ValidationError) as e:
+            raise ValueError(str(e)) from e
+        if document.type != 'FeatureCollection' or not document.features or not document.features[0].geometry:
+            return None
+        feature = document.features[0]
+        props = feature.properties or CityBoundaryStruct()
+        return boundary_class(name=props.name, state=props.state, country=props.country,
+                              geometry=feature.geometry, bbox=props.bbox, area_km2=props.area_km2)
+
+    document = loads(data)
+    if document.get('type') != 'FeatureCollection' or not document.get('features'):
+        return None
+    feature = document['features'][0]
+    if not feature.get('geometry'):
+        return None
+    props = feature.get('properties') or {}
+    return boundary_class(name=props.get('name', 'Unknown'), state=props.get('state'),
+                          country=props.get('country', 'Unknown'), geometry=feature['geometry'],
+                          bbox=props.get('bbox', [0, 0, 0, 0]), area_km2=props.get('area_km2', 0.0))
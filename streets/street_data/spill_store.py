@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Spill Store
+===========
+
+SQLite scratch storage for parsing regions too large to hold in memory (a
+county or a whole metro area). OSMStreetFetcher's out-of-core mode (the
+``max_memory`` budget, ``--max-memory`` on the command line) parses through
+this store instead of Python dicts:
+
+- ``ways``: way id, tags and geometry, in response order
+- ``relations`` and ``members``: relations and their member way ids, in order
+- ``used_ways``: ways already claimed by a relation
+- ``streets``: parsed (not yet merged) streets, with their name and suffix
+
+Rows are buffered in memory and written in batches once the buffers pass a
+quarter of the budget; SQLite's page cache gets half, and pages beyond it stay
+on disk. The name merge reads the streets back as an
+external sort (``ORDER BY`` through SQLite's sorter, which spills to temporary
+files), one (name, suffix) group at a time, in the order the in-memory merge
+produces.
+
+The store is scratch data: it is written without a journal and moved into
+place when complete, so a crash never leaves a partial store at ``path``.
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import logging
+import os
+import sqlite3
+from array import array
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# Used when no budget is given
+DEFAULT_MAX_MEMORY = 256 * 1024 ** 2
+
+# Rough per-row overhead of buffered rows (tuple, ints, list slot)
+ROW_OVERHEAD_BYTES = 100
+
+# Way ids looked up per query (below SQLite's bound-parameter limit)
+LOOKUP_BATCH = 500
+
+
+def encode_coords(coords: List[List[float]]) -> bytes:
+    """[[lat, lon], ...] as packed float64 pairs."""
+    return array('d', [value for point in coords for value in point]).tobytes()
+
+
+def decode_coords(blob: bytes) -> List[List[float]]:
+    values = array('d')
+    values.frombytes(blob)
+    values = values.tolist()
+    return [values[i:i + 2] for i in range(0, len(values), 2)]
+
+
+class SpillStore:
+    """Disk-backed ways, relation memberships and parsed streets (see the module docstring)."""
+
+    SCHEMA = """
+    CREATE TABLE ways (
+        seq INTEGER PRIMARY KEY,
+        id INTEGER NOT NULL UNIQUE,
+        tags TEXT NOT NULL,
+        coords BLOB NOT NULL
+    );
+    CREATE TABLE relations (
+        seq INTEGER PRIMARY KEY,
+        id INTEGER NOT NULL,
+        tags TEXT NOT NULL
+    );
+    CREATE TABLE members (
+        relation_seq INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        way_id INTEGER NOT NULL,
+        PRIMARY KEY (relation_seq, position)
+    ) WITHOUT ROWID;
+    CREATE TABLE used_ways (
+        id INTEGER PRIMARY KEY
+    );
+    CREATE TABLE streets (
+        seq INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        suffix TEXT NOT NULL,
+        lines INTEGER NOT NULL,
+        record BLOB NOT NULL
+    );
+    """
+
+    # A way seen twice keeps its first position and its last tags and geometry, like a dict
+    _INSERT_WAY = """
+    INSERT INTO ways (id, tags, coords) VALUES (?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET tags = excluded.tags, coords = excluded.coords
+    """
+
+    def __init__(self, path: str, max_memory: int = DEFAULT_MAX_MEMORY, _connection=None):
+        """Use ``create`` or ``open`` rather than calling this directly."""
+        self.path = path
+        self.max_memory = max_memory
+        self.connection = _connection
+        self._buffers: Dict[str, List[tuple]] = {'ways': [], 'relations': [], 'members': [],
+                                                 'used_ways': [], 'streets': []}
+        self._buffered_bytes = 0
+        self._relation_seq = 0
+        self._street_seq = 0
+        self._configure()
+
+    @classmethod
+    def create(cls, path: str, max_memory: int = DEFAULT_MAX_MEMORY) -> 'SpillStore':
+        """Start an empty store; it is written to ``<path>.tmp`` until ``finish``."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        connection = sqlite3.connect(tmp_path)
+        # Scratch data: no rollback journal or fsyncs; finish() moves the complete file into place
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.executescript(cls.SCHEMA)
+        return cls(path, max_memory, connection)
+
+    @classmethod
+    def open(cls, path: str, max_memory: int = DEFAULT_MAX_MEMORY) -> 'SpillStore':
+        """Open a finished store for reading."""
+        return cls(path, max_memory, sqlite3.connect(f"file:{path}?mode=ro", uri=True))
+
+    def _configure(self):
+        # Half the budget for SQLite's page cache (negative cache_size is in KiB), a quarter for buffers
+        self.connection.execute(f"PRAGMA cache_size = {-max(self.max_memory // 2 // 1024, 1024)}")
+        self.connection.execute("PRAGMA temp_store = FILE")
+
+    def _buffer(self, table: str, row: tuple, size: int):
+        self._buffers[table].append(row)
+        self._buffered_bytes += size + ROW_OVERHEAD_BYTES
+        if self._buffered_bytes >= self.max_memory // 4:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows to the database."""
+        if self._buffers['ways']:
+            self.connection.executemany(self._INSERT_WAY, self._buffers['ways'])
+        if self._buffers['relations']:
+            self.connection.executemany("INSERT INTO relations (seq, id, tags) VALUES (?, ?, ?)",
+                                        self._buffers['relations'])
+        if self._buffers['members']:
+            self.connection.executemany("INSERT INTO members VALUES (?, ?, ?)", self._buffers['members'])
+        if self._buffers['used_ways']:
+            self.connection.executemany("INSERT OR IGNORE INTO used_ways VALUES (?)", self._buffers['used_ways'])
+        if self._buffers['streets']:
+            self.connection.executemany("INSERT INTO streets VALUES (?, ?, ?, ?, ?)", self._buffers['streets'])
+        for rows in self._buffers.values():
+            rows.clear()
+        self._buffered_bytes = 0
+
+    def add_way(self, way_id: int, tags: Dict[str, str], coords: List[List[float]]):
+        encoded_tags, blob = dumps(tags).decode('utf-8'), encode_coords(coords)
+        self._buffer('ways', (way_id, encoded_tags, blob), len(encoded_tags) + len(blob))
+
+    def add_relation(self, relation_id: int, tags: Dict[str, str], member_refs: List[int]):
+        self._relation_seq += 1
+        encoded_tags = dumps(tags).decode('utf-8')
+        self._buffer('relations', (self._relation_seq, relation_id, encoded_tags), len(encoded_tags))
+        for position, ref in enumerate(member_refs):
+            self._buffer('members', (self._relation_seq, position, ref), 0)
+
+    def mark_used(self, way_ids: Iterable[int]):
+        """Record ways that belong to a relation street, so they are not parsed again on their own."""
+        for way_id in way_ids:
+            self._buffer('used_ways', (way_id,), 0)
+
+    def add_street(self, street) -> None:
+        """Store a parsed StreetSegment."""
+        self._street_seq += 1
+        record = dumps(street)
+        self._buffer('streets', (self._street_seq, street.name, street.suffix, len(street.coordinates), record),
+                     len(record))
+
+    def relations(self) -> Iterator[Tuple[int, Dict[str, str], List[int]]]:
+        """(relation id, tags, member way ids) in response order."""
+        self.flush()
+        rows = self.connection.execute("""
+            SELECT r.seq, r.id, r.tags, m.way_id FROM relations r
+            LEFT JOIN members m ON m.relation_seq = r.seq
+            ORDER BY r.seq, m.position
+        """)
+        for _, group in groupby(rows, key=lambda row: row[0]):
+            group = list(group)
+            yield group[0][1], loads(group[0][2]), [row[3] for row in group if row[3] is not None]
+
+    def ways(self, way_ids: List[int]) -> Dict[int, Tuple[Dict[str, str], List[List[float]]]]:
+        """Map way id -> (tags, [[lat, lon], ...]) for the given ids that are stored."""
+        self.flush()
+        found = {}
+        unique = list(dict.fromkeys(way_ids))
+        for start in range(0, len(unique), LOOKUP_BATCH):
+            batch = unique[start:start + LOOKUP_BATCH]
+            rows = self.connection.execute(
+                f"SELECT id, tags, coords FROM ways WHERE id IN ({','.join('?' * len(batch))})", batch)
+            for way_id, tags, coords in rows:
+                found[way_id] = (loads(tags), decode_coords(coords))
+        return found
+
+    def unused_ways(self) -> Iterator[Tuple[int, Dict[str, str], List[List[float]]]]:
+        """(way id, tags, coords) of the ways no relation claimed, in response order."""
+        self.flush()
+        rows = self.connection.execute(
+            "SELECT id, tags, coords FROM ways WHERE id NOT IN (SELECT id FROM used_ways) ORDER BY seq")
+        for way_id, tags, coords in rows:
+            yield way_id, loads(tags), decode_coords(coords)
+
+    def street_groups(self, street_type) -> Iterator[List]:
+        """Parsed streets grouped by (name, suffix), one group at a time.
+
+        Groups come in name order, and groups sharing a name in the order their
+        first street was parsed; streets within a group keep their parse order.
+
+        Args:
+            street_type: Class the stored records are decoded into (StreetSegment)
+        """
+        self.flush()
+        rows = self.connection.execute("""
+            SELECT s.name, s.suffix, s.record FROM streets s
+            JOIN (SELECT name, suffix, MIN(seq) AS first FROM streets GROUP BY name, suffix) g
+              ON g.name = s.name AND g.suffix = s.suffix
+            ORDER BY s.name, g.first, s.seq
+        """)
+        for _, group in groupby(rows, key=lambda row: (row[0], row[1])):
+            yield [street_type(**loads(record)) for _, _, record in group]
+
+    def street_counts(self) -> Dict[str, int]:
+        """Parsed streets, unique names, LineStrings and multi-line streets."""
+        self.flush()
+        streets, names, lines, multi = self.connection.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT name), COALESCE(SUM(lines), 0), "
+            "COALESCE(SUM(lines > 1), 0) FROM streets").fetchone()
+        return {'streets': streets, 'names': names, 'lines': lines, 'multi': multi}
+
+    def finish(self) -> 'SpillStore':
+        """Write the remaining rows, index the streets and move the store into place."""
+        self.flush()
+        self.connection.execute("CREATE INDEX idx_streets_name_suffix ON streets (name, suffix, seq)")
+        self.connection.commit()
+        self.connection.close()
+        os.replace(f"{self.path}.tmp", self.path)
+        self.connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        self._configure()
+        logger.debug(f"Spill store {self.path}: {os.path.getsize(self.path):,} bytes")
+        return self
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def load_spill_store(path: str) -> SpillStore:
+    return SpillStore.open(path)
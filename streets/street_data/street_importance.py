@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Street Importance
+=================
+
+Scores how prominent each street is so the map can show the most important
+streets first when zoomed out.
+
+The score (0-1) combines:
+
+- road class: the OSM ``highway`` tag (primary above residential above service)
+- length: longer streets matter more, on a log scale
+- connectivity: the number of streets it crosses (see street_intersections.py)
+
+Length and connectivity are scaled against fixed caps rather than the city's
+maximum, so a street's score does not shift when an unrelated street changes.
+Streets are written sorted by score, so a client takes the first N streets for
+a zoom level without sorting.
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import math
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional
+
+# Weight of each OSM highway class; *_link roads count half of their class
+HIGHWAY_CLASS_WEIGHTS = {
+    'motorway': 1.0,
+    'trunk': 0.95,
+    'primary': 0.9,
+    'secondary': 0.75,
+    'tertiary': 0.6,
+    'unclassified': 0.4,
+    'residential': 0.35,
+    'living_street': 0.25,
+    'pedestrian': 0.2,
+    'service': 0.1
+}
+
+# Weight of streets without a (known) class
+DEFAULT_CLASS_WEIGHT = 0.3
+
+# Share of each signal in the score
+CLASS_SHARE = 0.5
+LENGTH_SHARE = 0.3
+CONNECTIVITY_SHARE = 0.2
+
+# Length (miles) and crossing count that score full marks
+LENGTH_CAP = 10.0
+DEGREE_CAP = 30
+
+
+def class_weight(highway: Optional[str]) -> float:
+    """Weight (0-1) of an OSM highway class."""
+    if not highway:
+        return DEFAULT_CLASS_WEIGHT
+    if highway.endswith('_link'):
+        return HIGHWAY_CLASS_WEIGHTS.get(highway[:-len('_link')], DEFAULT_CLASS_WEIGHT) / 2
+    return HIGHWAY_CLASS_WEIGHTS.get(highway, DEFAULT_CLASS_WEIGHT)
+
+
+def best_highway_class(classes: Iterable[Optional[str]]) -> Optional[str]:
+    """The most important of several highway classes (None if there are none)."""
+    classes = [highway for highway in classes if highway]
+    return max(classes, key=class_weight) if classes else None
+
+
+def importance_score(highway: Optional[str], length: float, degree: int) -> float:
+    """Importance (0-1) from road class, length in miles and number of crossing streets."""
+    length_score = min(1.0, math.log1p(max(length, 0.0)) / math.log1p(LENGTH_CAP))
+    connectivity_score = min(1.0, math.log1p(degree) / math.log1p(DEGREE_CAP))
+    return round(CLASS_SHARE * class_weight(highway)
+                 + LENGTH_SHARE * length_score
+                 + CONNECTIVITY_SHARE * connectivity_score, 4)
+
+
+def importance_order(street: Dict) -> tuple:
+    """Sort key of a street record: most important first, then longest, then by name."""
+    return -street.get('importance', 0.0), -street.get('length', 0.0), street.get('full_name', '')
+
+
+def rank_streets(streets: List, intersections: Optional[Dict] = None) -> List:
+    """Score streets and sort them by importance.
+
+    Args:
+        streets: StreetSegments
+        intersections: Intersection index (see street_intersections.py); without it
+            connectivity counts as zero
+
+    Returns:
+        New StreetSegments with ``importance`` set, most important first
+    """
+    degrees = {}
+    if intersections:
+        degrees = {street_id: len(neighbours) for street_id, neighbours
+                   in zip(intersections['street_ids'], intersections['adjacency'])}
+
+    scored = [replace(street, importance=importance_score(street.highway, street.length,
+                                                          degrees.get(street.id, 0)))
+              for street in streets]
+    return sorted(scored, key=lambda s: (-s.importance, -s.length, s.full_name))
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Street Intersection Index
+=========================
+
+Finds which streets of a city cross each other, for hints and adjacency
+reveals in the game.
+
+Connections come from shared OSM nodes where the raw Overpass response
+provides node ids for a street's vertices (two ways meeting at a node are an
+at-grade intersection; a bridge crossing without a shared node is not).
+Lines without node ids fall back to geometry: an STRtree over all lines finds
+candidate pairs and shapely computes the exact segment intersections.
+
+The result is a compact index: street ids, an adjacency list of street
+indices, and the intersection points with the streets meeting at each.
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from overpass_store import OverpassStore
+
+logger = logging.getLogger(__name__)
+
+INTERSECTIONS_FORMAT_VERSION = 1
+
+# Decimal places kept for intersection points (≈ 1 cm)
+POINT_PRECISION = 7
+
+
+def node_ids_by_coordinate(data: Optional[Union[Dict, OverpassStore]]) -> Dict[Tuple[float, float], int]:
+    """Map (lat, lon) to OSM node id for every way vertex in an Overpass response or store."""
+    if isinstance(data, OverpassStore):
+        coords, node_ids = data.vertex_node_ids()
+        return dict(zip(map(tuple, coords.tolist()), node_ids.tolist()))
+
+    index = {}
+    for element in (data or {}).get('elements', []):
+        if element.get('type') != 'way':
+            continue
+        node_ids = element.get('nodes') or []
+        geometry = element.get('geometry') or []
+        if len(node_ids) != len(geometry):
+            continue
+        for node_id, point in zip(node_ids, geometry):
+            if point:
+                index[(point['lat'], point['lon'])] = node_id
+    return index
+
+
+def _node_intersections(lines: List[Tuple[int, List]], line_nodes: List[Optional[List[int]]],
+                        points: Dict) -> None:
+    """Add points where lines of different streets share a node id."""
+    keys, owners, latlon = [], [], []
+    for (street, line), nodes in zip(lines, line_nodes):
+        if nodes is None:
+            continue
+        keys.extend(nodes)
+        owners.extend([street] * len(nodes))
+        latlon.extend(line)
+    if not keys:
+        return
+
+    keys = np.asarray(keys, dtype=np.int64)
+    owners = np.asarray(owners, dtype=np.int64)
+    latlon = np.asarray(latlon, dtype=np.float64)
+
+    # Unique (node, street) pairs sorted by node; nodes seen with 2+ streets are intersections
+    pairs, first = np.unique(np.stack([keys, owners], axis=1), axis=0, return_index=True)
+    nodes, starts, counts = np.unique(pairs[:, 0], return_index=True, return_counts=True)
+    for node, start, count in zip(nodes[counts > 1], starts[counts > 1], counts[counts > 1]):
+        lat, lon = latlon[first[start]]
+        entry = points.setdefault(('node', int(node)), [float(lat), float(lon), set()])
+        entry[2].update(pairs[start:start + count, 1].tolist())
+
+
+def _geometric_intersections(lines: List[Tuple[int, List]], line_nodes: List[Optional[List[int]]],
+                             points: Dict) -> None:
+    """Add points where a line without node ids crosses a line of another street."""
+    fallback = np.asarray([i for i, nodes in enumerate(line_nodes) if nodes is None], dtype=np.int64)
+    if not len(fallback):
+        return
+
+    import shapely
+    from shapely.strtree import STRtree
+
+    latlon = np.asarray([point for _, line in lines for point in line], dtype=np.float64)
+    line_index = np.repeat(np.arange(len(lines)), [len(line) for _, line in lines])
+    geoms = shapely.linestrings(latlon[:, ::-1], indices=line_index)
+    streets = np.asarray([street for street, _ in lines], dtype=np.int64)
+    is_fallback = np.zeros(len(lines), dtype=bool)
+    is_fallback[fallback] = True
+
+    query_idx, tree_idx = STRtree(geoms).query(geoms[fallback], predicate='intersects')
+    a = fallback[query_idx]
+    b = tree_idx
+    # Skip lines of the same street, and report fallback/fallback pairs once
+    keep = (streets[a] != streets[b]) & (~is_fallback[b] | (a < b))
+    a, b = a[keep], b[keep]
+    if not len(a):
+        return
+
+    parts, pair_idx = shapely.get_parts(shapely.intersection(geoms[a], geoms[b]), return_index=True)
+    coords, part_idx = shapely.get_coordinates(parts, return_index=True)
+    # One point per intersection part (overlapping stretches are reported by their first point)
+    _, first = np.unique(part_idx, return_index=True)
+    for (lon, lat), pair in zip(coords[first], pair_idx[part_idx[first]]):
+        lat, lon = round(float(lat), POINT_PRECISION), round(float(lon), POINT_PRECISION)
+        entry = points.setdefault(('point', lat, lon), [lat, lon, set()])
+        entry[2].update((int(streets[a[pair]]), int(streets[b[pair]])))
+
+
+def compute_intersections(streets: List, data: Optional[Union[Dict, OverpassStore]] = None) -> Dict:
+    """Build the intersection index for a list of StreetSegments.
+
+    Args:
+        streets: Streets (MultiLineString coordinates in [lat, lon] order)
+        data: Raw Overpass response (or its OverpassStore) the streets were parsed from; supplies node ids
+
+    Returns:
+        Dict with ``street_ids``, ``adjacency`` (sorted neighbour indices per
+        street), ``points`` ([lat, lon]) and ``streets_at`` (street indices per point)
+    """
+    coordinate_nodes = node_ids_by_coordinate(data)
+
+    lines = [(i, line) for i, street in enumerate(streets) for line in street.coordinates if len(line) >= 2]
+    line_nodes = []
+    for _, line in lines:
+        nodes = [coordinate_nodes.get((lat, lon)) for lat, lon in line] if coordinate_nodes else [None]
+        line_nodes.append(None if None in nodes else nodes)
+
+    points: Dict[tuple, list] = {}
+    _node_intersections(lines, line_nodes, points)
+    _geometric_intersections(lines, line_nodes, points)
+
+    adjacency = [set() for _ in streets]
+    ordered = sorted(points.values(), key=lambda p: (p[0], p[1]))
+    for _, _, members in ordered:
+        for street in members:
+            adjacency[street].update(members)
+    for i, neighbours in enumerate(adjacency):
+        neighbours.discard(i)
+
+    with_nodes = sum(1 for nodes in line_nodes if nodes is not None)
+    logger.info(f"Found {len(ordered)} intersections between {len(streets)} streets "
+                f"({with_nodes}/{len(lines)} lines matched by node id)")
+
+    return {
+        'version': INTERSECTIONS_FORMAT_VERSION,
+        'street_ids': [street.id for street in streets],
+        'adjacency': [sorted(neighbours) for neighbours in adjacency],
+        'points': [[round(lat, POINT_PRECISION), round(lon, POINT_PRECISION)] for lat, lon, _ in ordered],
+        'streets_at': [sorted(members) for _, _, members in ordered]
+    }
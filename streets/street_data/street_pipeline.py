@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Street Data Pipeline
+====================
+
+Runs the street data build as a graph of stages:
+
+    boundary -> query -> fetch -> parse -> merge -> filter -> intersections -> write
+
+Every stage stores its artifact under ``<output_dir>/.build/<name>/`` and
+records the hashes of its inputs (code, configuration and upstream artifacts;
+see build_graph.py). With ``incremental=True`` only the stages whose inputs
+changed run again, so e.g. an edit to ``street_filters.json`` re-runs just
+``filter``, ``intersections`` and ``write`` from the stored Overpass response.
+
+Every finished stage is a checkpoint (the raw response in a memory-mapped
+columnar store, see overpass_store.py; street lists in a compact binary form,
+see checkpoint.py; with the fetcher's ``max_memory`` budget, the parsed
+streets in a SQLite spill store, see spill_store.py). ``resume=True`` continues
+an interrupted run from its last finished stage, and batches of cities track
+each city separately.
+
+After the outputs are written, the city's entry in ``manifest.json`` (the
+catalog of generated cities; see dataset_manifest.py) is refreshed.
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from boundary_simplifier import BoundarySimplifier, containing_simplification, geometry_hash
+from build_graph import BuildGraph, code_fingerprint, digest, save_json_artifact, load_json_artifact
+from checkpoint import BatchCheckpoint, load_streets_binary, save_streets_binary
+from city_boundary_fetcher import CityBoundary, boundary_from_geojson, boundary_slug, boundary_to_geojson
+from dataset_manifest import update_manifest
+from osm_street_fetcher import OSMStreetFetcher, StreetSegment
+from overpass_planner import OverpassQueryPlanner
+from overpass_store import STORE_FORMAT_VERSION, OverpassStore, load_overpass_store, save_overpass_store
+from spill_store import SpillStore
+import street_geometry
+import street_importance
+import street_intersections
+import street_shards
+
+logger = logging.getLogger(__name__)
+
+
+def load_street_filters(path: Optional[str]) -> Dict[str, List[str]]:
+    """Load ``street_filters.json`` (city_state -> excluded full names); missing file means no filters."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {key: value for key, value in data.items() if not key.startswith('_')}
+
+
+def apply_street_filters(streets: List[StreetSegment], excluded: List[str]) -> List[StreetSegment]:
+    """Drop streets whose full_name exactly matches one of the excluded names."""
+    if not excluded:
+        return streets
+    excluded = set(excluded)
+    kept = [street for street in streets if street.full_name not in excluded]
+    logger.info(f"Street filters removed {len(streets) - len(kept)} streets")
+    return kept
+
+
+def load_streets_artifact(path: str) -> List[StreetSegment]:
+    return load_streets_binary(path, StreetSegment)
+
+
+def save_boundary_artifact(boundary: Optional[CityBoundary], path: str):
+    save_json_artifact(boundary_to_geojson(boundary) if boundary else None, path)
+
+
+def load_boundary_artifact(path: str) -> Optional[CityBoundary]:
+    data = load_json_artifact(path)
+    return boundary_from_geojson(data) if data else None
+
+
+class StreetDataPipeline:
+    """Builds one street data file through the stage graph."""
+
+    STAGES = ('boundary', 'query', 'fetch', 'parse', 'merge', 'filter', 'intersections', 'write')
+
+    # Stage artifacts live in <output_dir>/.build/<output name>/
+    BUILD_DIR = '.build'
+
+    def __init__(self, fetcher: OSMStreetFetcher, street_filters: Optional[str] = 'street_filters.json',
+                 incremental: bool = False, force: Iterable[str] = (), resume: bool = False):
+        """Initialize the pipeline.
+
+        Args:
+            fetcher: Fetcher that does the actual work of each stage
+            street_filters: Path to ``street_filters.json`` (None to disable)
+            incremental: Re-run only the stages whose inputs changed
+            force: Stages to run even if their inputs are unchanged
+            resume: Continue interrupted runs from their last finished stage
+        """
+        self.fetcher = fetcher
+        self.street_filters = street_filters
+        self.incremental = incremental
+        self.force = tuple(force)
+        self.resume = resume
+        self.graph: Optional[BuildGraph] = None
+        self.graphs: Dict[str, BuildGraph] = {}
+
+    def build_region(self, region: str) -> Tuple[List[StreetSegment], Optional[str]]:
+        """Build street data for one of the fetcher's predefined regions."""
+        if region not in self.fetcher.REGIONS:
+            raise ValueError(f"Region '{region}' not supported. Available: {list(self.fetcher.REGIONS.keys())}")
+
+        region_info = self.fetcher.REGIONS[region]
+        return self.build(region_info, region, lambda: self.fetcher._get_or_fetch_boundary(region_info))
+
+    def build_city(self, city_name: str, state: str, country: str = "United States",
+                   output_name: Optional[str] = None) -> Tuple[List[StreetSegment], Optional[str]]:
+        """Build street data for a city, refreshing its boundary when the boundary stage runs."""
+        boundary_fetcher = self.fetcher.boundary_fetcher
+
+        def fetch_boundary() -> Optional[CityBoundary]:
+            boundary = boundary_fetcher.get_city_boundary(city_name, state, country)
+            if boundary:
+                boundary_fetcher.save_boundary(boundary)
+            else:
+                # Offline or upstream error: fall back to the saved copy
+                boundary = boundary_fetcher.load_boundary(boundary_slug(city_name, state))
+            return self.fetcher._validate_boundary(boundary) if boundary else None
+
+        region_info = {'name': city_name, 'city': city_name, 'state': state, 'bbox': None}
+        return self.build(region_info, output_name or boundary_slug(city_name, state), fetch_boundary,
+                          country=country)
+
+    def build_cities(self, cities: List[Tuple[str, str]],
+                     country: str = "United States") -> Dict[str, Tuple[str, Optional[str]]]:
+        """Build several cities, checkpointing each one as its own unit.
+
+        A failing city is recorded and the batch moves on. With ``resume`` the
+        cities finished by an interrupted batch are not built again.
+
+        Args:
+            cities: (city name, state) pairs
+            country: Country name
+
+        Returns:
+            Dict of output name -> (status, written file path)
+        """
+        units = {boundary_slug(city, state): (city, state) for city, state in cities}
+        batch_path = os.path.join(self.fetcher.output_dir, self.BUILD_DIR,
+                                  f"batch_{digest(sorted(units))[:12]}.json")
+        batch = BatchCheckpoint(batch_path, units, resume=self.resume)
+
+        results = {unit: ('done', batch.state['units'][unit].get('output'))
+                   for unit in units if batch.status(unit) == 'done'}
+        for unit in batch.pending():
+            city, state = units[unit]
+            try:
+                streets, path = self.build_city(city, state, country, unit)
+            except Exception as e:
+                logger.error(f"Build failed for {city}, {state}: {e}")
+                batch.mark(unit, 'failed', error=str(e))
+                results[unit] = ('failed', None)
+                continue
+
+            batch.mark(unit, 'done', output=path, streets=len(streets))
+            results[unit] = ('done' if streets else 'empty', path)
+
+        return results
+
+    def build(self, region_info: Dict, output_name: str, fetch_boundary,
+              country: str = "United States") -> Tuple[List[StreetSegment], Optional[str]]:
+        """Run the stage graph for one output file.
+
+        Args:
+            region_info: Region dict with 'city', 'state' and a fallback 'bbox'
+            output_name: Output name (``<output_name>_streets.json``)
+            fetch_boundary: Callable returning the validated CityBoundary (or None)
+            country: Country name, part of the boundary stage's inputs
+
+        Returns:
+            Tuple of (streets, written file path or None if no streets were found)
+        """
+        with self.fetcher.metrics.unit(unit=output_name):
+            return self._build(region_info, output_name, fetch_boundary, country)
+
+    def _build(self, region_info: Dict, output_name: str, fetch_boundary,
+               country: str) -> Tuple[List[StreetSegment], Optional[str]]:
+        from boundary_validator import validate_and_repair
+
+        fetcher = self.fetcher
+        graph = BuildGraph(os.path.join(fetcher.output_dir, self.BUILD_DIR, output_name),
+                           incremental=self.incremental, force=self.force, resume=self.resume,
+                           metrics=fetcher.metrics)
+        self.graph = self.graphs[output_name] = graph
+
+        slug = boundary_slug(region_info['city'], region_info.get('state'))
+        saved = fetcher.boundary_fetcher.load_boundary(slug)
+
+        boundary_stage = graph.stage('boundary', {
+            'code': code_fingerprint(OSMStreetFetcher._get_or_fetch_boundary, OSMStreetFetcher._validate_boundary,
+                                     validate_and_repair),
+            'unit': {'city': region_info['city'], 'state': region_info.get('state'), 'country': country,
+                     'validate': fetcher.validate_boundaries},
+            'source': geometry_hash(saved.geometry) if saved else None
+        }, fetch_boundary, save=save_boundary_artifact, load=load_boundary_artifact)
+
+        def build_query() -> str:
+            boundary = boundary_stage.value()
+            if boundary:
+                return fetcher._build_overpass_query_with_polygon(boundary.geometry,
+                                                                  fetcher._query_geometry(boundary))
+            if not region_info.get('bbox'):
+                raise ValueError(f"No boundary or bounding box available for {region_info['city']}")
+            logger.warning(f"Using fallback bounding box for {region_info['city']}")
+            return fetcher._build_overpass_query_with_bbox(region_info['bbox'])
+
+        query_stage = graph.stage('query', {
+            'code': code_fingerprint(OverpassQueryPlanner, containing_simplification, BoundarySimplifier,
+                                     OSMStreetFetcher._query_geometry,
+                                     OSMStreetFetcher._build_overpass_query_with_polygon,
+                                     OSMStreetFetcher._build_overpass_query_from_plan,
+                                     OSMStreetFetcher._build_overpass_query_with_bbox),
+            'boundary': boundary_stage,
+            'bbox': region_info.get('bbox')
+        }, build_query)
+
+        fetch_stage = graph.stage('fetch', {
+            'query': query_stage,
+            'endpoint': fetcher.overpass_url,
+            'store_format': STORE_FORMAT_VERSION
+        }, lambda: fetcher.fetch_overpass(query_stage.value()),
+            path=graph.artifact_path('fetch.overpass.npz'), save=save_overpass_store, load=load_overpass_store)
+
+        boundary = boundary_stage.value()
+        parse_info = dict(region_info, city=boundary.name if boundary else region_info['city'],
+                          state=region_info.get('state') or (boundary.state if boundary else None))
+
+        parse_code = [OSMStreetFetcher._parse_overpass_data, OSMStreetFetcher._overpass_records,
+                      OSMStreetFetcher._iter_overpass_records, OverpassStore, OSMStreetFetcher._street_name,
+                      OSMStreetFetcher._relation_street, OSMStreetFetcher._way_street,
+                      OSMStreetFetcher._parse_street_name, OSMStreetFetcher._is_highway_or_freeway,
+                      OSMStreetFetcher._calculate_length, OSMStreetFetcher._timed_length,
+                      OSMStreetFetcher._calculate_linestring_length,
+                      StreetSegment, street_importance.best_highway_class, street_importance.class_weight]
+        merge_code = [OSMStreetFetcher._deduplicate_and_merge_streets, OSMStreetFetcher._merge_street_segments,
+                      OSMStreetFetcher._merge_suffix_group, OSMStreetFetcher._line_key,
+                      OSMStreetFetcher._deduplicate_geometry, street_importance.best_highway_class]
+        
+        if fetcher.max_memory:
+            # Out of core: the parsed streets stay in a spill store, merged group by group
+            parse_path = graph.artifact_path('parse.streets.sqlite')
+            parse_stage = graph.stage('parse', {
+                'code': code_fingerprint(*parse_code, OSMStreetFetcher._parse_overpass_data_spilled, SpillStore),
+                'suffixes': OSMStreetFetcher.STREET_SUFFIXES,
+                'region': {'city': parse_info['city'], 'state': parse_info['state']},
+                'raw': fetch_stage
+            }, lambda: fetcher._parse_overpass_data_spilled(fetch_stage.value(), parse_info, parse_path),
+                path=parse_path, save=None, load=lambda path: SpillStore.open(path, fetcher.max_memory))
+            
+            def merge_spilled() -> List[StreetSegment]:
+                store = parse_stage.value()
+                try:
+                    return fetcher._merge_spilled_streets(store)
+                finally:
+                    store.close()
+            
+            merge_stage = graph.stage('merge', {
+                'code': code_fingerprint(*merge_code, OSMStreetFetcher._merge_spilled_streets, SpillStore),
+                'parsed': parse_stage
+            }, merge_spilled, path=graph.artifact_path('merge.streets.npz'),
+                save=save_streets_binary, load=load_streets_artifact)
+        else:
+            parse_stage = graph.stage('parse', {
+                'code': code_fingerprint(*parse_code),
+                'suffixes': OSMStreetFetcher.STREET_SUFFIXES,
+                'region': {'city': parse_info['city'], 'state': parse_info['state']},
+                'raw': fetch_stage
+            }, lambda: fetcher._parse_overpass_data(fetch_stage.value(), parse_info),
+                path=graph.artifact_path('parse.streets.npz'), save=save_streets_binary, load=load_streets_artifact)
+            
+            merge_stage = graph.stage('merge', {
+                'code': code_fingerprint(*merge_code),
+                'parsed': parse_stage
+            }, lambda: fetcher._deduplicate_and_merge_streets(parse_stage.value()),
+                path=graph.artifact_path('merge.streets.npz'), save=save_streets_binary, load=load_streets_artifact)
+        
+        excluded = load_street_filters(self.street_filters).get(output_name, [])
+
+        def filter_streets() -> List[StreetSegment]:
+            streets = merge_stage.value()
+            if boundary:
+                streets = fetcher._filter_streets_by_boundary(streets, boundary)
+                logger.info(f"Filtered to {len(streets)} streets within city boundary")
+            return apply_street_filters(streets, excluded)
+
+        filter_stage = graph.stage('filter', {
+            'code': code_fingerprint(OSMStreetFetcher._filter_streets_by_boundary, apply_street_filters),
+            'merged': merge_stage,
+            'boundary': boundary_stage,
+            'street_filters': excluded
+        }, filter_streets, path=graph.artifact_path('filter.streets.npz'),
+            save=save_streets_binary, load=load_streets_artifact)
+
+        streets = filter_stage.value()
+        if not streets:
+            graph.complete()
+            return [], None
+
+        # Crossing counts feed the importance score, so the index is built before the streets are written
+        intersections_path = os.path.join(fetcher.output_dir, f"{output_name}_intersections.json")
+
+        def build_intersections():
+            index = fetcher.compute_intersections(streets, fetch_stage.value())
+            fetcher.save_intersections(index, output_name)
+            return index
+
+        intersections_stage = graph.stage('intersections', {
+            'code': code_fingerprint(OSMStreetFetcher.compute_intersections, OSMStreetFetcher.save_intersections,
+                                     street_intersections),
+            'streets': filter_stage,
+            'raw': fetch_stage,
+            'output': intersections_path
+        }, build_intersections, path=intersections_path, save=None, load=load_json_artifact)
+
+        output_path = os.path.join(fetcher.output_dir, f"{output_name}_streets.json")
+        graph.stage('write', {
+            'code': code_fingerprint(OSMStreetFetcher.save_streets_data, street_shards, street_importance,
+                                     street_geometry),
+            'streets': filter_stage,
+            'intersections': intersections_stage,
+            'output': output_path,
+            'shard_bytes': fetcher.shard_bytes
+        }, lambda: fetcher.save_streets_data(street_geometry.annotate_geometry(
+            street_importance.rank_streets(streets, intersections_stage.value())), output_name),
+            path=output_path, save=None, load=None)
+
+        # The catalog covers every city, so it is refreshed on every build rather than tracked as a stage
+        with fetcher.metrics.stage('manifest'):
+            update_manifest(fetcher.output_dir, output_name)
+
+        graph.complete()
+        return streets, output_path
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Street Data Service
+===================
+
+A long-running asyncio HTTP service that builds street data on demand,
+instead of ahead of time with ``osm_street_fetcher.py``:
+
+- ``GET /streets?city=Berkeley&state=CA`` (or ``?region=san-francisco``):
+  the city's streets file, built on the first request
+- ``GET /boundary?city=Berkeley&state=CA``: the city's boundary GeoJSON
+- ``GET /metrics``: Prometheus metrics (queue depth, latency, cache, builds)
+- ``GET /health``: liveness and a short status summary
+
+Concurrent requests for the same city share one in-flight build. Builds run
+the incremental stage graph (street_pipeline.py) in a process pool, so the
+event loop keeps answering while cities are built, and a city built before
+is loaded from its stage artifacts instead of being fetched again. Responses
+are kept in memory in an LRU cache with a byte budget; a cached streets file
+is dropped when the file on disk changes (e.g. after a rebuild from the
+command line).
+
+Usage:
+    python street_service.py --port 8086
+    python street_service.py --workers 4 --cache-mb 512
+    python street_service.py --overpass-url http://127.0.0.1:8085/api/interpreter
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from city_boundary_fetcher import CityBoundaryFetcher, boundary_slug, boundary_to_geojson
+from osm_street_fetcher import OSMStreetFetcher
+from serialization import dumps
+from street_pipeline import StreetDataPipeline
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               500: 'Internal Server Error'}
+
+
+def build_dataset(settings: Dict, region_info: Dict, output_name: str) -> Optional[str]:
+    """Build one city's street data; runs in a worker process.
+
+    Returns:
+        Path of the written streets file, or None if no streets were found
+    """
+    fetcher = OSMStreetFetcher(settings['output_dir'], settings['boundary_dir'], settings['boundary_store'],
+                               overpass_url=settings['overpass_url'], shard_bytes=settings['shard_bytes'])
+    pipeline = StreetDataPipeline(fetcher, settings['street_filters'], incremental=True)
+    _, path = pipeline.build(region_info, output_name, lambda: fetcher._get_or_fetch_boundary(region_info))
+    return path
+
+
+def load_boundary_geojson(settings: Dict, city: str, state: str) -> Optional[bytes]:
+    """Saved boundary of a city as GeoJSON, fetching and saving it first if needed."""
+    fetcher = CityBoundaryFetcher(settings['boundary_dir'], store_path=settings['boundary_store'])
+    boundary = fetcher.load_boundary(boundary_slug(city, state))
+    if boundary is None:
+        boundary = fetcher.get_city_boundary(city, state)
+        if boundary:
+            fetcher.save_boundary(boundary)
+    return dumps(boundary_to_geojson(boundary)) if boundary else None
+
+
+def _init_worker(level: int):
+    """Configure logging in a build process (fresh interpreters start without it)."""
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _mtime(path: str) -> Optional[int]:
+    """Modification time of a file in nanoseconds, or None if it does not exist."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ByteLRUCache:
+    """Least-recently-used cache of byte strings within a total byte budget."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached value (marking it most recently used), or None."""
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: bytes) -> bool:
+        """Cache a value, evicting the least recently used entries to stay within the budget.
+
+        Returns:
+            False if the value alone exceeds the budget and was not cached
+        """
+        self.pop(key)
+        if len(value) > self.max_bytes:
+            return False
+        self._entries[key] = value
+        self.bytes += len(value)
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= len(evicted)
+            self.evictions += 1
+        return True
+
+    def pop(self, key: str) -> Optional[bytes]:
+        """Remove and return a cached value (None if absent)."""
+        value = self._entries.pop(key, None)
+        if value is not None:
+            self.bytes -= len(value)
+        return value
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram in the Prometheus layout."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+
+    def samples(self, name: str, labels: Dict[str, str]) -> List[Tuple[str, Dict[str, str], float]]:
+        """(metric name, labels, value) rows for the buckets, sum and count."""
+        rows = [(f"{name}_bucket", dict(labels, le=str(bound)), count)
+                for bound, count in zip(self.buckets, self.bucket_counts)]
+        rows.append((f"{name}_bucket", dict(labels, le='+Inf'), self.count))
+        rows.append((f"{name}_sum", labels, round(self.sum, 6)))
+        rows.append((f"{name}_count", labels, self.count))
+        return rows
+
+
+class StreetDataService:
+    """Serves street data and boundaries over HTTP, building cities on demand."""
+
+    ROUTES = ('/streets', '/boundary', '/metrics', '/health')
+
+    def __init__(self, output_dir: str = 'data', boundary_dir: str = 'boundary',
+                 boundary_store: Optional[str] = None, overpass_url: Optional[str] = None,
+                 street_filters: Optional[str] = 'street_filters.json', shard_bytes: Optional[int] = None,
+                 cache_bytes: int = 256 * 1024 * 1024, workers: Optional[int] = None,
+                 executor: Optional[Executor] = None):
+        """Initialize the service (call start() inside a running event loop).
+
+        Args:
+            output_dir: Directory for generated street data and build artifacts
+            boundary_dir: Directory for boundary GeoJSON files
+            boundary_store: Optional path to a SQLite boundary store (see boundary_store.py)
+            overpass_url: Overpass interpreter endpoint (default: the public server)
+            street_filters: Path to ``street_filters.json`` (None to disable)
+            shard_bytes: Also write spatial shards of about this many bytes (see street_shards.py)
+            cache_bytes: Memory budget of the response cache
+            workers: Build processes (default: one per CPU)
+            executor: Executor for builds instead of a process pool owned by the service
+        """
+        self.settings = {
+            'output_dir': output_dir,
+            'boundary_dir': boundary_dir,
+            'boundary_store': boundary_store,
+            'overpass_url': overpass_url,
+            'street_filters': street_filters,
+            'shard_bytes': shard_bytes
+        }
+        self.cache = ByteLRUCache(cache_bytes)
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = executor
+        self._owns_executor = executor is None
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.started_at = time.time()
+
+        # Loads in progress, shared by concurrent requests for the same key
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Modification time of the file each cached value was read from
+        self._source_mtimes: Dict[str, Optional[int]] = {}
+        self.jobs_in_flight = 0
+
+        self.requests: Dict[Tuple[str, int], int] = {}
+        self.request_latency: Dict[str, LatencyHistogram] = {}
+        self.builds: Dict[str, int] = {}
+        self.build_latency = LatencyHistogram()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_invalidations = 0
+        self.coalesced = 0
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8086) -> 'StreetDataService':
+        """Start listening (port 0 picks a free port)."""
+        if self.executor is None:
+            # Forked workers would inherit open client sockets and keep them from closing
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                mp_context=multiprocessing.get_context(method),
+                                                initializer=_init_worker,
+                                                initargs=(logging.getLogger().getEffectiveLevel(),))
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        logger.info(f"Street data service listening on http://{host}:{self.port}")
+        return self
+
+    async def stop(self):
+        """Stop listening and shut down the build processes."""
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        if self._owns_executor and self.executor:
+            await asyncio.to_thread(self.executor.shutdown, True, cancel_futures=True)
+            self.executor = None
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs submitted to the executor that are waiting for a free worker."""
+        return max(0, self.jobs_in_flight - self.workers)
+
+    async def _shared(self, key: str, load: Callable[[], Awaitable[Optional[bytes]]],
+                      source: Optional[str] = None) -> Optional[bytes]:
+        """Cached value for ``key``, or the result of one ``load`` shared by all concurrent callers.
+
+        Successful results are cached; failures and empty results are not, so
+        the next request tries again. With a ``source`` file, the cached value is
+        only used while the file's modification time is the one it had when the
+        value was loaded.
+        """
+        cached = self.cache.get(key)
+        if cached is not None and source is not None and self._source_mtimes.get(key) != _mtime(source):
+            logger.info(f"{source} changed; dropping the cached {key}")
+            self.cache.pop(key)
+            self.cache_invalidations += 1
+            cached = None
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.cache_misses += 1
+            task = self._inflight[key] = asyncio.ensure_future(load())
+            task.add_done_callback(lambda done: self._finish_load(key, done, source))
+
+        # A disconnecting client must not cancel the load the others are waiting for
+        return await asyncio.shield(task)
+
+    def _finish_load(self, key: str, task: asyncio.Future, source: Optional[str] = None):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None and task.result() is not None:
+            if self.cache.put(key, task.result()) and source is not None:
+                self._source_mtimes[key] = _mtime(source)
+
+    async def _run_job(self, func: Callable, *args):
+        """Run a CPU-heavy job in the executor, counting it towards the queue depth."""
+        self.jobs_in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.jobs_in_flight -= 1
+
+    async def _build_streets(self, region_info: Dict, output_name: str) -> Optional[bytes]:
+        logger.info(f"Building {output_name}")
+        start = time.perf_counter()
+        try:
+            path = await self._run_job(build_dataset, self.settings, region_info, output_name)
+        except Exception:
+            result = 'failed'
+            raise
+        else:
+            result = 'done' if path else 'empty'
+        finally:
+            self.build_latency.observe(time.perf_counter() - start)
+            self.builds[result] = self.builds.get(result, 0) + 1
+            logger.info(f"Build of {output_name}: {result} in {time.perf_counter() - start:.2f}s")
+
+        return await asyncio.to_thread(_read_bytes, path) if path else None
+
+    async def get_streets(self, params: Dict[str, List[str]]) -> Tuple[int, bytes, str]:
+        region = params.get('region', [None])[0]
+        if region:
+            if region not in OSMStreetFetcher.REGIONS:
+                return self._error(404, f"Unknown region '{region}'")
+            region_info, output_name = OSMStreetFetcher.REGIONS[region], region
+        else:
+            city, state = params.get('city', [None])[0], params.get('state', [None])[0]
+            if not city or not state:
+                return self._error(400, "city and state (or region) are required")
+            region_info = {'name': city, 'city': city, 'state': state, 'bbox': None}
+            output_name = boundary_slug(city, state)
+
+        streets_file = os.path.join(self.settings['output_dir'], f"{output_name}_streets.json")
+        body = await self._shared(f"streets/{output_name}", lambda: self._build_streets(region_info, output_name),
+                                  source=streets_file)
+        if body is None:
+            return self._error(404, f"No streets found for {output_name}")
+        return 200, body, 'application/json'
+
+    async def get_boundary(self, params: Dict[str, List[str]]) -> Tuple[int, bytes, str]:
+        city, state = params.get('city', [None])[0], params.get('state', [None])[0]
+        if not city or not state:
+            return self._error(400, "city and state are required")
+
+        # Loading a saved boundary is light work, so it skips the build queue
+        body = await self._shared(f"boundary/{boundary_slug(city, state)}",
+                                  lambda: asyncio.to_thread(load_boundary_geojson, self.settings, city, state))
+        if body is None:
+            return self._error(404, f"No boundary found for {city}, {state}")
+        return 200, body, 'application/geo+json'
+
+    def get_health(self) -> Tuple[int, bytes, str]:
+        return 200, dumps({
+            'status': 'ok',
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'jobs_in_flight': self.jobs_in_flight,
+            'queue_depth': self.queue_depth,
+            'cache_entries': len(self.cache),
+            'cache_bytes': self.cache.bytes
+        }), 'application/json'
+
+    async def handle(self, method: str, path: str, params: Dict[str, List[str]]) -> Tuple[int, bytes, str]:
+        """Answer one request with (status, body, content type)."""
+        if path not in self.ROUTES:
+            return self._error(404, f"Unknown path {path}")
+        if method != 'GET':
+            return self._error(405, f"{method} is not supported")
+        try:
+            if path == '/streets':
+                return await self.get_streets(params)
+            if path == '/boundary':
+                return await self.get_boundary(params)
+            if path == '/metrics':
+                return 200, self.metrics_text().encode('utf-8'), 'text/plain; version=0.0.4'
+            return self.get_health()
+        except Exception as e:
+            logger.error(f"Error handling {path}: {e!r}")
+            return self._error(500, str(e) or type(e).__name__)
+
+    @staticmethod
+    def _error(status: int, message: str) -> Tuple[int, bytes, str]:
+        return status, dumps({'error': message}), 'application/json'
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        start = time.perf_counter()
+        endpoint = 'unknown'
+        status = 500  # Until a response is written
+        try:
+            request_line = (await reader.readline()).decode('latin-1')
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass  # Headers are not needed
+
+            parts = request_line.split()
+            if len(parts) != 3:
+                status, body, content_type = self._error(400, "Malformed request line")
+            else:
+                url = urlsplit(parts[1])
+                if url.path in self.ROUTES:
+                    endpoint = url.path
+                status, body, content_type = await self.handle(parts[0], url.path, parse_qs(url.query))
+
+            writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                         f"Content-Type: {content_type}\r\n"
+                         f"Content-Length: {len(body)}\r\n"
+                         f"Connection: close\r\n\r\n".encode('latin-1') + body)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            status = 499  # Client went away
+        finally:
+            writer.close()
+            key = (endpoint, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.request_latency.setdefault(endpoint, LatencyHistogram())
+            histogram.observe(time.perf_counter() - start)
+
+    def metrics_text(self, prefix: str = 'street_service') -> str:
+        """Service metrics in the Prometheus text exposition format."""
+        metrics = [
+            ('requests_total', 'counter', 'HTTP requests by endpoint and status',
+             [('requests_total', {'endpoint': e, 'status': str(s)}, n) for (e, s), n in sorted(self.requests.items())]),
+            ('request_seconds', 'histogram', 'Request latency by endpoint',
+             [row for e, h in sorted(self.request_latency.items()) for row in h.samples('request_seconds', {'endpoint': e})]),
+            ('queue_depth', 'gauge', 'Build jobs waiting for a free worker',
+             [('queue_depth', {}, self.queue_depth)]),
+            ('jobs_in_flight', 'gauge', 'Build jobs queued or running',
+             [('jobs_in_flight', {}, self.jobs_in_flight)]),
+            ('workers', 'gauge', 'Build worker processes', [('workers', {}, self.workers)]),
+            ('builds_total', 'counter', 'Finished builds by result',
+             [('builds_total', {'result': r}, n) for r, n in sorted(self.builds.items())]),
+            ('build_seconds', 'histogram', 'Build duration, including time waiting for a worker',
+             self.build_latency.samples('build_seconds', {})),
+            ('coalesced_total', 'counter', 'Requests that joined an in-flight load',
+             [('coalesced_total', {}, self.coalesced)]),
+            ('cache_hits_total', 'counter', 'Requests answered from the cache', [('cache_hits_total', {}, self.cache_hits)]),
+            ('cache_misses_total', 'counter', 'Requests that started a load', [('cache_misses_total', {}, self.cache_misses)]),
+            ('cache_evictions_total', 'counter', 'Cache entries evicted to stay within the budget',
+             [('cache_evictions_total', {}, self.cache.evictions)]),
+            ('cache_invalidations_total', 'counter', 'Cached streets dropped because the file on disk changed',
+             [('cache_invalidations_total', {}, self.cache_invalidations)]),
+            ('cache_bytes', 'gauge', 'Bytes held in the cache', [('cache_bytes', {}, self.cache.bytes)]),
+            ('cache_entries', 'gauge', 'Entries held in the cache', [('cache_entries', {}, len(self.cache))]),
+        ]
+
+        lines = []
+        for name, kind, help_text, samples in metrics:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for sample, labels, value in samples:
+                label_text = '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '}' if labels else ''
+                lines.append(f"{prefix}_{sample}{label_text} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+async def serve(service: StreetDataService, host: str, port: int):
+    """Run the service until cancelled."""
+    await service.start(host, port)
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main():
+    """Main function to run the street data service."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve street data over HTTP, building cities on demand')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8086, help='Port to listen on (default: 8086)')
+    parser.add_argument('--output-dir', default='data', help='Output directory for data files (default: data)')
+    parser.add_argument('--boundary-dir', default='boundary', help='Directory for boundary files (default: boundary)')
+    parser.add_argument('--boundary-store', help='Path to a SQLite boundary store to use instead of GeoJSON files')
+    parser.add_argument('--overpass-url', help='Overpass interpreter endpoint (default: the public server)')
+    parser.add_argument('--street-filters', default='street_filters.json',
+                        help='Street filters file applied in the filter stage (default: street_filters.json)')
+    parser.add_argument('--shard-bytes', type=int, metavar='BYTES', help='Also write spatial shards of about BYTES each')
+    parser.add_argument('--cache-mb', type=float, default=256, help='Response cache budget in MB (default: 256)')
+    parser.add_argument('--workers', type=int, help='Build processes (default: one per CPU)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    service = StreetDataService(args.output_dir, args.boundary_dir, args.boundary_store, args.overpass_url,
+                                args.street_filters, args.shard_bytes, int(args.cache_mb * 1024 * 1024),
+                                args.workers)
+    print(f"Street data service at http://{args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Spatial Street Shards
+=====================
+
+Splits a city's streets into spatial shards so the client can load only the
+parts of the map it shows.
+
+The city is divided as a quadtree: a cell is split into four until the
+serialized streets assigned to it fit the byte budget. Each street belongs to
+exactly one shard, chosen by the center of its bounding box, so streets that
+cross a cell border are not duplicated; a shard's ``bbox`` therefore covers
+its streets' full extent and may reach beyond its ``cell``. Inside a shard,
+streets are stored in Hilbert curve order, which keeps neighbouring streets
+close together in the file.
+
+Output, in ``<output_dir>/<region>_shards/``:
+
+- ``<quadkey>.json``: the streets of one shard (quadkey digits: 0 SW, 1 SE, 2 NW, 3 NE)
+- ``index.json``: every shard with its file, cell, bbox, street count, size and hash
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import json
+import logging
+import os
+import shutil
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from build_graph import digest
+from street_geometry import PRECISION, compute_geometry
+
+logger = logging.getLogger(__name__)
+
+SHARDS_FORMAT_VERSION = 1
+
+# Quadtree depth limit (a level-12 cell of a 20 km city is ~5 m wide)
+MAX_DEPTH = 12
+
+# Bits per axis of the Hilbert curve grid
+HILBERT_ORDER = 16
+
+# Length of the content hashes written to the index
+HASH_LENGTH = 16
+
+# Largest difference between a street's rounded ``bbox`` and its coordinates
+BBOX_ROUNDING = 0.5 * 10 ** -PRECISION
+
+
+@dataclass
+class Shard:
+    """One spatial shard: its quadkey, cell and member street indices (Hilbert ordered)."""
+    key: str
+    cell: List[float]  # [south, west, north, east]
+    members: List[int]
+
+
+def hilbert_index(x: np.ndarray, y: np.ndarray, order: int = HILBERT_ORDER) -> np.ndarray:
+    """Position along a Hilbert curve of integer grid points in [0, 2**order)."""
+    n = 1 << order
+    x = x.astype(np.int64)
+    y = y.astype(np.int64)
+    d = np.zeros_like(x)
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx.astype(np.int64)) ^ ry.astype(np.int64))
+        # Rotate the quadrant so the curve stays continuous
+        flip = ~ry & rx
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        x, y = np.where(~ry, y, x), np.where(~ry, x, y)
+        s >>= 1
+    return d
+
+
+def street_bboxes(streets: List) -> np.ndarray:
+    """(N, 4) array of [south, west, north, east] per street ([lat, lon] MultiLineStrings).
+
+    Uses each street's ``bbox`` when set (see street_geometry.py), widened by
+    its rounding so it still contains every coordinate, and compute_geometry
+    for streets without one.
+    """
+    boxes = np.empty((len(streets), 4), dtype=np.float64)
+    missing = []
+    for i, street in enumerate(streets):
+        if street.bbox:
+            boxes[i] = street.bbox
+        else:
+            missing.append(i)
+    boxes[:, :2] -= BBOX_ROUNDING
+    boxes[:, 2:] += BBOX_ROUNDING
+    if missing:
+        boxes[missing] = compute_geometry([streets[i] for i in missing])['street_bboxes']
+    return boxes
+
+
+def plan_shards(boxes: np.ndarray, sizes: np.ndarray, max_bytes: int) -> List[Shard]:
+    """Quadtree partition of streets so each shard's size stays within ``max_bytes``.
+
+    Args:
+        boxes: Street bboxes, as returned by street_bboxes
+        sizes: Serialized size of each street in bytes
+        max_bytes: Target shard size (a single larger street still gets its own shard)
+
+    Returns:
+        Shards ordered by quadkey
+    """
+    if not len(boxes):
+        return []
+
+    lat = (boxes[:, 0] + boxes[:, 2]) / 2
+    lon = (boxes[:, 1] + boxes[:, 3]) / 2
+    south, west, north, east = lat.min(), lon.min(), lat.max(), lon.max()
+    # Pad so points on the north/east edge fall inside the last cell
+    pad = max(north - south, east - west, 1e-6) * 1e-9
+    root = [float(south), float(west), float(north + pad), float(east + pad)]
+
+    grid = (1 << HILBERT_ORDER) - 1
+    hx = np.floor((lon - root[1]) / (root[3] - root[1]) * grid)
+    hy = np.floor((lat - root[0]) / (root[2] - root[0]) * grid)
+    hilbert = hilbert_index(hx, hy)
+
+    shards = []
+    stack = [('', root, np.arange(len(boxes)))]
+    while stack:
+        key, cell, members = stack.pop()
+        if sizes[members].sum() <= max_bytes or len(members) == 1 or len(key) >= MAX_DEPTH:
+            order = members[np.argsort(hilbert[members], kind='stable')]
+            shards.append(Shard(key or '0', cell, order.tolist()))
+            continue
+
+        s, w, n, e = cell
+        mid_lat, mid_lon = (s + n) / 2, (w + e) / 2
+        north_half = lat[members] >= mid_lat
+        east_half = lon[members] >= mid_lon
+        quadrants = [
+            (~north_half & ~east_half, [s, w, mid_lat, mid_lon]),
+            (~north_half & east_half, [s, mid_lon, mid_lat, e]),
+            (north_half & ~east_half, [mid_lat, w, n, mid_lon]),
+            (north_half & east_half, [mid_lat, mid_lon, n, e]),
+        ]
+        for digit, (mask, child) in enumerate(quadrants):
+            if mask.any():
+                stack.append((key + str(digit), child, members[mask]))
+
+    return sorted(shards, key=lambda shard: shard.key)
+
+
+def write_shards(streets: List, records: List[str], region: str, output_dir: str, max_bytes: int,
+                 generated_at: Optional[int] = None) -> str:
+    """Write a city's streets as spatial shards plus an index.
+
+    Args:
+        streets: StreetSegments (for geometry)
+        records: The JSON serialization of each street, in the same order
+        region: Output name, e.g. ``oakland_ca``
+        output_dir: Directory for the ``<region>_shards`` folder
+        max_bytes: Target shard size in bytes
+        generated_at: Generation timestamp recorded in the index
+
+    Returns:
+        Path of the shard index
+    """
+    boxes = street_bboxes(streets)
+    sizes = np.asarray([len(record.encode('utf-8')) + 1 for record in records], dtype=np.int64)
+    shards = plan_shards(boxes, sizes, max_bytes)
+
+    shard_dir = os.path.join(output_dir, f"{region}_shards")
+    tmp_dir = f"{shard_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    entries = []
+    for shard in shards:
+        body = (f'{{"region":{json.dumps(region)},"shard":"{shard.key}","streets":['
+                + ','.join(records[i] for i in shard.members) + ']}').encode('utf-8')
+        filename = f"{shard.key}.json"
+        with open(os.path.join(tmp_dir, filename), 'wb') as f:
+            f.write(body)
+
+        member_boxes = boxes[shard.members]
+        # Rounded outwards so the bbox still contains every coordinate
+        south, west = np.floor(member_boxes[:, :2].min(axis=0) * 1e6) / 1e6
+        north, east = np.ceil(member_boxes[:, 2:].max(axis=0) * 1e6) / 1e6
+        entries.append({
+            'id': shard.key,
+            'file': filename,
+            'cell': [round(v, 6) for v in shard.cell],
+            'bbox': [float(south), float(west), float(north), float(east)],
+            'streets': len(shard.members),
+            'bytes': len(body),
+            'sha256': digest(body)[:HASH_LENGTH]
+        })
+
+    index = {
+        'version': SHARDS_FORMAT_VERSION,
+        'region': region,
+        'generated_at': generated_at,
+        'max_bytes': max_bytes,
+        'total_streets': len(streets),
+        'total_miles': round(sum(s.length for s in streets), 2),
+        'shards': entries
+    }
+    with open(os.path.join(tmp_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+
+    # Swap the whole folder so no stale shards from an earlier layout remain
+    shutil.rmtree(shard_dir, ignore_errors=True)
+    os.replace(tmp_dir, shard_dir)
+
+    logger.info(f"Wrote {len(entries)} shards of up to {max_bytes:,} bytes to {shard_dir}")
+    return os.path.join(shard_dir, 'index.json')
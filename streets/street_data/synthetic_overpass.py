@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Synthetic Overpass Responses
+============================
+
+Generates Overpass API responses (``out geom`` format, as returned by the
+street queries) of any size for offline tests and benchmarks. Streets are laid
+out inside a boundary's bounding box and split into ways; the generator
+controls:
+
+- ``n_elements``: approximate total element count (nodes + ways + relations)
+- ``relation_share``: share of street names grouped by an associatedStreet relation
+- ``vertices_per_way``: geometry vertices per way
+- ``ways_per_name``: how many ways share each street name (name repetition)
+- ``outside_share``: share of streets placed just outside the bounding box
+
+Author: Street Names Challenge Team
+License: MIT
+"""
+
+import random
+from typing import Dict, List, Optional
+
+# Vertex spacing along a street (≈ 55 m)
+STEP_DEGREES = 0.0005
+
+NAME_WORDS = ['Oak', 'Pine', 'Maple', 'Cedar', 'Elm', 'Willow', 'Birch', 'Walnut', 'Cherry', 'Spruce',
+              'Hill', 'Lake', 'Park', 'River', 'Sunset', 'Valley', 'Ridge', 'Meadow', 'Harbor', 'Forest']
+SUFFIX_WORDS = ['Street', 'Avenue', 'Boulevard', 'Drive', 'Road', 'Way', 'Place', 'Court', 'Lane', 'Terrace']
+HIGHWAY_CLASSES = ['residential'] * 6 + ['tertiary', 'secondary', 'primary', 'unclassified', 'living_street']
+
+
+def street_name(index: int) -> str:
+    """Deterministic, unique, parseable street name for an index."""
+    word = NAME_WORDS[index % len(NAME_WORDS)]
+    suffix = SUFFIX_WORDS[(index // len(NAME_WORDS)) % len(SUFFIX_WORDS)]
+    return f"{word} {index} {suffix}"
+
+
+def generate_overpass_response(bbox: List[float], n_elements: int = 10000, relation_share: float = 0.05,
+                               vertices_per_way: int = 8, ways_per_name: int = 3,
+                               outside_share: float = 0.05, include_nodes: bool = True,
+                               seed: Optional[int] = 0) -> Dict:
+    """Generate a synthetic Overpass response.
+
+    Args:
+        bbox: Area to fill, as [south, west, north, east]
+        n_elements: Approximate number of elements to generate
+        relation_share: Share of street names that get an associatedStreet relation
+        vertices_per_way: Vertices per way
+        ways_per_name: Consecutive ways per street name
+        outside_share: Share of streets placed outside ``bbox`` (exercise boundary filtering)
+        include_nodes: Emit node elements for way vertices, as ``(._;>;)`` does
+        seed: Random seed (None for nondeterministic output)
+
+    Returns:
+        Dict with an ``elements`` list in Overpass JSON format
+    """
+    rng = random.Random(seed)
+    south, west, north, east = bbox
+
+    # Elements per street name: its ways, their nodes and (sometimes) a relation
+    per_way = 1 + (vertices_per_way if include_nodes else 0)
+    per_name = ways_per_name * per_way + relation_share
+    n_names = max(1, round(n_elements / per_name))
+
+    nodes, ways, relations = [], [], []
+    next_node_id = 1
+    next_way_id = 1
+
+    for index in range(n_names):
+        name = street_name(index)
+        highway = rng.choice(HIGHWAY_CLASSES)
+
+        # Pick a start point and an axis-aligned direction, like a street grid
+        lat = rng.uniform(south, north)
+        lon = rng.uniform(west, east)
+        if rng.random() < outside_share:
+            lat = north + rng.uniform(0.01, 0.05)
+        dlat, dlon = rng.choice([(STEP_DEGREES, 0.0), (0.0, STEP_DEGREES), (-STEP_DEGREES, 0.0), (0.0, -STEP_DEGREES)])
+
+        way_ids = []
+        for _ in range(ways_per_name):
+            geometry = []
+            node_ids = []
+            for _ in range(vertices_per_way):
+                point = {'lat': round(lat, 7), 'lon': round(lon, 7)}
+                geometry.append(point)
+                node_ids.append(next_node_id)
+                if include_nodes:
+                    nodes.append({'type': 'node', 'id': next_node_id, **point})
+                next_node_id += 1
+                lat += dlat
+                lon += dlon
+            # Consecutive ways share their end vertex, as real street ways do
+            lat -= dlat
+            lon -= dlon
+
+            ways.append({
+                'type': 'way',
+                'id': next_way_id,
+                'bounds': {
+                    'minlat': min(p['lat'] for p in geometry), 'minlon': min(p['lon'] for p in geometry),
+                    'maxlat': max(p['lat'] for p in geometry), 'maxlon': max(p['lon'] for p in geometry)
+                },
+                'nodes': node_ids,
+                'geometry': geometry,
+                'tags': {'highway': highway, 'name': name}
+            })
+            way_ids.append(next_way_id)
+            next_way_id += 1
+
+        if rng.random() < relation_share:
+            relations.append({
+                'type': 'relation',
+                'id': index + 1,
+                'members': [{'type': 'way', 'ref': way_id, 'role': 'street'} for way_id in way_ids],
+                'tags': {'type': 'associatedStreet', 'name': name}
+            })
+
+    return {
+        'version': 0.6,
+        'generator': 'synthetic_overpass',
+        'osm3s': {'copyright': 'Synthetic data for testing'},
+        'elements': relations + ways + nodes
+    }
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for the synthetic Overpass generator and processing benchmark
+=========================================================================
+
+Checks that generated responses honour the requested size and shape, that a
+small benchmark run covers every processing step, and that slower steps are
+flagged against a baseline.
+"""
+
+import copy
+import logging
+import sys
+from collections import Counter
+
+from benchmark_pipeline import STEPS, compare_to_baseline, run_benchmark
+from synthetic_overpass import generate_overpass_response
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BBOX = [37.70, -122.52, 37.81, -122.36]
+
+
+def test_generator_shape():
+    """Element count, vertices per way, name repetition and relation share follow the parameters."""
+    data = generate_overpass_response(BBOX, 20000, relation_share=0.5, vertices_per_way=5, ways_per_name=4)
+    types = Counter(el['type'] for el in data['elements'])
+    assert abs(len(data['elements']) - 20000) < 200
+
+    ways = [el for el in data['elements'] if el['type'] == 'way']
+    assert all(len(way['geometry']) == 5 for way in ways)
+    assert types['node'] == 5 * types['way']
+
+    names = Counter(way['tags']['name'] for way in ways)
+    assert set(names.values()) == {4}
+    assert 0.4 < types['relation'] / len(names) < 0.6
+
+    assert generate_overpass_response(BBOX, 1000) == generate_overpass_response(BBOX, 1000)
+
+
+def test_benchmark_and_regressions():
+    """A small run times every step; a step twice as slow as the baseline is flagged."""
+    current = run_benchmark(sizes=[2000])
+    result = current['results']['2000']
+    assert set(result['seconds']) == set(STEPS)
+    assert 0 < result['kept'] <= result['streets']
+
+    assert compare_to_baseline(current, current) == []
+
+    baseline = copy.deepcopy(current)
+    baseline['results']['2000']['seconds']['process'] = result['seconds']['process'] / 2
+    regressions = compare_to_baseline(current, baseline)
+    if result['seconds']['process'] >= 0.005:
+        assert len(regressions) == 1 and regressions[0].startswith('process @ 2,000 elements')
+
+    # Different generator parameters are not comparable
+    baseline['params'] = dict(baseline['params'], seed=1)
+    assert compare_to_baseline(current, baseline) == []
+
+
+if __name__ == '__main__':
+    try:
+        test_generator_shape()
+        test_benchmark_and_regressions()
+        print("✅ Benchmark tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
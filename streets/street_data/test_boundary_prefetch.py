@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk boundary prefetching
+=========================================
+
+Builds a small repository archive from the saved boundaries and checks the
+city index, archive prefetch and 404 caching without touching the network.
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+import zipfile
+
+import requests
+
+from city_boundary_fetcher import CityBoundaryFetcher
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary')
+
+
+def make_archive(path: str):
+    """Write a zip laid out like the upstream repository archive."""
+    with zipfile.ZipFile(path, 'w') as archive:
+        for filename, member in [('berkeley_ca.geojson', 'ca/berkeley.json'),
+                                 ('oakland_ca.geojson', 'ca/oakland.json'),
+                                 ('seattle_wa.geojson', 'wa/seattle.json')]:
+            archive.write(os.path.join(BOUNDARY_DIR, filename),
+                          f"geojson-us-city-boundaries-master/cities/{member}")
+
+
+def test_archive_prefetch_and_index():
+    """Prefetching a state from the archive saves its cities and indexes all states."""
+    with tempfile.TemporaryDirectory() as tmp:
+        archive_path = os.path.join(tmp, 'cities.zip')
+        make_archive(archive_path)
+
+        fetcher = CityBoundaryFetcher(os.path.join(tmp, 'boundary'))
+        results = fetcher.prefetch_from_archive(['California'], archive_path)
+        print(f"📥 Archive prefetch: {results}")
+
+        assert results == {'ca/berkeley': 'saved', 'ca/oakland': 'saved'}
+        assert fetcher.list_saved_boundaries() == ['berkeley_ca', 'oakland_ca']
+        assert fetcher.get_available_cities('WA') == ['seattle']
+
+        # Availability checks are answered from the index
+        assert fetcher.is_city_available('Oakland', 'CA') is True
+        assert fetcher.is_city_available('Gotham', 'CA') is False
+        assert fetcher.is_city_available('Portland', 'OR') is None
+
+        # A second run leaves existing boundaries alone
+        again = fetcher.prefetch_from_archive(['CA'], archive_path)
+        assert set(again.values()) == {'cached'}
+
+
+def test_negative_cache():
+    """A 404 is cached so the same city is not requested again."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = CityBoundaryFetcher(tmp)
+        requested = []
+
+        def not_found(url, **kwargs):
+            requested.append(url)
+            response = requests.Response()
+            response.status_code = 404
+            response.url = url
+            return response
+
+        fetcher.session.get = not_found
+
+        assert fetcher.prefetch_boundaries([('Gotham', 'NJ')]) == {'gotham_nj': 'missing'}
+        assert fetcher.get_city_boundary('Gotham', 'NJ') is None
+        assert len(requested) == 1
+
+        # The cache is persisted and honoured by a fresh fetcher
+        with open(os.path.join(tmp, CityBoundaryFetcher.NEGATIVE_CACHE_FILE), 'r', encoding='utf-8') as f:
+            assert 'nj/gotham' in json.load(f)
+        assert CityBoundaryFetcher(tmp).is_city_available('Gotham', 'NJ') is False
+
+
+if __name__ == '__main__':
+    try:
+        test_archive_prefetch_and_index()
+        test_negative_cache()
+        print("✅ Boundary prefetch tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
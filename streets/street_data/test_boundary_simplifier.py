@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for the Boundary Simplifier
+=======================================
+
+Checks that the query level of every saved boundary contains the real
+boundary, that the display level is small, and that levels are cached.
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+from shapely.geometry import shape
+
+from boundary_simplifier import BoundarySimplifier, CACHED_LEVELS, count_points
+from city_boundary_fetcher import CityBoundaryFetcher
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary')
+
+
+def test_resolution_levels():
+    """Query levels contain the boundary; display levels shrink it."""
+    fetcher = CityBoundaryFetcher(BOUNDARY_DIR)
+    simplifier = BoundarySimplifier(BOUNDARY_DIR)
+
+    for name in fetcher.list_saved_boundaries():
+        boundary = fetcher.load_boundary(name)
+        resolutions = simplifier.build(boundary.geometry)
+        exact = shape(boundary.geometry)
+
+        query = shape(resolutions.query)
+        display = shape(resolutions.display)
+        print(f"📐 {name}: query {count_points(query)} / display {count_points(display)} / "
+              f"exact {count_points(exact)} points")
+
+        assert query.covers(exact), f"{name} query level does not contain the boundary"
+        assert count_points(query) <= BoundarySimplifier.MAX_QUERY_POINTS
+        assert display.is_valid
+        assert count_points(display) < count_points(exact)
+        assert resolutions.filter is boundary.geometry
+
+
+def test_levels_are_cached():
+    """Levels are written next to the boundary and rebuilt only when it changes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(os.path.join(BOUNDARY_DIR, 'san_francisco_ca.geojson'), tmp)
+        boundary = CityBoundaryFetcher(tmp).load_boundary('san_francisco_ca')
+        simplifier = BoundarySimplifier(tmp)
+
+        first = simplifier.get_resolutions(boundary)
+        files = sorted(os.listdir(os.path.join(tmp, 'resolutions')))
+        # The filter level is the boundary geometry itself and is not written again
+        assert files == sorted(f"san_francisco_ca_{level}.geojson" for level in CACHED_LEVELS)
+
+        mtimes = [os.path.getmtime(os.path.join(tmp, 'resolutions', f)) for f in files]
+        second = simplifier.get_resolutions(boundary)
+        assert second.source_hash == first.source_hash
+        assert mtimes == [os.path.getmtime(os.path.join(tmp, 'resolutions', f)) for f in files]
+        assert shape(simplifier.get_level(boundary, 'query')).equals(shape(first.query))
+        assert second.filter is boundary.geometry and simplifier.get_level(boundary, 'filter') is boundary.geometry
+
+
+if __name__ == '__main__':
+    try:
+        test_resolution_levels()
+        test_levels_are_cached()
+        print("✅ Boundary simplifier tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
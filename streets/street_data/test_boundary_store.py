@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script for the Boundary Store
+==================================
+
+Imports the saved boundary/*.geojson files into a temporary SQLite store and
+checks lookups by name, by bounding box, by point and the GeoJSON round trip. Runs
+offline against the boundaries checked into this repository.
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from shapely.geometry import shape
+
+from boundary_store import BoundaryStore
+from city_boundary_fetcher import CityBoundaryFetcher
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary')
+
+
+def test_import_and_lookup():
+    """Import every saved boundary and look them up by slug, name and bbox."""
+    with tempfile.TemporaryDirectory() as tmp:
+        with BoundaryStore(os.path.join(tmp, 'boundaries.sqlite')) as store:
+            imported = store.import_geojson_dir(BOUNDARY_DIR)
+            print(f"📥 Imported {len(imported)} boundaries")
+            assert 'los_angeles_ca' in imported
+            assert store.list_slugs() == sorted(imported)
+
+            boundary = store.find('san francisco', 'ca')
+            assert boundary is not None
+            assert boundary.name == 'San Francisco'
+            assert boundary.geometry['type'] == 'MultiPolygon'
+
+            # A small box around downtown Oakland only touches East Bay bboxes
+            matches = store.query_bbox([37.80, -122.28, 37.81, -122.27])
+            print(f"📦 Boundaries near downtown Oakland: {matches}")
+            assert 'oakland_ca' in matches
+            assert 'seattle_wa' not in matches
+            assert 'new_york_ny' not in matches
+
+            assert store.metadata('new_york_ny')['geometry_type'] == 'MultiPolygon'
+
+
+def test_geojson_round_trip():
+    """Exported files should match the original GeoJSON layout and geometry."""
+    with tempfile.TemporaryDirectory() as tmp:
+        with BoundaryStore(os.path.join(tmp, 'boundaries.sqlite')) as store:
+            store.import_geojson(os.path.join(BOUNDARY_DIR, 'berkeley_ca.geojson'))
+            exported = store.export_geojson('berkeley_ca', os.path.join(tmp, 'berkeley_ca.geojson'))
+
+        with open(os.path.join(BOUNDARY_DIR, 'berkeley_ca.geojson'), 'r', encoding='utf-8') as f:
+            original = json.load(f)
+        with open(exported, 'r', encoding='utf-8') as f:
+            round_trip = json.load(f)
+
+        assert round_trip['type'] == 'FeatureCollection'
+        original_props = original['features'][0]['properties']
+        props = round_trip['features'][0]['properties']
+        for key in ('name', 'state', 'country', 'area_km2'):
+            assert props[key] == original_props[key]
+
+        original_geom = shape(original['features'][0]['geometry'])
+        assert shape(round_trip['features'][0]['geometry']).equals_exact(original_geom, 0)
+
+
+def test_fetcher_with_store():
+    """CityBoundaryFetcher should save to and load from the store when configured."""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = CityBoundaryFetcher(BOUNDARY_DIR)
+        boundary = source.load_boundary('seattle_wa')
+
+        fetcher = CityBoundaryFetcher(os.path.join(tmp, 'boundary'),
+                                      store_path=os.path.join(tmp, 'boundaries.sqlite'))
+        location = fetcher.save_boundary(boundary)
+        print(f"💾 Saved to {location}")
+
+        assert fetcher.list_saved_boundaries() == ['seattle_wa']
+        assert not os.listdir(os.path.join(tmp, 'boundary'))
+
+        loaded = fetcher.load_boundary('seattle_wa')
+        assert loaded.name == 'Seattle'
+        assert fetcher.find_boundary('Seattle', 'WA') is not None
+        assert [b.name for b in fetcher.find_boundaries_in_bbox([47.6, -122.35, 47.61, -122.34])] == ['Seattle']
+        fetcher.store.close()
+
+
+def test_point_lookup():
+    """Reverse lookups should assign points to the saved city that contains them."""
+    fetcher = CityBoundaryFetcher(BOUNDARY_DIR)
+    points = [
+        [37.8044, -122.2712],   # Downtown Oakland
+        [37.8716, -122.2727],   # UC Berkeley
+        [40.7580, -73.9855],    # Times Square
+        [47.6062, -122.3321],   # Downtown Seattle
+        [36.1699, -115.1398],   # Las Vegas (not saved)
+    ]
+    assert fetcher.locate_points(points) == ['oakland_ca', 'berkeley_ca', 'new_york_ny', 'seattle_wa', None]
+
+
+if __name__ == '__main__':
+    try:
+        test_import_and_lookup()
+        test_geojson_round_trip()
+        test_fetcher_with_store()
+        test_point_lookup()
+        print("✅ Boundary store tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
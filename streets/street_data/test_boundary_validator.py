@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for the Boundary Validator
+======================================
+
+Checks the vectorized coordinate checks, multi-feature validation, repairs
+written to an output directory and the process-pool file validation.
+"""
+
+import glob
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from shapely.geometry import shape
+
+from boundary_validator import BoundaryValidator, ValidationCache, validate_and_repair, validate_files
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary')
+
+SQUARE = [[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]
+BOWTIE = [[0, 0], [1, 1], [1, 0], [0, 1], [0, 0]]
+
+
+def feature(ring):
+    return {"type": "Feature", "properties": {"name": "Test"},
+            "geometry": {"type": "Polygon", "coordinates": [ring]}}
+
+
+def test_coordinate_issues():
+    """Exact duplicates are reported as both duplicate and very close points."""
+    validator = BoundaryValidator()
+    geometry = {"type": "Polygon",
+                "coordinates": [[[0, 0], [1, 0], [1, 0], [1, 1], [1, 1 + 1e-12], [0, 1], [0, 0]]]}
+    assert validator._check_coordinate_issues(geometry) == [
+        "Exterior ring has duplicate consecutive coordinates at position 1",
+        "Exterior ring has very close consecutive coordinates at position 1",
+        "Exterior ring has very close consecutive coordinates at position 3",
+    ]
+
+
+def test_validate_file_all_features_and_fix():
+    """Every feature is validated and invalid ones are repaired into output_dir."""
+    validator = BoundaryValidator()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'two_features.geojson')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"type": "FeatureCollection", "features": [feature(SQUARE), feature(BOWTIE)]}, f)
+
+        output_dir = os.path.join(tmp, 'fixed')
+        report = validator.validate_file(path, fix=True, output_dir=output_dir)
+
+        assert report['feature_count'] == 2
+        assert [f['valid'] for f in report['features']] == [True, False]
+        assert report['features'][1]['fix']['method'] == 'make_valid'
+        assert os.path.dirname(report['fixed_file']) == output_dir
+
+        # The report must be plain JSON
+        json.dumps(report)
+
+        fixed = validator.validate_file(report['fixed_file'])
+        assert fixed['valid']
+
+
+def test_validate_files_pool():
+    """The process pool returns one report per file, in input order."""
+    files = sorted(glob.glob(os.path.join(BOUNDARY_DIR, '*.geojson')))
+    reports = validate_files(files, workers=2)
+    assert [r['file'] for r in reports] == files
+    assert all(r['valid'] for r in reports)
+    assert validate_files([], workers=4) == []
+
+
+def test_validation_cache():
+    """Repairs are cached by geometry hash and reused on the next lookup."""
+    bowtie = feature(BOWTIE)['geometry']
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ValidationCache(tmp)
+
+        repaired, entry, hit = validate_and_repair(bowtie, cache)
+        assert not hit
+        assert not entry['valid']
+        assert repaired['type'] == 'MultiPolygon'
+
+        again, entry, hit = validate_and_repair(bowtie, cache)
+        assert hit
+        assert shape(again).equals(shape(repaired))
+
+        square = feature(SQUARE)['geometry']
+        unchanged, entry, hit = validate_and_repair(square, cache)
+        assert unchanged is square and entry['valid'] and not hit
+        assert len(os.listdir(tmp)) == 2
+
+
+if __name__ == '__main__':
+    try:
+        test_coordinate_issues()
+        test_validate_file_all_features_and_fix()
+        test_validate_files_pool()
+        test_validation_cache()
+        print("✅ Boundary validator tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
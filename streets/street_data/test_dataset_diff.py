@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for dataset diffs and patches
+=========================================
+
+Diffs two versions of a small dataset, applies the patch back, and publishes
+both versions to check the snapshots, patch files and manifest.
+"""
+
+import copy
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from dataset_diff import apply_patch, diff_datasets, publish
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def street(name, lon, length=0.5):
+    return {'id': f"berkeley_way_{abs(int(lon * 1e4))}", 'name': name.rsplit(' ', 1)[0], 'suffix': 'AVE',
+            'full_name': name, 'coordinates': [[[37.86, lon], [37.87, lon]]], 'length': length,
+            'city': 'Berkeley', 'state': 'CA', 'discovered': False, 'discovery_time': None}
+
+
+def dataset(streets, generated_at):
+    return {'region': 'berkeley_ca', 'generated_at': generated_at, 'total_streets': len(streets),
+            'total_miles': round(sum(s['length'] for s in streets), 2), 'streets': streets}
+
+
+OLD = dataset([street('SHATTUCK AVE', -122.2685), street('TELEGRAPH AVE', -122.259),
+               street('COLLEGE AVE', -122.253)], 1000)
+
+
+def regenerated():
+    new = copy.deepcopy(OLD)
+    new['generated_at'] = 2000
+    new['streets'][0]['discovered'] = True  # client state only: not a change
+    new['streets'][1]['coordinates'][0].append([37.88, -122.259])
+    new['streets'][1]['length'] = 0.8
+    del new['streets'][2]
+    new['streets'].append(street('ASHBY AVE', -122.27))
+    return new
+
+
+def test_diff_and_apply():
+    """The patch lists only real changes and reproduces the new dataset."""
+    new = regenerated()
+    patch = diff_datasets(OLD, new)
+    assert [s['full_name'] for s in patch['added']] == ['ASHBY AVE']
+    assert patch['removed'] == ['COLLEGE AVE']
+    assert patch['changed'] == [{'key': 'TELEGRAPH AVE', 'fields': {
+        'coordinates': new['streets'][1]['coordinates'], 'length': 0.8}}]
+    assert patch['from'] != patch['to']
+
+    patched = apply_patch(OLD, patch)
+    assert [s['full_name'] for s in patched['streets']] == ['SHATTUCK AVE', 'TELEGRAPH AVE', 'ASHBY AVE']
+    assert patched['streets'][1] == new['streets'][1]
+    assert patched['total_miles'] == 1.8
+
+    # The patch only applies to its base version
+    try:
+        apply_patch(new, patch)
+        assert False, "patch applied to the wrong base"
+    except ValueError:
+        pass
+
+    assert diff_datasets(OLD, OLD)['from'] == diff_datasets(OLD, OLD)['to']
+
+
+def test_publish_versions():
+    """Publishing keeps a snapshot per version and a patch from the previous latest version."""
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path, new_path = os.path.join(tmp, 'old.json'), os.path.join(tmp, 'berkeley_ca_streets.json')
+        with open(old_path, 'w', encoding='utf-8') as f:
+            json.dump(OLD, f)
+        with open(new_path, 'w', encoding='utf-8') as f:
+            json.dump(regenerated(), f, indent=2)
+
+        out_dir = os.path.join(tmp, 'patches')
+        first = publish(old_path, out_dir)
+        assert len(first['versions']) == 1 and first['patches'] == []
+
+        manifest = publish(new_path, out_dir)
+        assert len(manifest['versions']) == 2 and len(manifest['patches']) == 1
+        entry = manifest['patches'][0]
+        assert (entry['from'], entry['to']) == (first['latest'], manifest['latest'])
+        assert (entry['added'], entry['removed'], entry['changed']) == (1, 1, 1)
+        assert entry['bytes'] < os.path.getsize(new_path)
+
+        region_dir = os.path.join(out_dir, 'berkeley_ca')
+        with open(os.path.join(region_dir, entry['file']), 'r', encoding='utf-8') as f:
+            patch = json.load(f)
+        with open(os.path.join(region_dir, first['versions'][0]['file']), 'r', encoding='utf-8') as f:
+            assert apply_patch(json.load(f), patch)['streets'][1:] == regenerated()['streets'][1:]
+
+        # Publishing the same data again adds nothing
+        again = publish(new_path, out_dir)
+        assert len(again['versions']) == 2 and len(again['patches']) == 1
+
+
+if __name__ == '__main__':
+    try:
+        test_diff_and_apply()
+        test_publish_versions()
+        print("✅ Dataset diff tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for the generated dataset manifest
+==============================================
+
+Builds a city through the pipeline and checks its manifest entry (files,
+sizes, hashes, bbox, view and totals), then that entries of other cities
+survive updates and that the manifest can be rebuilt from the data directory.
+"""
+
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+from dataset_manifest import MANIFEST_FILE, initial_view, rebuild_manifest, update_manifest
+from osm_street_fetcher import OSMStreetFetcher
+from test_street_pipeline import run, synthetic_response
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary')
+
+
+def test_build_updates_manifest():
+    """A build writes its city's entry; other cities are kept and missing files are dropped."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR)
+        fetcher._fetch_from_overpass = lambda query: synthetic_response()
+
+        streets, path, _ = run(fetcher, None)
+        with open(os.path.join(tmp, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        entry = manifest['cities']['berkeley_ca']
+        assert set(entry['files']) == {'json', 'intersections'}
+        assert entry['files']['json']['file'] == 'berkeley_ca_streets.json'
+        assert entry['files']['json']['bytes'] == os.path.getsize(path)
+        assert len(entry['files']['json']['sha256']) == 16
+        assert entry['streets'] == len(streets) == 3
+        assert entry['name'] == 'Berkeley' and entry['state'] == 'CA'
+        south, west, north, east = entry['bbox']
+        assert south == 37.86 and north == 37.876 and west == -122.28 and east == -122.259
+        assert entry['view']['zoom'] == 15
+
+        # Another city's entry survives; a city without a streets file is removed
+        shutil.copyfile(path, os.path.join(tmp, 'albany_ca_streets.json'))
+        update_manifest(tmp, 'albany_ca')
+        os.remove(path)
+        manifest = update_manifest(tmp, 'berkeley_ca')
+        assert list(manifest['cities']) == ['albany_ca']
+
+        assert list(rebuild_manifest(tmp)['cities']) == ['albany_ca']
+
+
+def test_initial_view():
+    """Zoom decreases as the city gets larger."""
+    berkeley = initial_view([37.845, -122.310, 37.895, -122.235])
+    los_angeles = initial_view([33.70, -118.67, 34.34, -118.15])
+    assert berkeley['center'] == [37.87, -122.2725]
+    assert berkeley['zoom'] > los_angeles['zoom'] >= 9
+
+
+if __name__ == '__main__':
+    try:
+        test_build_updates_manifest()
+        test_initial_view()
+        print("✅ Dataset manifest tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for pipeline instrumentation
+========================================
+
+Runs the pipeline against a canned Overpass response and checks that every
+stage (including the network split into time to first byte, download and
+JSON decode) is measured, and that metrics export as JSON and Prometheus text.
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+
+import requests
+
+from instrumentation import Instrumentation
+from osm_street_fetcher import OSMStreetFetcher
+from street_pipeline import StreetDataPipeline
+from test_street_pipeline import REGION, synthetic_response
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary')
+
+
+def canned_post(url, data=None, **kwargs):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(synthetic_response()).encode('utf-8')
+    return response
+
+
+def test_pipeline_stage_metrics():
+    """Every stage and network sub-stage is timed and counted."""
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics = Instrumentation(trace_memory=True)
+        fetcher = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR, metrics=metrics)
+        fetcher.session.post = canned_post
+
+        try:
+            pipeline = StreetDataPipeline(fetcher, None)
+            pipeline.build(REGION, 'berkeley_ca', lambda: fetcher._get_or_fetch_boundary(REGION))
+        finally:
+            metrics.stop()
+        print(metrics.summary())
+
+        stages = {record.name: record for record in metrics.stages.values()}
+        assert set(stages) == {'boundary', 'query', 'fetch', 'fetch.ttfb', 'fetch.download', 'fetch.json_decode',
+                               'parse', 'parse.length', 'merge', 'filter', 'write',
+                               'intersections', 'manifest'}
+        assert stages['fetch'].counts['elements'] == 3
+        assert stages['fetch'].counts['bytes'] > 0
+        assert stages['parse.length'].calls == 3
+        assert stages['write'].counts['streets'] == 3
+        assert all(r.labels == {'unit': 'berkeley_ca'} for r in stages.values())
+        assert all(r.memory_source == 'tracemalloc' for r in stages.values())
+        assert stages['fetch'].peak_memory_bytes >= stages['fetch.json_decode'].peak_memory_bytes
+        assert stages['fetch'].wall_seconds >= stages['fetch.download'].wall_seconds
+
+        prometheus = metrics.to_prometheus()
+        assert 'street_pipeline_stage_wall_seconds{stage="fetch.ttfb",unit="berkeley_ca"}' in prometheus
+        assert 'street_pipeline_stage_items{kind="elements",stage="fetch",unit="berkeley_ca"} 3' in prometheus
+
+        exported = json.loads(metrics.to_json())
+        assert len(exported['stages']) == len(stages)
+
+
+def test_nested_peak_memory():
+    """A parent stage's peak includes allocations made in its child stages."""
+    metrics = Instrumentation(trace_memory=True)
+    with metrics.stage('outer'):
+        with metrics.stage('inner'):
+            block = bytearray(5_000_000)
+            del block
+        small = bytearray(1000)
+    metrics.stop()
+
+    records = {record.name: record for record in metrics.stages.values()}
+    assert records['outer.inner'].peak_memory_bytes >= 5_000_000
+    assert records['outer'].peak_memory_bytes >= records['outer.inner'].peak_memory_bytes
+    assert len(small) == 1000
+
+
+if __name__ == '__main__':
+    try:
+        test_pipeline_stage_metrics()
+        test_nested_peak_memory()
+        print("✅ Instrumentation tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for side-effect-free library imports
+================================================
+
+Imports each library module in a fresh interpreter and checks that it
+configures no logging, creates no files and leaves the heavy dependencies
+(requests, geopy, numpy, shapely) unimported until they are used.
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+HEAVY = ('requests', 'geopy', 'numpy', 'shapely')
+
+PROBE = """
+import logging, sys
+import {module}
+print(','.join(sorted(m for m in {heavy!r} if m in sys.modules)))
+print(len(logging.getLogger().handlers))
+"""
+
+
+def import_in_fresh_interpreter(module: str, cwd: str):
+    """Return (heavy modules loaded, root logger handlers) after importing ``module``."""
+    env = dict(os.environ, PYTHONPATH=HERE)
+    result = subprocess.run([sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY)],
+                            cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    loaded, handlers = result.stdout.split('\n')[:2]
+    return [m for m in loaded.split(',') if m], int(handlers)
+
+
+def test_imports_are_light_and_side_effect_free():
+    """Library modules import without logging setup, files or heavy dependencies."""
+    with tempfile.TemporaryDirectory() as tmp:
+        for module in ('osm_street_fetcher', 'city_boundary_fetcher', 'boundary_simplifier',
+                       'overpass_planner', 'dataset_manifest', 'dataset_diff', 'spill_store'):
+            loaded, handlers = import_in_fresh_interpreter(module, tmp)
+            assert loaded == [], f"{module} imported {loaded}"
+            assert handlers == 0, f"{module} configured logging"
+        assert os.listdir(tmp) == []
+
+        # The validator is the geometry subsystem itself, but still must not configure logging
+        _, handlers = import_in_fresh_interpreter('boundary_validator', tmp)
+        assert handlers == 0
+
+
+if __name__ == '__main__':
+    try:
+        test_imports_are_light_and_side_effect_free()
+        print("✅ Library import tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
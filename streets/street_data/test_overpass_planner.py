@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test script for the Overpass Query Planner
+==========================================
+
+Checks that every plan covers the whole boundary (including every component
+of a MultiPolygon), respects the per-clause point budget, and that the query
+contains one statement pair per planned clause. Also checks the area-scaled
+query limits and the quadrant restriction used to split queries.
+"""
+
+import logging
+import os
+import sys
+
+import shapely
+from shapely.geometry import box, shape
+
+from boundary_simplifier import BoundarySimplifier
+from city_boundary_fetcher import CityBoundaryFetcher
+from osm_street_fetcher import OSMStreetFetcher
+from overpass_planner import (MAX_MAXSIZE, MAX_TIMEOUT_S, MIN_MAXSIZE, MIN_TIMEOUT_S, OverpassQueryPlanner,
+                              bbox_area_km2, quadrants, query_extent, query_limits, query_timeout,
+                              restrict_query)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary')
+
+
+def clause_geometry(clause):
+    """Rebuild a clause's area (lon/lat) from its Overpass filter text."""
+    if clause.kind == 'bbox':
+        south, west, north, east = map(float, clause.filter.split(','))
+        return box(west, south, east, north)
+    values = list(map(float, clause.filter[len('poly:"'):-1].split()))
+    return shapely.Polygon(list(zip(values[1::2], values[0::2])))
+
+
+def test_plans_cover_boundaries():
+    """Every saved boundary is covered by the union of its plan's clauses."""
+    fetcher = CityBoundaryFetcher(BOUNDARY_DIR)
+    planner = OverpassQueryPlanner()
+
+    for name in fetcher.list_saved_boundaries():
+        boundary = fetcher.load_boundary(name)
+        exact = shape(boundary.geometry)
+        query_level = BoundarySimplifier(BOUNDARY_DIR).build(boundary.geometry).query
+        for plan in (planner.plan(boundary.geometry), planner.plan(boundary.geometry, query_level)):
+            print(f"🗺️  {name}: {plan.describe()}")
+
+            covered = shapely.union_all([clause_geometry(c) for c in plan.clauses])
+            assert covered.covers(exact), f"{name} plan does not cover the boundary"
+            assert all(c.points <= planner.max_poly_points for c in plan.clauses if c.kind == 'poly')
+            assert plan.candidates[plan.strategy] == min(plan.candidates.values())
+
+
+def test_plan_uses_query_level():
+    """Polygon clauses come from the cached query level, unless it does not cover the boundary."""
+    boundary = CityBoundaryFetcher(BOUNDARY_DIR).load_boundary('san_francisco_ca')
+    query_level = BoundarySimplifier(BOUNDARY_DIR).build(boundary.geometry).query
+    planner = OverpassQueryPlanner()
+    exact = shape(boundary.geometry)
+
+    plan = planner.plan(boundary.geometry, query_level)
+    polygons = planner._query_level_clauses(query_level, exact, exact.centroid.y)
+    assert plan.candidates['polygons'] == planner._cost(polygons)
+
+    # A level that misses part of the boundary is ignored
+    shrunk = exact.buffer(-0.01).__geo_interface__
+    assert planner._query_level_clauses(shrunk, exact, exact.centroid.y) is None
+    assert planner.plan(boundary.geometry, shrunk).candidates == planner.plan(boundary.geometry).candidates
+
+
+def test_multipolygon_query():
+    """Each component of a MultiPolygon gets its own statements in the query."""
+    fetcher = CityBoundaryFetcher(BOUNDARY_DIR)
+    boundary = fetcher.load_boundary('new_york_ny')
+    components = shapely.get_parts(shape(boundary.geometry))
+    assert len(components) > 1
+
+    plan = OverpassQueryPlanner().plan(boundary.geometry)
+    for component in components:
+        assert any(clause_geometry(c).covers(component) for c in plan.clauses)
+
+    query = OSMStreetFetcher(boundary_dir=BOUNDARY_DIR)._build_overpass_query_from_plan(plan)
+    assert query.count('way["highway"') == len(plan.clauses)
+    assert query.count('relation["type"="associatedStreet"]') == len(plan.clauses)
+
+
+def test_query_limits():
+    """Timeout and maxsize grow with the area, within their bounds, and reach the query header."""
+    assert query_limits(1) == (MIN_TIMEOUT_S, MIN_MAXSIZE)
+    assert query_limits(1e6) == (MAX_TIMEOUT_S, MAX_MAXSIZE)
+    assert query_limits(None) == (MAX_TIMEOUT_S, MAX_MAXSIZE)
+    small, large = query_limits(200), query_limits(400)
+    assert small[0] < large[0] and small[1] < large[1]
+
+    boundary = CityBoundaryFetcher(BOUNDARY_DIR).load_boundary('new_york_ny')
+    plan = OverpassQueryPlanner().plan(boundary.geometry)
+    query = OSMStreetFetcher(boundary_dir=BOUNDARY_DIR)._build_overpass_query_from_plan(plan)
+    timeout, maxsize = query_limits(plan.area_km2)
+    assert timeout > MIN_TIMEOUT_S
+    assert f"[out:json][timeout:{timeout}][maxsize:{maxsize}];" in query
+    assert query_timeout(query) == timeout
+
+
+def test_restrict_query():
+    """Quadrant queries chain the quadrant box onto every spatial filter."""
+    boundary = CityBoundaryFetcher(BOUNDARY_DIR).load_boundary('new_york_ny')
+    plan = OverpassQueryPlanner().plan(boundary.geometry)
+    query = OSMStreetFetcher(boundary_dir=BOUNDARY_DIR)._build_overpass_query_from_plan(plan)
+
+    extent = query_extent(query)
+    covered = shapely.union_all([clause_geometry(c) for c in plan.clauses])
+    assert box(extent[1], extent[0], extent[3], extent[2]).covers(covered)
+
+    pieces = quadrants(extent)
+    assert shapely.union_all([box(p[1], p[0], p[3], p[2]) for p in pieces]).equals(
+        box(extent[1], extent[0], extent[3], extent[2]))
+
+    sw = pieces[0]
+    piece_query = restrict_query(query, sw)
+    chained = f"({sw[0]},{sw[1]},{sw[2]},{sw[3]})"
+    assert piece_query.count(chained) == 2 * len(plan.clauses)
+    assert query_timeout(piece_query) == query_limits(bbox_area_km2(sw))[0]
+    assert '(._;>;);' in piece_query
+    assert query_extent('[out:json];way["name"];out geom;') is None
+
+
+if __name__ == '__main__':
+    try:
+        test_plans_cover_boundaries()
+        test_plan_uses_query_level()
+        test_multipolygon_query()
+        test_query_limits()
+        test_restrict_query()
+        print("✅ Overpass planner tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test script for the columnar Overpass store
+===========================================
+
+Converts a synthetic Overpass response to the store and checks that it
+round-trips, is written deterministically, opens memory-mapped, and parses
+into exactly the streets the JSON response gives.
+"""
+
+import logging
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from build_graph import file_digest
+from osm_street_fetcher import OSMStreetFetcher
+from overpass_store import OverpassStore, load_overpass_store, save_overpass_store
+from street_intersections import node_ids_by_coordinate
+from synthetic_overpass import generate_overpass_response
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BBOX = [37.845, -122.310, 37.895, -122.235]
+REGION = {'city': 'Berkeley', 'state': 'CA'}
+
+
+def response():
+    data = generate_overpass_response(BBOX, n_elements=500, seed=7)
+    data['elements'][0]['tags']['name:zh'] = '橡樹街'  # non-ASCII strings
+    return data
+
+
+def test_round_trip_and_memmap():
+    """The stored response decodes back unchanged, from memory-mapped arrays, byte-identically."""
+    data = response()
+    with tempfile.TemporaryDirectory() as tmp:
+        first, second = os.path.join(tmp, 'a.npz'), os.path.join(tmp, 'b.npz')
+        save_overpass_store(data, first)
+        save_overpass_store(OverpassStore.from_overpass(data), second)
+        assert file_digest(first) == file_digest(second)
+
+        store = load_overpass_store(first)
+        assert isinstance(store.arrays['coords'], np.memmap)
+        assert len(store) == len(data['elements'])
+        assert store.to_overpass() == data
+
+        # np.load reads the same file as a regular archive
+        with np.load(first) as archive:
+            assert np.array_equal(archive['ids'], store.arrays['ids'])
+
+
+def test_parse_from_store():
+    """Parsing the store gives the same streets and node index as parsing the JSON response."""
+    data = response()
+    fetcher = OSMStreetFetcher()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'fetch.overpass.npz')
+        save_overpass_store(data, path)
+        store = load_overpass_store(path)
+
+        assert fetcher._process_overpass_data(store, REGION) == fetcher._process_overpass_data(data, REGION)
+        assert node_ids_by_coordinate(store) == node_ids_by_coordinate(data)
+
+
+def test_empty_response():
+    """A response without elements stores and parses to nothing."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'empty.npz')
+        save_overpass_store({'version': 0.6, 'elements': []}, path)
+        store = load_overpass_store(path)
+        assert store.to_overpass() == {'version': 0.6, 'elements': []}
+        assert OSMStreetFetcher()._parse_overpass_data(store, REGION) == []
+
+
+if __name__ == '__main__':
+    try:
+        test_round_trip_and_memmap()
+        test_parse_from_store()
+        test_empty_response()
+        print("✅ Overpass store tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Test script for the Overpass stand-in server
+============================================
+
+Points the fetcher at a local stand-in and checks fixture selection, retries
+through injected 429/504 errors and truncated bodies, injected latency and
+the concurrent slot limit. Queries the server can't answer whole ("runtime
+error" remarks, repeated truncation) are split into quadrants and merged.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+
+import requests
+
+from instrumentation import Instrumentation
+from osm_street_fetcher import OSMStreetFetcher, OverpassQueryTooLarge
+from overpass_planner import bbox_area_km2, query_extent, query_limits, query_timeout
+from overpass_stub_server import FaultConfig, OverpassStubServer, query_key, save_fixture
+from test_street_pipeline import synthetic_response
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary')
+
+QUERY = '[out:json][timeout:60];\nway["highway"]["name"](37.84,-122.32,37.91,-122.23);\nout geom;'
+
+
+def make_fetcher(tmp, server, metrics=None):
+    fetcher = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR, metrics=metrics,
+                               overpass_url=server.url)
+    fetcher.RETRY_BACKOFF_SECONDS = 0.01
+    return fetcher
+
+
+def test_fixture_and_retries():
+    """Recorded fixtures are matched by query; 429, 504 and truncated bodies are retried."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = os.path.join(tmp, 'fixtures')
+        save_fixture(fixtures, QUERY, json.dumps(synthetic_response()).encode('utf-8'))
+        assert query_key(QUERY) == query_key('  ' + QUERY.replace('\n', ' '))
+
+        faults = FaultConfig(script=['429', '504', 'truncate'])
+        with OverpassStubServer(fixtures, faults) as server:
+            fetcher = make_fetcher(tmp, server)
+            try:
+                fetcher._fetch_from_overpass(QUERY)
+                assert False, "three injected failures should exhaust three attempts"
+            except requests.exceptions.RequestException:
+                pass
+
+            data = fetcher._fetch_from_overpass(QUERY)
+            assert data == synthetic_response()
+            assert server.stats == {'requests': 4, '429': 1, '504': 1, 'truncate': 1, 'ok': 1}
+
+            # Whitespace differences select the same fixture
+            assert fetcher._fetch_from_overpass(QUERY + ' ') == synthetic_response()
+
+            # Unknown queries get deterministic synthetic data
+            other = fetcher._fetch_from_overpass('way(1);out geom;')
+            assert len(other['elements']) > 1000
+            assert fetcher._fetch_from_overpass('way(1);out geom;') == other
+
+
+def test_latency_and_slots():
+    """Injected latency shows up as time to first byte; requests over the slot limit get 429."""
+    with tempfile.TemporaryDirectory() as tmp:
+        with OverpassStubServer(faults=FaultConfig(latency=0.3, slots=1), synthetic_elements=200) as server:
+            metrics = Instrumentation()
+            fetcher = make_fetcher(tmp, server, metrics)
+            with metrics.stage('fetch'):
+                fetcher._fetch_from_overpass(QUERY)
+            ttfb = [r for r in metrics.stages.values() if r.name == 'fetch.ttfb'][0]
+            assert ttfb.wall_seconds >= 0.3
+
+            statuses = []
+            def post():
+                statuses.append(requests.post(server.url, data=QUERY, timeout=10).status_code)
+            threads = [threading.Thread(target=post) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert sorted(statuses) == [200, 429]
+            assert server.stats['rejected_slots'] == 1
+            assert '1 slots available now' in requests.get(server.url.replace('interpreter', 'status')).text
+
+
+def test_too_large_queries_are_split():
+    """A runtime error remark or two truncated bodies split the query instead of retrying it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        with OverpassStubServer(faults=FaultConfig(script=['remark']), synthetic_elements=200) as server:
+            metrics = Instrumentation()
+            fetcher = make_fetcher(tmp, server, metrics)
+            try:
+                fetcher._fetch_from_overpass(QUERY)
+                assert False, "a runtime error remark should not be retried"
+            except OverpassQueryTooLarge as e:
+                assert 'timed out' in str(e)
+            assert server.stats['requests'] == 1
+
+        with OverpassStubServer(faults=FaultConfig(script=['remark']), synthetic_elements=200) as server:
+            fetcher = make_fetcher(tmp, server, metrics)
+            with metrics.stage('fetch'):
+                data = fetcher.fetch_overpass(QUERY)
+            assert 'remark' not in data
+            assert server.stats == {'requests': 5, 'remark': 1, 'ok': 4}
+            assert len(data['elements']) == len({(el['type'], el['id']) for el in data['elements']})
+            fetch = [r for r in metrics.stages.values() if r.name == 'fetch'][0]
+            assert fetch.counts['splits'] == 1
+
+        with OverpassStubServer(faults=FaultConfig(script=['truncate', 'truncate']),
+                                synthetic_elements=200) as server:
+            fetcher = make_fetcher(tmp, server)
+            fetcher.fetch_overpass(QUERY)
+            assert server.stats['requests'] == 6 and server.stats['truncate'] == 2
+
+
+def test_recursive_split():
+    """Pieces that are still too large are split again; edge elements are merged once."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR)
+        full_area = bbox_area_km2(query_extent(QUERY))
+        queries = []
+
+        def fake_fetch(query):
+            queries.append(query)
+            # The last filter in the query is the smallest box it is restricted to
+            south, west, north, east = map(float, re.findall(r'\(([-\d.,]+)\)', query)[-1].split(','))
+            if bbox_area_km2([south, west, north, east]) > full_area / 10:
+                raise OverpassQueryTooLarge('runtime error: Query run out of memory')
+            # Every piece returns the same edge way, plus one of its own
+            own = int(abs(south * 1e4)) * 100000 + int(abs(west * 1e4))
+            return {'version': 0.6, 'elements': [{'type': 'way', 'id': 1}, {'type': 'way', 'id': own}]}
+
+        fetcher._fetch_from_overpass = fake_fetch
+        data = fetcher.fetch_overpass(QUERY)
+
+        # Whole query, 4 quadrants (all too large), then 16 pieces
+        assert len(queries) == 1 + 4 + 16
+        assert data['version'] == 0.6
+        assert [el['id'] for el in data['elements']].count(1) == 1
+        assert len(data['elements']) == 1 + 16
+        assert query_timeout(queries[-1]) == query_limits(bbox_area_km2(query_extent(QUERY)) / 16)[0]
+
+        # A failure part-way keeps the finished quadrants; the retry fetches only the rest
+        def failing_fetch(query):
+            if len(queries) == 11:
+                queries.append(query)
+                raise requests.exceptions.ConnectionError('connection reset')
+            return fake_fetch(query)
+
+        queries.clear()
+        fetcher._fetch_from_overpass = failing_fetch
+        try:
+            fetcher.fetch_overpass(QUERY)
+            assert False, "the connection error should be raised"
+        except requests.exceptions.ConnectionError:
+            pass
+        tile_dir = os.path.join(tmp, OSMStreetFetcher.QUADRANT_DIR)
+        assert len(os.listdir(os.path.join(tile_dir, os.listdir(tile_dir)[0]))) > 8
+
+        queries.clear()
+        fetcher._fetch_from_overpass = fake_fetch
+        assert fetcher.fetch_overpass(QUERY) == data
+        # Whole query, then the two quadrants not finished before (too large again) and their pieces
+        assert len(queries) == 1 + 2 + 8
+        assert not os.listdir(tile_dir)
+
+        fetcher.MAX_SPLIT_DEPTH = 1
+        try:
+            fetcher.fetch_overpass(QUERY)
+            assert False, "the split depth should be limited"
+        except OverpassQueryTooLarge:
+            pass
+
+
+if __name__ == '__main__':
+    try:
+        test_fixture_and_retries()
+        test_latency_and_slots()
+        test_too_large_queries_are_split()
+        test_recursive_split()
+        print("✅ Overpass stand-in tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
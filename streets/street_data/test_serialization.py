@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for the JSON serialization backends
+===============================================
+
+Checks that every installed backend round-trips street data and boundaries,
+writes the same layout, and decodes saved files into the same objects.
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+
+import pytest
+
+import serialization
+from city_boundary_fetcher import CityBoundary, CityBoundaryFetcher
+from osm_street_fetcher import OSMStreetFetcher, StreetSegment
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary')
+
+STREETS = [
+    StreetSegment('1', 'CÉSAR CHÁVEZ', 'ST', 'CÉSAR CHÁVEZ ST', [[[37.748, -122.42], [37.748, -122.41]]],
+                  0.55, 'San Francisco', 'CA', way_ids=[11, 12], highway='primary', importance=0.61),
+    StreetSegment('2', 'OAK', 'ST', 'OAK ST', [[[37.77, -122.43], [37.771, -122.42]]], 0.56,
+                  'San Francisco', 'CA')
+]
+
+
+@pytest.fixture(params=serialization.available_backends())
+def backend(request):
+    previous = serialization.set_backend(request.param)
+    yield request.param
+    serialization.set_backend(previous)
+
+
+def test_round_trip(backend):
+    """Dataclasses and non-ASCII text encode as UTF-8 and decode back to the same values."""
+    for indent in (False, True):
+        data = serialization.dumps({'streets': STREETS}, indent=indent)
+        assert 'CÉSAR CHÁVEZ'.encode('utf-8') in data
+        decoded = serialization.loads(data)
+        assert [StreetSegment(**s) for s in decoded['streets']] == STREETS
+
+    with pytest.raises(ValueError):
+        serialization.loads(b'{"streets": [')
+
+
+def test_same_layout_across_backends():
+    """Every backend writes the same bytes as the standard library."""
+    value = {'b': [1, 2.5, None], 'a': {'name': 'Ñandú', 'ok': True}, 'streets': STREETS}
+    previous, outputs = serialization.BACKEND, {}
+    for name in serialization.available_backends():
+        serialization.set_backend(name)
+        outputs[name] = [serialization.dumps(value, indent=indent, sort_keys=sort_keys)
+                         for indent in (False, True) for sort_keys in (False, True)]
+    serialization.set_backend(previous)
+
+    for name, output in outputs.items():
+        assert output == outputs['json'], name
+    assert outputs['json'][1] == json.dumps(json.loads(outputs['json'][0]), sort_keys=True,
+                                            separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def test_decode_saved_files(backend):
+    """Saved streets and boundary files decode into the objects that were saved."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = OSMStreetFetcher(output_dir=tmp).save_streets_data(STREETS, 'test')
+        with open(path, 'rb') as f:
+            assert serialization.decode_streets(f.read(), StreetSegment) == STREETS
+
+        boundary = CityBoundaryFetcher(boundary_dir=BOUNDARY_DIR).load_boundary('berkeley_ca')
+        fetcher = CityBoundaryFetcher(boundary_dir=tmp)
+        fetcher.save_boundary(boundary, 'copy')
+        assert fetcher.load_boundary('copy') == boundary
+
+        assert serialization.decode_boundary(b'{"type": "FeatureCollection", "features": []}', CityBoundary) is None
+
+
+def test_unavailable_backend():
+    """Selecting an unknown or uninstalled backend fails without changing the current one."""
+    current = serialization.BACKEND
+    with pytest.raises(ValueError):
+        serialization.set_backend('yaml')
+    if not serialization.MSGSPEC_AVAILABLE:
+        with pytest.raises(ValueError):
+            serialization.set_backend('msgspec')
+    assert serialization.BACKEND == current
+
+
+if __name__ == '__main__':
+    try:
+        previous = serialization.BACKEND
+        for name in serialization.available_backends():
+            serialization.set_backend(name)
+            test_round_trip(name)
+            test_decode_saved_files(name)
+        serialization.set_backend(previous)
+        test_same_layout_across_backends()
+        test_unavailable_backend()
+        print("✅ Serialization tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
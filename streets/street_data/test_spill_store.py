@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script for out-of-core parsing and merging
+===============================================
+
+Parses and merges the same responses in memory and through the spill store
+(with a budget small enough to flush constantly), from decoded responses and
+from columnar Overpass stores, and checks that the streets are identical, in
+the same order. Also runs the pipeline in both modes.
+"""
+
+import copy
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from osm_street_fetcher import OSMStreetFetcher, StreetSegment
+from overpass_store import OverpassStore
+from spill_store import SpillStore, decode_coords, encode_coords
+from street_pipeline import StreetDataPipeline
+from synthetic_overpass import generate_overpass_response
+from test_street_merge import overlapping_response
+from test_street_pipeline import REGION, synthetic_response
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary')
+
+# Small enough that the buffers are written every few rows
+TINY_BUDGET = 16 * 1024
+
+
+def responses():
+    """Synthetic data with relations and shared names, overlapping relations, and a repeated way."""
+    synthetic = generate_overpass_response(REGION['bbox'], 3000, relation_share=0.1, ways_per_name=4, seed=3)
+    repeated = copy.deepcopy(synthetic_response())
+    way = copy.deepcopy(repeated['elements'][0])
+    way['tags']['name'] = 'Milvia Street'
+    repeated['elements'].append(way)
+    return {'synthetic': synthetic, 'overlapping': overlapping_response(), 'repeated': repeated}
+
+
+def test_coords_round_trip():
+    """Packed coordinates decode to the same floats."""
+    coords = [[37.8712345, -122.2712345], [37.0, -122.5], [float('nan'), 1e-7]]
+    decoded = decode_coords(encode_coords(coords))
+    assert decoded[:2] == coords[:2] and decoded[2][1] == 1e-7 and decoded[2][0] != decoded[2][0]
+    assert decode_coords(encode_coords([])) == []
+
+
+def test_same_streets_as_in_memory():
+    """Out-of-core results match the in-memory results exactly, for decoded responses and stores."""
+    with tempfile.TemporaryDirectory() as tmp:
+        in_memory = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR)
+        spilled = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR, max_memory=TINY_BUDGET)
+
+        for name, data in responses().items():
+            expected = in_memory._process_overpass_data(data, REGION)
+            assert expected, name
+            assert spilled._process_overpass_data(data, REGION) == expected, name
+            assert spilled._process_overpass_data(OverpassStore.from_overpass(data), REGION) == expected, name
+
+        # The scratch store is removed afterwards
+        assert not [entry for entry in os.listdir(tmp) if entry.startswith('.spill-')]
+
+
+def test_spill_store_contents():
+    """The store keeps parse order, first positions of repeated ways and (name, suffix) groups."""
+    data = responses()['repeated']
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR, max_memory=TINY_BUDGET)
+        path = os.path.join(tmp, 'parse.sqlite')
+        store = fetcher._parse_overpass_data_spilled(data, REGION, path)
+        store.close()
+        assert os.path.exists(path) and not os.path.exists(f"{path}.tmp")
+
+        store = SpillStore.open(path)
+        try:
+            assert [way_id for way_id, _, _ in store.unused_ways()] == [1, 2, 3]
+            assert store.ways([1])[1][0]['name'] == 'Milvia Street'
+            groups = [[s.full_name for s in group] for group in store.street_groups(StreetSegment)]
+            assert groups == [['ACTON CRESCENT'], ['MILVIA ST'], ['TELEGRAPH AVE']]
+            assert store.street_counts() == {'streets': 3, 'names': 3, 'lines': 3, 'multi': 0}
+        finally:
+            store.close()
+
+        # Store record batches give the same records as the whole-store view
+        columnar = OverpassStore.from_overpass(responses()['synthetic'])
+        assert list(columnar.iter_way_records(batch=7)) == list(columnar.way_records().items())
+        assert list(columnar.iter_relation_records(batch=7)) == columnar.relation_records()
+
+
+def test_pipeline_out_of_core():
+    """The pipeline writes the same streets with a memory budget, keeping the parsed streets on disk."""
+    outputs = {}
+    for budget in (None, TINY_BUDGET):
+        with tempfile.TemporaryDirectory() as tmp:
+            fetcher = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR, max_memory=budget)
+            fetcher._fetch_from_overpass = lambda query: responses()['synthetic']
+            pipeline = StreetDataPipeline(fetcher, None, incremental=True)
+            streets, path = pipeline.build(REGION, 'berkeley_ca', lambda: fetcher._get_or_fetch_boundary(REGION))
+            with open(path, 'r', encoding='utf-8') as f:
+                outputs[budget] = json.load(f)['streets']
+
+            build_dir = os.path.join(tmp, StreetDataPipeline.BUILD_DIR, 'berkeley_ca')
+            assert os.path.exists(os.path.join(build_dir, 'parse.streets.sqlite')) == bool(budget)
+
+            # Unchanged inputs skip every stage, including the spilled parse
+            pipeline = StreetDataPipeline(fetcher, None, incremental=True)
+            again, _ = pipeline.build(REGION, 'berkeley_ca', lambda: fetcher._get_or_fetch_boundary(REGION))
+            assert not any(r.ran for r in pipeline.graph.results) and again == streets
+
+    assert outputs[None] and outputs[TINY_BUDGET] == outputs[None]
+
+
+if __name__ == '__main__':
+    try:
+        test_coords_round_trip()
+        test_same_streets_as_in_memory()
+        test_spill_store_contents()
+        test_pipeline_out_of_core()
+        print("✅ Out-of-core processing tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
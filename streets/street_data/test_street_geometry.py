@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for precomputed street geometry
+===========================================
+
+Checks the vectorized bboxes and label anchors against a plain per-street
+computation on a synthetic city, plus edge cases (empty streets, zero-length
+lines, several parts).
+"""
+
+import logging
+import math
+import sys
+
+import numpy as np
+
+from osm_street_fetcher import OSMStreetFetcher, StreetSegment
+from street_geometry import annotate_geometry, compute_geometry
+from synthetic_overpass import generate_overpass_response
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+REGION = {'city': 'Berkeley', 'state': 'CA'}
+
+
+def street(lines):
+    return StreetSegment('s', 'OAK', 'ST', 'OAK ST', lines, 0.0, 'Berkeley', 'CA')
+
+
+def reference_label(lines):
+    """Half-way point along the longest part, walking segment by segment."""
+    def steps(line):
+        return [math.hypot(b[0] - a[0], (b[1] - a[1]) * math.cos(math.radians(b[0])))
+                for a, b in zip(line, line[1:])]
+
+    longest = max(lines, key=lambda line: round(sum(steps(line)), 9))
+    remaining = sum(steps(longest)) / 2
+    for (a, b), step in zip(zip(longest, longest[1:]), steps(longest)):
+        if remaining <= step and step > 0:
+            t = remaining / step
+            return [a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t]
+        remaining -= step
+    return longest[0]
+
+
+def test_matches_reference():
+    """Bboxes and labels of a synthetic city match the per-street computation."""
+    data = generate_overpass_response([37.845, -122.310, 37.895, -122.235], n_elements=800, seed=5)
+    streets = OSMStreetFetcher._deduplicate_and_merge_streets(
+        OSMStreetFetcher(), OSMStreetFetcher()._parse_overpass_data(data, REGION))
+    assert any(len(s.coordinates) > 1 for s in streets)
+
+    geometry = compute_geometry(streets)
+    for i, s in enumerate(streets):
+        points = np.asarray([p for line in s.coordinates for p in line])
+        assert np.allclose(geometry['street_bboxes'][i], [*points.min(axis=0), *points.max(axis=0)])
+        assert np.allclose(geometry['labels'][i], reference_label(s.coordinates), atol=1e-9)
+
+
+def test_edge_cases():
+    """Empty streets are left alone; zero-length and multi-part lines get sensible anchors."""
+    straight = street([[[37.0, -122.0], [37.0, -121.998]], [[37.1, -122.0], [37.1, -121.99], [37.1, -121.98]]])
+    point = street([[[37.2, -122.2], [37.2, -122.2]]])
+    empty = street([])
+
+    annotated = annotate_geometry([straight, empty, point])
+    assert annotated[0].bbox == [37.0, -122.0, 37.1, -121.98]
+    assert annotated[0].line_bboxes == [[37.0, -122.0, 37.0, -121.998], [37.1, -122.0, 37.1, -121.98]]
+    assert annotated[0].label == [37.1, -121.99]
+    assert annotated[1] is empty and empty.bbox is None
+    assert annotated[2].label == [37.2, -122.2]
+
+
+if __name__ == '__main__':
+    try:
+        test_matches_reference()
+        test_edge_cases()
+        print("✅ Street geometry tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for street importance ranking
+=========================================
+
+Checks the class weights and score, that ranking uses road class, length and
+connectivity, and that a build keeps each street's highway class and writes
+the streets sorted by importance.
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from osm_street_fetcher import OSMStreetFetcher, StreetSegment
+from street_importance import best_highway_class, class_weight, importance_order, importance_score, rank_streets
+from test_street_pipeline import run, synthetic_response
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary')
+
+
+def street(street_id, highway, length):
+    return StreetSegment(street_id, street_id.upper(), 'ST', f"{street_id.upper()} ST",
+                         [[[37.87, -122.27], [37.88, -122.27]]], length, 'Berkeley', 'CA', highway=highway)
+
+
+def test_importance_score():
+    """Class, length and connectivity each raise the score."""
+    assert class_weight('primary') > class_weight('residential') > class_weight('service')
+    assert class_weight('primary_link') == class_weight('primary') / 2
+    assert class_weight(None) == class_weight('raceway')
+    assert best_highway_class(['residential', None, 'secondary']) == 'secondary'
+    assert best_highway_class([None]) is None
+
+    base = importance_score('residential', 1.0, 4)
+    assert importance_score('primary', 1.0, 4) > base
+    assert importance_score('residential', 3.0, 4) > base
+    assert importance_score('residential', 1.0, 12) > base
+    assert 0 < importance_score('service', 0.0, 0) < importance_score('motorway', 100.0, 100) <= 1.0
+
+
+def test_rank_streets():
+    """Streets are sorted by importance; connectivity comes from the intersection index."""
+    streets = [street('alley', 'service', 0.2), street('oak', 'residential', 1.0),
+               street('elm', 'residential', 1.0), street('main', 'primary', 1.0)]
+    index = {'street_ids': ['alley', 'oak', 'elm', 'main'], 'adjacency': [[3], [3], [1, 3], [0, 1, 2]]}
+
+    ranked = rank_streets(streets, index)
+    assert [s.id for s in ranked] == ['main', 'elm', 'oak', 'alley']
+    assert all(s.importance is not None for s in ranked) and streets[0].importance is None
+    assert [s.id for s in rank_streets(streets)] == ['main', 'elm', 'oak', 'alley']
+
+
+def test_build_writes_ranked_streets():
+    """The streets file keeps highway classes and is sorted by importance."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR)
+        fetcher._fetch_from_overpass = lambda query: synthetic_response()
+
+        _, path, _ = run(fetcher, None)
+        with open(path, 'r', encoding='utf-8') as f:
+            written = json.load(f)['streets']
+
+        assert all(s['highway'] == 'residential' for s in written)
+        assert all(s['importance'] > 0 for s in written)
+        assert written == sorted(written, key=importance_order)
+
+
+if __name__ == '__main__':
+    try:
+        test_importance_score()
+        test_rank_streets()
+        test_build_writes_ranked_streets()
+        print("✅ Street importance tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
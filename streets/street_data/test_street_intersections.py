@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script for the street intersection index
+=============================================
+
+Builds a small street grid and checks that streets sharing an OSM node are
+adjacent, that a bridge without a shared node is not, and that streets
+without node ids fall back to geometric intersection.
+"""
+
+import json
+import logging
+import sys
+import tempfile
+import time
+
+from osm_street_fetcher import OSMStreetFetcher, StreetSegment
+from street_intersections import compute_intersections
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def street(street_id, lines):
+    return StreetSegment(street_id, street_id.upper(), '', street_id.upper(), lines, 1.0, 'Testville', 'CA')
+
+
+def way(way_id, node_ids, line):
+    return {'type': 'way', 'id': way_id, 'nodes': node_ids,
+            'geometry': [{'lat': lat, 'lon': lon} for lat, lon in line]}
+
+
+def test_node_and_geometric_intersections():
+    """Shared nodes connect streets; bridges do not; lines without node ids use geometry."""
+    main = [[37.0, -122.02], [37.0, -122.01], [37.0, -122.0]]
+    cross = [[36.99, -122.01], [37.0, -122.01], [37.01, -122.01]]  # meets main at node 2
+    bridge = [[36.99, -122.015], [37.005, -122.015]]  # crosses main without a shared node
+    loose = [[36.99, -122.005], [37.01, -122.005]]  # no node ids: crosses main geometrically
+    side = [[37.01, -122.02], [37.01, -122.01]]  # starts at cross's end node
+
+    data = {'elements': [
+        way(1, [1, 2, 3], main),
+        way(2, [4, 2, 5], cross),
+        way(3, [7, 8], bridge),
+        way(4, [9, 5], side),
+    ]}
+    streets = [street('main', [main]), street('cross', [cross]), street('bridge', [bridge]),
+               street('loose', [loose]), street('side', [side])]
+
+    index = compute_intersections(streets, data)
+    assert index['street_ids'] == ['main', 'cross', 'bridge', 'loose', 'side']
+    assert index['adjacency'] == [[1, 3], [0, 4], [], [0], [1]]
+    points = {tuple(p): members for p, members in zip(index['points'], index['streets_at'])}
+    assert points == {(37.0, -122.01): [0, 1], (37.0, -122.005): [0, 3], (37.01, -122.01): [1, 4]}
+
+    # Without the raw response everything is geometric, so the bridge crosses main too
+    assert compute_intersections(streets)['adjacency'] == [[1, 2, 3], [0, 4], [0], [0], [1]]
+
+
+def test_grid_scale():
+    """A 90 x 90 street grid (8,100 crossings) is indexed in well under a few seconds."""
+    n = 90
+    streets, elements = [], []
+    node = lambda row, col: row * n + col + 1
+    for row in range(n):
+        line = [[37.0 + row * 0.001, -122.0 + col * 0.001] for col in range(n)]
+        streets.append(street(f'row{row}', [line]))
+        elements.append(way(row + 1, [node(row, col) for col in range(n)], line))
+    for col in range(n):
+        line = [[37.0 + row * 0.001, -122.0 + col * 0.001] for row in range(n)]
+        streets.append(street(f'col{col}', [line]))
+
+    for data in ({'elements': elements}, None):
+        start = time.perf_counter()
+        index = compute_intersections(streets, data)
+        elapsed = time.perf_counter() - start
+        print(f"{len(streets)} streets, {len(index['points'])} intersections in {elapsed:.2f}s")
+        assert len(index['points']) == n * n
+        assert all(len(neighbours) == n for neighbours in index['adjacency'])
+        assert elapsed < 5
+
+
+def test_fetcher_saves_index():
+    """The fetcher writes the index as compact JSON."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = OSMStreetFetcher(output_dir=tmp, boundary_dir=tmp)
+        streets = [street('a', [[[37.0, -122.0], [37.0, -121.99]]]),
+                   street('b', [[[36.99, -121.995], [37.01, -121.995]]])]
+        path = fetcher.save_intersections(fetcher.compute_intersections(streets), 'testville_ca')
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        assert saved['region'] == 'testville_ca' and saved['adjacency'] == [[1], [0]]
+
+
+if __name__ == '__main__':
+    try:
+        test_node_and_geometric_intersections()
+        test_grid_scale()
+        test_fetcher_saves_index()
+        print("✅ Street intersection tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for street merging and geometry deduplication
+=========================================================
+
+Feeds overlapping associatedStreet relations and a reversed copy of a way
+through parsing and merging, and checks that every LineString is kept once,
+source way ids are tracked and the length counts each line once.
+"""
+
+import logging
+import sys
+import tempfile
+
+from osm_street_fetcher import OSMStreetFetcher
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+REGION = {'city': 'Berkeley', 'state': 'CA'}
+
+NORTH = [{'lat': 37.860 + i * 0.004, 'lon': -122.2685} for i in range(5)]
+SOUTH = [{'lat': 37.844 + i * 0.004, 'lon': -122.2685} for i in range(5)]
+
+
+def overlapping_response():
+    """Two relations sharing way 10, plus way 12: way 10 digitized in the opposite direction."""
+    tags = {'name': 'Shattuck Avenue', 'highway': 'secondary'}
+    return {'elements': [
+        {'type': 'relation', 'id': 1, 'tags': {'type': 'associatedStreet', 'name': 'Shattuck Avenue'},
+         'members': [{'type': 'way', 'ref': 10, 'role': 'street'}, {'type': 'way', 'ref': 11, 'role': 'street'}]},
+        {'type': 'relation', 'id': 2, 'tags': {'type': 'associatedStreet', 'name': 'Shattuck Avenue'},
+         'members': [{'type': 'way', 'ref': 10, 'role': 'street'}]},
+        {'type': 'way', 'id': 10, 'tags': tags, 'geometry': NORTH},
+        {'type': 'way', 'id': 11, 'tags': tags, 'geometry': SOUTH},
+        {'type': 'way', 'id': 12, 'tags': tags, 'geometry': NORTH[::-1]},
+    ]}
+
+
+def test_duplicate_geometry_removed():
+    """Exact and reversed duplicate lines are dropped and the length is recomputed."""
+    fetcher = OSMStreetFetcher(output_dir=tempfile.gettempdir(), boundary_dir=tempfile.gettempdir())
+    parsed = fetcher._parse_overpass_data(overlapping_response(), REGION)
+    assert sorted(s.way_ids for s in parsed) == [[10], [10, 11], [12]]
+
+    merged = fetcher._deduplicate_and_merge_streets(parsed)
+    assert len(merged) == 1
+    street = merged[0]
+    assert street.full_name == 'SHATTUCK AVE'
+    assert street.way_ids == [10, 11, 12]
+    assert len(street.coordinates) == 2
+
+    unique_length = round(fetcher._calculate_length(street.coordinates), 2)
+    assert street.length == unique_length
+    assert street.length < sum(s.length for s in parsed)
+
+
+def test_distinct_geometry_kept():
+    """Lines that only share an end point are not duplicates; the length is measured once over both."""
+    fetcher = OSMStreetFetcher(output_dir=tempfile.gettempdir(), boundary_dir=tempfile.gettempdir())
+    data = overlapping_response()
+    data['elements'] = [el for el in data['elements'] if el['id'] in (10, 11) and el['type'] == 'way']
+    parsed = fetcher._parse_overpass_data(data, REGION)
+    merged = fetcher._deduplicate_and_merge_streets(parsed)
+    assert len(merged) == 1 and len(merged[0].coordinates) == 2
+    assert merged[0].way_ids == [10, 11]
+    # One rounding over the merged lines, not a sum of rounded segment lengths
+    assert merged[0].length == round(fetcher._calculate_length(merged[0].coordinates), 2)
+    assert abs(merged[0].length - sum(s.length for s in parsed)) <= 0.01
+
+
+if __name__ == '__main__':
+    try:
+        test_duplicate_geometry_removed()
+        test_distinct_geometry_kept()
+        print("✅ Street merge tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental street data builds
+==============================================
+
+Runs the stage graph against a small synthetic Overpass response for Berkeley
+and checks which stages re-run after a filter-only change, a forced re-fetch
+and an unchanged rebuild, plus checkpoint round trips and resumed runs.
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from checkpoint import load_streets_binary, save_streets_binary
+from osm_street_fetcher import OSMStreetFetcher, StreetSegment
+from street_pipeline import StreetDataPipeline
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary')
+
+REGION = {'name': 'Berkeley', 'city': 'Berkeley', 'state': 'CA', 'bbox': [37.84, -122.32, 37.91, -122.23]}
+
+
+def synthetic_response():
+    """A few named ways inside Berkeley in Overpass 'out geom' format."""
+    streets = [('Shattuck Avenue', 1, -122.2685), ('Telegraph Avenue', 2, -122.2590),
+               ('Acton Crescent', 3, -122.2800)]
+    elements = []
+    for name, way_id, lon in streets:
+        elements.append({
+            'type': 'way', 'id': way_id, 'tags': {'name': name, 'highway': 'residential'},
+            'geometry': [{'lat': 37.860 + i * 0.004, 'lon': lon} for i in range(5)]
+        })
+    return {'elements': elements}
+
+
+def run(fetcher, filters_path, **kwargs):
+    pipeline = StreetDataPipeline(fetcher, filters_path, **kwargs)
+    streets, path = pipeline.build(REGION, 'berkeley_ca', lambda: fetcher._get_or_fetch_boundary(REGION))
+    print(pipeline.graph.explain())
+    return streets, path, {r.name: r for r in pipeline.graph.results}
+
+
+def test_incremental_rebuilds():
+    """Only the stages downstream of a changed input run again."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR)
+        fetches = []
+        fetcher._fetch_from_overpass = lambda query: fetches.append(query) or synthetic_response()
+
+        filters_path = os.path.join(tmp, 'street_filters.json')
+        with open(filters_path, 'w', encoding='utf-8') as f:
+            json.dump({'berkeley_ca': ['ACTON CRESCENT']}, f)
+
+        streets, path, stages = run(fetcher, filters_path)
+        assert [s.full_name for s in streets] == ['SHATTUCK AVE', 'TELEGRAPH AVE']
+        assert all(r.ran for r in stages.values()) and len(stages) == len(StreetDataPipeline.STAGES)
+        with open(path, 'r', encoding='utf-8') as f:
+            assert all(s['bbox'] and s['line_bboxes'] and s['label'] for s in json.load(f)['streets'])
+
+        # Nothing changed: every stage is skipped and nothing is downloaded
+        streets, _, stages = run(fetcher, filters_path, incremental=True)
+        assert not any(r.ran for r in stages.values())
+        assert len(streets) == 2 and len(fetches) == 1
+
+        # A filter-only change re-runs just filter and the outputs
+        with open(filters_path, 'w', encoding='utf-8') as f:
+            json.dump({'berkeley_ca': ['ACTON CRESCENT', 'TELEGRAPH AVE']}, f)
+        streets, path, stages = run(fetcher, filters_path, incremental=True)
+        assert [name for name, r in stages.items() if r.ran] == ['filter', 'intersections', 'write']
+        assert stages['filter'].reason == 'street_filters changed'
+        assert len(fetches) == 1
+        with open(path, 'r', encoding='utf-8') as f:
+            assert [s['full_name'] for s in json.load(f)['streets']] == ['SHATTUCK AVE']
+
+        # A forced re-fetch with identical data stops at the fetch stage
+        _, _, stages = run(fetcher, filters_path, incremental=True, force=['fetch'])
+        assert [name for name, r in stages.items() if r.ran] == ['fetch']
+        assert stages['fetch'].reason == 'forced; output unchanged'
+        assert len(fetches) == 2
+
+
+def test_streets_checkpoint_round_trip():
+    """The binary checkpoint restores streets exactly, including empty geometry and optional fields."""
+    fetcher = OSMStreetFetcher(output_dir=tempfile.gettempdir(), boundary_dir=BOUNDARY_DIR)
+    streets = fetcher._process_overpass_data(synthetic_response(), REGION)
+    streets.append(StreetSegment('x', 'EMPTY', '', 'EMPTY', [], 0.0, 'Berkeley', 'CA', True, 123))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'streets.npz')
+        save_streets_binary(streets, path)
+        assert load_streets_binary(path, StreetSegment) == streets
+
+
+def test_resume_after_failure():
+    """A run that fails in the filter stage resumes without downloading again."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR)
+        fetches = []
+        fetcher._fetch_from_overpass = lambda query: fetches.append(query) or synthetic_response()
+
+        original_filter = fetcher._filter_streets_by_boundary
+        fetcher._filter_streets_by_boundary = lambda streets, boundary: 1 / 0
+        try:
+            run(fetcher, None)
+            assert False, "filter stage should have failed"
+        except ZeroDivisionError:
+            pass
+
+        fetcher._filter_streets_by_boundary = original_filter
+        streets, _, stages = run(fetcher, None, resume=True)
+        assert len(streets) == 3 and len(fetches) == 1
+        assert [name for name, r in stages.items() if not r.ran] == ['boundary', 'query', 'fetch', 'parse', 'merge']
+        assert stages['fetch'].reason == 'resumed from checkpoint'
+
+        # The finished run leaves nothing to resume: everything runs again
+        _, _, stages = run(fetcher, None, resume=True)
+        assert all(r.ran for r in stages.values()) and len(fetches) == 2
+
+
+def test_batch_resume():
+    """Each city of a batch is its own unit; a resumed batch only retries unfinished cities."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR)
+        fetcher.boundary_fetcher.get_city_boundary = lambda *args: None  # offline: use saved boundaries
+        fetches = []
+        fetcher._fetch_from_overpass = lambda query: fetches.append(query) or synthetic_response()
+
+        cities = [('Berkeley', 'CA'), ('Gotham', 'NJ')]
+        results = StreetDataPipeline(fetcher, None).build_cities(cities)
+        assert results['berkeley_ca'][0] == 'done' and results['gotham_nj'] == ('failed', None)
+        assert len(fetches) == 1
+
+        results = StreetDataPipeline(fetcher, None, resume=True).build_cities(cities)
+        assert results['berkeley_ca'][0] == 'done' and results['gotham_nj'][0] == 'failed'
+        assert len(fetches) == 1
+
+
+if __name__ == '__main__':
+    try:
+        test_incremental_rebuilds()
+        test_streets_checkpoint_round_trip()
+        test_resume_after_failure()
+        test_batch_resume()
+        print("✅ Street pipeline tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test script for the on-demand street data service
+=================================================
+
+Runs the service against the Overpass stand-in and checks that concurrent
+requests for a city share one build, the event loop keeps answering while it
+runs, results are cached (in memory and through the incremental build) until
+the streets file changes, the cache stays within its byte budget and errors map
+to HTTP statuses.
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from overpass_stub_server import FaultConfig, OverpassStubServer
+from serialization import loads
+from street_service import ByteLRUCache, StreetDataService
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary')
+
+BERKELEY_BBOX = [37.845, -122.310, 37.895, -122.235]
+
+
+async def get(port: int, path: str, method: str = 'GET'):
+    """Send one request and return (status, body, elapsed seconds)."""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b'\r\n\r\n', 1)
+    return int(head.split()[1]), body, time.perf_counter() - start
+
+
+def make_service(tmp: str, overpass_url: str, **kwargs) -> StreetDataService:
+    boundary_dir = os.path.join(tmp, 'boundary')
+    os.makedirs(boundary_dir)
+    shutil.copy(os.path.join(BOUNDARY_DIR, 'berkeley_ca.geojson'), boundary_dir)
+    return StreetDataService(os.path.join(tmp, 'data'), boundary_dir, overpass_url=overpass_url,
+                             street_filters=None, workers=2, **kwargs)
+
+
+def test_lru_cache():
+    """Least recently used entries are evicted first; oversized values are not cached."""
+    cache = ByteLRUCache(10)
+    cache.put('a', b'aaaa')
+    cache.put('b', b'bbbb')
+    assert cache.get('a') == b'aaaa'  # 'b' is now the least recently used
+    cache.put('c', b'cccc')
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+    assert cache.bytes == 8 and cache.evictions == 1
+
+    assert not cache.put('d', b'd' * 11)
+    assert 'd' not in cache and cache.bytes == 8
+
+    cache.put('a', b'a')
+    assert cache.bytes == 5 and len(cache) == 2
+
+
+def test_coalesced_build_and_cache():
+    """Concurrent requests share one build; later requests are served from the caches."""
+    stub = OverpassStubServer(faults=FaultConfig(latency=1.0), synthetic_bbox=BERKELEY_BBOX,
+                              synthetic_elements=300).start()
+
+    async def scenario(service: StreetDataService):
+        await service.start(port=0)
+        try:
+            path = '/streets?city=Berkeley&state=CA'
+            builds = [asyncio.ensure_future(get(service.port, path)) for _ in range(3)]
+
+            # The event loop keeps answering while the build waits on Overpass
+            await asyncio.sleep(0.3)
+            status, body, elapsed = await get(service.port, '/health')
+            assert status == 200 and elapsed < 0.5
+            assert loads(body)['jobs_in_flight'] == 1
+
+            results = await asyncio.gather(*builds)
+            assert all(status == 200 for status, _, _ in results)
+            assert len({body for _, body, _ in results}) == 1
+            streets = loads(results[0][1])['streets']
+            assert streets and streets[0]['city'] == 'Berkeley'
+            assert stub.stats['requests'] == 1
+
+            # Memory cache hit
+            status, body, _ = await get(service.port, path)
+            assert status == 200 and body == results[0][1]
+
+            # After eviction the incremental build reuses the stored Overpass response
+            service.cache.pop('streets/berkeley_ca')
+            status, body, _ = await get(service.port, path)
+            assert status == 200 and loads(body)['streets'] == streets
+            assert stub.stats['requests'] == 1
+
+            # A rebuild outside the service (a newer streets file) replaces the cached response
+            streets_file = os.path.join(service.settings['output_dir'], 'berkeley_ca_streets.json')
+            mtime = os.stat(streets_file).st_mtime_ns + 10 ** 9
+            os.utime(streets_file, ns=(mtime, mtime))
+            status, body, _ = await get(service.port, path)
+            assert status == 200 and loads(body)['streets'] == streets
+            assert service.cache_invalidations == 1 and stub.stats['requests'] == 1
+
+            _, metrics, _ = await get(service.port, '/metrics')
+            metrics = metrics.decode('utf-8')
+            assert 'street_service_coalesced_total 2' in metrics
+            assert 'street_service_cache_hits_total 1' in metrics
+            assert 'street_service_builds_total{result="done"} 3' in metrics
+            assert 'street_service_cache_invalidations_total 1' in metrics
+            assert 'street_service_request_seconds_count{endpoint="/streets"} 6' in metrics
+            assert 'street_service_queue_depth 0' in metrics
+        finally:
+            await service.stop()
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            asyncio.run(scenario(make_service(tmp, stub.url)))
+    finally:
+        stub.stop()
+
+
+def test_boundary_and_errors():
+    """Boundaries are served from the boundary directory; bad requests get error statuses."""
+    async def scenario(service: StreetDataService):
+        await service.start(port=0)
+        try:
+            status, body, _ = await get(service.port, '/boundary?city=Berkeley&state=CA')
+            assert status == 200
+            assert loads(body)['features'][0]['properties']['name'] == 'Berkeley'
+
+            assert (await get(service.port, '/streets?city=Berkeley'))[0] == 400
+            assert (await get(service.port, '/streets?region=atlantis'))[0] == 404
+            assert (await get(service.port, '/nowhere'))[0] == 404
+            assert (await get(service.port, '/streets', method='POST'))[0] == 405
+
+            # A request line over the stream limit fails the read; it is counted as a 500
+            reader, writer = await asyncio.open_connection('127.0.0.1', service.port)
+            writer.write(b"GET /" + b"x" * 100000 + b" HTTP/1.1\r\n\r\n")
+            try:
+                await writer.drain()
+                await reader.read()
+            except ConnectionError:
+                pass  # The server may reset the connection with the request unread
+            writer.close()
+            await asyncio.sleep(0.1)
+            assert service.requests[('unknown', 500)] == 1
+        finally:
+            await service.stop()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(scenario(make_service(tmp, 'http://127.0.0.1:9/api/interpreter')))
+
+
+if __name__ == '__main__':
+    try:
+        test_lru_cache()
+        test_coalesced_build_and_cache()
+        test_boundary_and_errors()
+        print("✅ Street service tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test script for spatial street shards
+=====================================
+
+Shards a synthetic city with a small byte budget and checks that every street
+lands in exactly one shard within budget, that shard bboxes cover their
+streets, and that the index is listed in the manifest.
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from dataset_manifest import MANIFEST_FILE
+from osm_street_fetcher import OSMStreetFetcher
+from street_geometry import annotate_geometry, compute_geometry
+from street_shards import hilbert_index, street_bboxes
+from synthetic_overpass import generate_overpass_response
+from test_street_pipeline import run
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BOUNDARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boundary')
+
+BERKELEY_BBOX = [37.845, -122.310, 37.895, -122.235]
+
+
+def test_shards_cover_streets():
+    """Every street is in exactly one shard; shards respect the budget and list their extent."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR, shard_bytes=2000)
+        response = generate_overpass_response(BERKELEY_BBOX, n_elements=600, outside_share=0, seed=3)
+        fetcher._fetch_from_overpass = lambda query: response
+
+        streets, path, _ = run(fetcher, None)
+        shard_dir = os.path.join(tmp, 'berkeley_ca_shards')
+        with open(os.path.join(shard_dir, 'index.json'), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+
+        assert len(index['shards']) > 1
+        assert index['total_streets'] == len(streets) == sum(s['streets'] for s in index['shards'])
+
+        names = []
+        for entry in index['shards']:
+            with open(os.path.join(shard_dir, entry['file']), 'rb') as f:
+                body = f.read()
+            assert len(body) == entry['bytes'] <= 2000 or entry['streets'] == 1
+            shard = json.loads(body)
+            assert len(shard['streets']) == entry['streets']
+            south, west, north, east = entry['bbox']
+            for street in shard['streets']:
+                names.append(street['full_name'])
+                for lat, lon in (point for line in street['coordinates'] for point in line):
+                    assert south <= lat <= north and west <= lon <= east
+        assert sorted(names) == sorted(s.full_name for s in streets)
+
+        with open(os.path.join(tmp, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            entry = json.load(f)['cities']['berkeley_ca']
+        assert entry['files']['shards']['file'] == 'berkeley_ca_shards/index.json'
+
+        # Without a budget the shards are removed again
+        fetcher.shard_bytes = None
+        fetcher.save_streets_data(streets, 'berkeley_ca')
+        assert not os.path.exists(shard_dir)
+
+
+def test_hilbert_index():
+    """The curve visits every cell of a small grid once, moving one cell per step."""
+    x, y = np.meshgrid(np.arange(8), np.arange(8))
+    d = hilbert_index(x.ravel(), y.ravel(), order=3)
+    assert sorted(d.tolist()) == list(range(64))
+    order = np.argsort(d)
+    steps = np.abs(np.diff(x.ravel()[order])) + np.abs(np.diff(y.ravel()[order]))
+    assert (steps == 1).all()
+
+
+def test_street_bboxes():
+    """Annotated bboxes are reused and still contain the coordinates; the rest are computed."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = OSMStreetFetcher(output_dir=tmp, boundary_dir=BOUNDARY_DIR)
+        response = generate_overpass_response(BERKELEY_BBOX, n_elements=200, seed=5)
+        streets = fetcher._process_overpass_data(response, {'city': 'Berkeley', 'state': 'CA'})
+
+    exact = compute_geometry(streets)['street_bboxes']
+    assert np.array_equal(street_bboxes(streets), exact)
+
+    annotated = annotate_geometry(streets)
+    boxes = street_bboxes(annotated[:10] + streets[10:])
+    assert np.array_equal(boxes[10:], exact[10:])
+    assert (boxes[:10, :2] <= exact[:10, :2]).all() and (boxes[:10, 2:] >= exact[:10, 2:]).all()
+    assert np.allclose(boxes, exact, atol=1e-6)
+
+
+if __name__ == '__main__':
+    try:
+        test_shards_cover_streets()
+        test_hilbert_index()
+        test_street_bboxes()
+        print("✅ Street shard tests passed!")
+    except AssertionError as e:
+        logger.error(f"Test failed: {e}")
+        sys.exit(1)